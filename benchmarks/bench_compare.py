@@ -0,0 +1,193 @@
+"""
+Benchmark `csvdiff compare` on generated CSV pairs and catch regressions.
+
+Scenarios are every combination of the selected sizes, widths, encodings,
+change patterns and comparison modes (see `generate_csv.py` for the files).
+Each scenario runs in a fresh process and records the wall time, rows per
+second and peak RSS of every phase: for comparisons by position `read`,
+`diff` and `write`; for the other modes, which stream the result straight
+from DuckDB, one `compare` phase.
+
+Save a run with `--save` and pass it to later runs with `--baseline`: any
+phase that got slower or bigger by more than `--threshold` is reported, and
+the exit status is 1. Baselines are only comparable on the same machine.
+
+Usage:
+    uv run python benchmarks/bench_compare.py [--sizes 10000 100000] [--widths 8]
+        [--encodings utf-8 cp1252] [--patterns edits shuffled] [--modes positional key]
+        [--save results.json] [--baseline baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from generate_csv import ENCODINGS, PATTERNS, generate_pair
+
+MODES = ("positional", "key", "ignore-order")
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent / "data"
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 10.0
+
+T = TypeVar("T")
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the peak RSS of this process (Linux only). Returns whether it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak of the whole process; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(phases: dict[str, dict[str, float]], name: str, rows: int, func: Callable[[], T]) -> T:
+    """Run one phase and record its wall time, throughput and peak RSS under `name`."""
+    _reset_peak_rss()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    phases[name] = {
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds) if seconds > 0 else 0,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+    return result
+
+
+def run_scenario(file1: Path, file2: Path, mode: str, rows: int) -> dict[str, dict[str, float]]:
+    """Compare one pair the way `csvdiff compare` does, phase by phase."""
+    from csvdiff.utils.compare import CompareOptions, write_comparison, write_diff
+    from csvdiff.utils.csv import read_csv_pair
+    from csvdiff.utils.diff import diff_opcodes, format_unified, group_opcodes
+
+    phases: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="csvdiff-bench-") as temp_dir:
+        output_path = Path(temp_dir) / "result.diff"
+        if mode == "positional":
+            (lines1, _), (lines2, _) = measure(phases, "read", rows, lambda: read_csv_pair(file1, file2))
+            groups = measure(phases, "diff", rows, lambda: list(group_opcodes(diff_opcodes(lines1, lines2))))
+            lines = format_unified(lines1, lines2, iter(groups), str(file1), str(file2))
+            measure(phases, "write", rows, lambda: write_diff(lines, output_path))
+        else:
+            options = CompareOptions(key_columns=("id",)) if mode == "key" else CompareOptions(ignore_order=True)
+            measure(phases, "compare", rows, lambda: write_comparison(file1, file2, output_path, options))
+    return phases
+
+
+def _scenario_name(rows: int, width: int, encoding: str, pattern: str, mode: str) -> str:
+    return f"{mode}/{rows}x{width}/{encoding}/{pattern}"
+
+
+def run_all(args: argparse.Namespace) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for rows in args.sizes:
+        for width in args.widths:
+            for encoding in args.encodings:
+                for pattern in args.patterns:
+                    file1, file2 = generate_pair(args.data_dir, rows, width, encoding, pattern, args.seed)
+                    for mode in args.modes:
+                        name = _scenario_name(rows, width, encoding, pattern, mode)
+                        # A fresh process per scenario keeps peak RSS and caches independent
+                        completed = subprocess.run(
+                            [sys.executable, __file__, "--run-scenario", str(file1), str(file2), mode, str(rows)],
+                            capture_output=True,
+                            text=True,
+                        )
+                        if completed.returncode != 0:
+                            print(f"{name}: failed\n{completed.stderr}", file=sys.stderr)
+                            results[name] = {"error": completed.stderr.strip().splitlines()[-1:]}
+                            continue
+                        phases = json.loads(completed.stdout)
+                        results[name] = phases
+                        summary = "  ".join(
+                            f"{phase} {m['seconds']:.3f}s {m['rows_per_sec']:,} rows/s {m['peak_rss_mb']:.0f} MB"
+                            for phase, m in phases.items()
+                        )
+                        print(f"{name}: {summary}")
+    return results
+
+
+def compare_to_baseline(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Return a description of every phase that regressed against the baseline."""
+    regressions = []
+    for name, phases in results.items():
+        for phase, metrics in phases.items() if "error" not in phases else ():
+            before = baseline.get(name, {}).get(phase)
+            if not before:
+                continue
+            seconds, base_seconds = metrics["seconds"], before["seconds"]
+            if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > MIN_SECONDS_DELTA:
+                regressions.append(f"{name} {phase}: {base_seconds:.3f}s -> {seconds:.3f}s")
+            rss, base_rss = metrics["peak_rss_mb"], before["peak_rss_mb"]
+            if rss > base_rss * (1 + threshold) and rss - base_rss > MIN_RSS_DELTA_MB:
+                regressions.append(f"{name} {phase}: {base_rss:.0f} MB -> {rss:.0f} MB peak RSS")
+    return regressions
+
+
+def main() -> None:
+    if len(sys.argv) == 6 and sys.argv[1] == "--run-scenario":
+        file1, file2, mode, rows = Path(sys.argv[2]), Path(sys.argv[3]), sys.argv[4], int(sys.argv[5])
+        print(json.dumps(run_scenario(file1, file2, mode, rows)))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Rows per file.")
+    parser.add_argument("--widths", type=int, nargs="+", default=[8], help="Columns per file.")
+    parser.add_argument("--encodings", nargs="+", choices=list(ENCODINGS), default=list(ENCODINGS))
+    parser.add_argument("--patterns", nargs="+", choices=PATTERNS, default=list(PATTERNS))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["positional"])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Where generated files are kept between runs."
+    )
+    parser.add_argument("--save", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", type=Path, help="JSON file of an earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown or growth (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    if not _reset_peak_rss():
+        print("Note: peak RSS cannot be reset per phase here; it is the peak of the whole scenario.", file=sys.stderr)
+
+    results = run_all(args)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results saved to {args.save}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+
+    if any("error" in phases for phases in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the diff engines against difflib on the example district files.
+
+The two files in `docs/examples` are repeated `--scale` times (100 by default).
+Every copy gets its own prefix so rows stay unique across copies, the same way
+a real extract of that size would look. With `--shuffled`, the second file is
+the first one with its rows reordered instead, which is the worst case for
+engines that split the input around one anchor at a time.
+
+Usage:
+    uv run python benchmarks/bench_diff_engines.py [--scale 100] [--shuffled] [--algorithm myers ...]
+"""
+
+import argparse
+import time
+from itertools import zip_longest
+from pathlib import Path
+
+from csvdiff.utils.csv import read_csv_with_duckdb
+from csvdiff.utils.diff import DiffAlgorithm, unified_diff
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "docs" / "examples"
+
+
+def scale_lines(lines: list[str], scale: int) -> list[str]:
+    return [f"{copy},{line}" for copy in range(scale) for line in lines]
+
+
+def shuffle_lines(lines: list[str]) -> list[str]:
+    # Interleave both halves, like the "shuffled" pattern of generate_csv.py: every row moves
+    half = (len(lines) + 1) // 2
+    return [line for pair in zip_longest(lines[:half], lines[half:]) for line in pair if line is not None]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100, help="How many times to repeat the example files.")
+    parser.add_argument(
+        "--algorithm",
+        action="append",
+        choices=[algorithm.value for algorithm in DiffAlgorithm],
+        help="Algorithm(s) to benchmark. Defaults to all of them.",
+    )
+    parser.add_argument("--shuffled", action="store_true", help="Compare the first file with its rows reordered.")
+    args = parser.parse_args()
+
+    lines1, _ = read_csv_with_duckdb(EXAMPLES_DIR / "districts-2022.csv")
+    lines2, _ = read_csv_with_duckdb(EXAMPLES_DIR / "districts-2025.csv")
+    lines1, lines2 = scale_lines(lines1, args.scale), scale_lines(lines2, args.scale)
+    if args.shuffled:
+        lines2 = shuffle_lines(lines1)
+    print(f"Rows: {len(lines1):,} vs {len(lines2):,}")
+
+    for algorithm in args.algorithm or [algorithm.value for algorithm in DiffAlgorithm]:
+        start = time.perf_counter()
+        diff_lines = changed = 0
+        for line in unified_diff(lines1, lines2, "districts-2022.csv", "districts-2025.csv", DiffAlgorithm(algorithm)):
+            diff_lines += 1
+            if line[:1] in "+-":
+                changed += 1
+        duration = time.perf_counter() - start
+        print(f"{algorithm:>10}: {duration:8.3f}s  {diff_lines:,} diff lines ({changed:,} changed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the startup time of the CLI.
+
+Each run starts a fresh interpreter with `python -X importtime`, imports
+`csvdiff.cli` and runs `csvdiff --version`. The median wall time of the runs
+is reported, together with the modules that took longest to import in the
+last run, so heavy imports that sneak into the startup path are easy to spot.
+
+Usage:
+    uv run python benchmarks/bench_startup.py [--runs 20] [--top 15] [--command --help]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs `csvdiff` with the arguments that follow, the way the installed script does
+CLI_SCRIPT = "import sys; from csvdiff.cli import app; sys.argv[0] = 'csvdiff'; app()"
+
+
+def run_once(args: list[str]) -> tuple[float, str]:
+    """Run the CLI once and return its wall time and the `-X importtime` report."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CLI_SCRIPT, *args],
+        capture_output=True,
+        text=True,
+    )
+    duration = time.perf_counter() - start
+    return duration, result.stderr
+
+
+def parse_importtime(report: str) -> list[tuple[int, int, str]]:
+    """Parse `-X importtime` lines into (self us, cumulative us, module) tuples."""
+    imports = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        imports.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Number of interpreter starts to time.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list.")
+    parser.add_argument(
+        "--command", nargs=argparse.REMAINDER, default=["--version"], help="CLI arguments (default: --version)."
+    )
+    args = parser.parse_args()
+
+    durations = []
+    report = ""
+    for _ in range(args.runs):
+        duration, report = run_once(args.command)
+        durations.append(duration)
+
+    imports = parse_importtime(report)
+    total_us = sum(self_us for self_us, _, _ in imports)
+    print(
+        f"csvdiff {' '.join(args.command)}: median {statistics.median(durations) * 1000:.1f} ms over {args.runs} runs"
+    )
+    print(f"Imports: {len(imports)} modules, {total_us / 1000:.1f} ms")
+    if any(module.strip() == "duckdb" for _, _, module in imports):
+        print("Warning: duckdb is imported on this path")
+
+    print("\nSlowest imports (cumulative) in the last run:")
+    for _, cumulative_us, module in sorted(imports, key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Generate deterministic pairs of CSV files for benchmarks.
+
+Every cell is computed from the row number, the column and a seed, so the same
+arguments always produce byte-identical files on any machine, and rows can be
+generated in any order without keeping the file in memory.
+
+Change patterns of the second file:
+    edits      about 0.1% of the rows have one cell changed
+    shuffled   the same rows in a different order
+    appended   the same rows followed by 1% new rows
+    rewritten  every row has different values
+
+Usage:
+    uv run python benchmarks/generate_csv.py OUT_DIR [--rows 100000] [--columns 8]
+        [--encoding utf-8] [--pattern edits] [--seed 1]
+"""
+
+import argparse
+import csv
+import math
+from collections.abc import Iterator
+from pathlib import Path
+
+PATTERNS = ("edits", "shuffled", "appended", "rewritten")
+
+# Python codec and byte order mark of each encoding. utf-16 (little-endian) is decoded by
+# DuckDB itself, cp1252 and utf-16-be go through the transcoding path.
+ENCODINGS = {
+    "utf-8": ("utf-8", ""),
+    "cp1252": ("cp1252", ""),
+    "utf-16": ("utf-16-le", "\ufeff"),
+    "utf-16-be": ("utf-16-be", "\ufeff"),
+}
+
+# Every word can be encoded in cp1252, and some of them are not ASCII
+WORDS = ("alpha", "café", "naïve", "Straße", "€uro", "jalapeño", "delta", "crème brûlée", "omega", "a,b", 'say "hi"')
+
+# Odd multipliers spread the values of each column over the whole range
+MULTIPLIERS = (2654435761, 40503, 2246822519, 3266489917, 668265263, 374761393, 2870177451, 1640531527)
+
+EDIT_EVERY = 1000
+
+
+def _cell(row: int, column: int, seed: int) -> str:
+    value = (row * MULTIPLIERS[column % len(MULTIPLIERS)] + seed * 7919 + column) % 1_000_003
+    if column % 2:
+        return WORDS[value % len(WORDS)]
+    return f"{value / 100:.2f}"
+
+
+def make_row(row: int, columns: int, seed: int) -> list[str]:
+    """Return row number `row` of a generated file with `columns` columns."""
+    return [str(row)] + [_cell(row, column, seed) for column in range(1, columns)]
+
+
+def header(columns: int) -> list[str]:
+    return ["id"] + [f"col{column}" for column in range(1, columns)]
+
+
+def _shuffled_order(rows: int, seed: int) -> Iterator[int]:
+    # `step * k + offset (mod rows)` visits every row exactly once when `step` is coprime with `rows`
+    if rows == 0:
+        return iter(())
+    step = max(1, rows // 2 + seed) | 1
+    while math.gcd(step, rows) != 1:
+        step += 2
+    offset = seed % rows
+    return ((step * k + offset) % rows for k in range(rows))
+
+
+def changed_rows(rows: int, columns: int, seed: int, pattern: str) -> Iterator[list[str]]:
+    """Yield the rows of the second file of a pair."""
+    if pattern == "edits":
+        for row in range(rows):
+            values = make_row(row, columns, seed)
+            if row * MULTIPLIERS[0] % EDIT_EVERY == seed % EDIT_EVERY:
+                values[-1] = "edited"
+            yield values
+    elif pattern == "shuffled":
+        for row in _shuffled_order(rows, seed):
+            yield make_row(row, columns, seed)
+    elif pattern == "appended":
+        for row in range(rows + max(1, rows // 100)):
+            yield make_row(row, columns, seed)
+    elif pattern == "rewritten":
+        for row in range(rows):
+            yield make_row(row, columns, seed + 1)
+    else:
+        raise ValueError(f"Unknown change pattern '{pattern}'. Use one of: {', '.join(PATTERNS)}")
+
+
+def write_csv(path: Path, columns: int, rows: Iterator[list[str]], encoding: str) -> None:
+    codec, bom = ENCODINGS[encoding]
+    with open(path, "w", encoding=codec, newline="") as f:
+        f.write(bom)
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(header(columns))
+        writer.writerows(rows)
+
+
+def generate_pair(
+    out_dir: Path, rows: int, columns: int, encoding: str = "utf-8", pattern: str = "edits", seed: int = 1
+) -> tuple[Path, Path]:
+    """
+    Write a pair of CSV files to `out_dir` and return their paths.
+
+    Files that already exist are reused: their names hold every parameter.
+    """
+    name = f"{rows}x{columns}-{encoding}-s{seed}"
+    file1 = out_dir / f"{name}.csv"
+    file2 = out_dir / f"{name}-{pattern}.csv"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for path, make_rows in (
+        (file1, lambda: (make_row(row, columns, seed) for row in range(rows))),
+        (file2, lambda: changed_rows(rows, columns, seed, pattern)),
+    ):
+        if not path.exists():
+            # Write under a temporary name so an interrupted run never leaves a truncated file behind
+            temp_path = path.with_name(path.name + ".tmp")
+            write_csv(temp_path, columns, make_rows(), encoding)
+            temp_path.replace(path)
+    return file1, file2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", type=Path, help="Directory to write the files to.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the first file.")
+    parser.add_argument("--columns", type=int, default=8, help="Columns per row, including the id.")
+    parser.add_argument("--encoding", choices=list(ENCODINGS), default="utf-8")
+    parser.add_argument("--pattern", choices=PATTERNS, default="edits", help="How the second file differs.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    file1, file2 = generate_pair(args.out_dir, args.rows, args.columns, args.encoding, args.pattern, args.seed)
+    print(f"{file1}\n{file2}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+if TYPE_CHECKING:
+    from csvdiff.utils.compare import CompareOptions
+
+__all__ = ["changes", "diff"]
+
+
+def _iter_diff(file1: Path, file2: Path, options: "CompareOptions") -> Iterator[str]:
+    from csvdiff.utils.compare import open_comparison
+
+    with open_comparison(file1, file2, options) as comparison:
+        yield from comparison.lines
+
+
+def _iter_changes(file1: Path, file2: Path, options: "CompareOptions") -> Iterator[dict[str, Any]]:
+    from csvdiff.utils.records import open_change_records, record_dicts
+
+    with open_change_records(file1, file2, options) as records:
+        yield from record_dicts(records)
+
+
+def _column_names(value: Union[str, Sequence[str]], parse: Callable[[str], list[str]]) -> tuple[str, ...]:
+    # Each name of a sequence is checked like a comma-separated value
+    if isinstance(value, str):
+        return tuple(parse(value))
+    return tuple(name for item in value for name in parse(item))
+
+
+def _compare_options(
+    key: Union[str, Sequence[str], None] = None,
+    columns: Union[str, Sequence[str], None] = None,
+    exclude_columns: Union[str, Sequence[str], None] = None,
+    where: Optional[str] = None,
+    algorithm: str = "histogram",
+    memory_limit: Optional[str] = None,
+    threads: Optional[int] = None,
+    temp_dir: Union[str, Path, None] = None,
+    cache_dir: Union[str, Path, None] = None,
+    **flags: bool,
+) -> "CompareOptions":
+    # Imported here so `import csvdiff` stays cheap for callers that never diff
+    from csvdiff.utils.compare import CompareOptions
+    from csvdiff.utils.csv import DuckDBSettings, RowSelection, parse_columns
+    from csvdiff.utils.diff import DiffAlgorithm
+    from csvdiff.utils.keyed import parse_key_columns
+
+    key_columns = None
+    if key is not None:
+        key_columns = _column_names(key, parse_key_columns)
+        if len(set(key_columns)) != len(key_columns):
+            raise ValueError(f"Invalid key {list(key_columns)}. Key columns must be unique.")
+    selection = None
+    if columns is not None or exclude_columns is not None or where is not None:
+        selection = RowSelection(
+            columns=None if columns is None else _column_names(columns, parse_columns),
+            exclude_columns=() if exclude_columns is None else _column_names(exclude_columns, parse_columns),
+            where=where,
+        )
+    return CompareOptions(
+        key_columns=key_columns,
+        algorithm=DiffAlgorithm(algorithm),
+        settings=DuckDBSettings(
+            memory_limit=memory_limit, threads=threads, temp_dir=Path(temp_dir) if temp_dir is not None else None
+        ),
+        cache_dir=Path(cache_dir) if cache_dir is not None else None,
+        selection=selection,
+        **flags,
+    )
+
+
+def diff(
+    file1: Union[str, Path],
+    file2: Union[str, Path],
+    *,
+    key: Union[str, Sequence[str], None] = None,
+    sorted_input: bool = False,
+    algorithm: str = "histogram",
+    cells: bool = False,
+    ignore_order: bool = False,
+    columns: Union[str, Sequence[str], None] = None,
+    exclude_columns: Union[str, Sequence[str], None] = None,
+    where: Optional[str] = None,
+    memory_limit: Optional[str] = None,
+    threads: Optional[int] = None,
+    temp_dir: Union[str, Path, None] = None,
+    cache_dir: Union[str, Path, None] = None,
+) -> Iterator[str]:
+    """
+    Compare two CSV files, or a snapshot index and a CSV file, and return the diff lines lazily.
+
+    The options mirror those of `csvdiff compare`; `key`, `columns` and
+    `exclude_columns` are a column name, a comma-separated list of names or a
+    sequence of names. Nothing is written to disk (unless `cache_dir` is
+    given, which enables the cache of parsed files) and nothing is printed.
+    The files are read when the first line is requested, and the DuckDB
+    connection is closed once the iterator is exhausted or closed. The lines
+    have no trailing newline; an empty iterator means the files are identical.
+
+    Example:
+        >>> for line in csvdiff.diff("old.csv", "new.csv", key="id"):
+        ...     print(line)
+
+    Raises:
+        ValueError: If the options are invalid (immediately), or a file has no data (on iteration)
+    """
+    from csvdiff.utils.compare import API_OPTION_NAMES, check_options
+
+    options = _compare_options(
+        key=key,
+        columns=columns,
+        exclude_columns=exclude_columns,
+        where=where,
+        algorithm=algorithm,
+        memory_limit=memory_limit,
+        threads=threads,
+        temp_dir=temp_dir,
+        cache_dir=cache_dir,
+        sorted_input=sorted_input,
+        cells=cells,
+        ignore_order=ignore_order,
+    )
+    check_options(options, Path(file1), API_OPTION_NAMES)
+    return _iter_diff(Path(file1), Path(file2), options)
+
+
+def changes(
+    file1: Union[str, Path],
+    file2: Union[str, Path],
+    *,
+    key: Union[str, Sequence[str], None] = None,
+    sorted_input: bool = False,
+    algorithm: str = "histogram",
+    columns: Union[str, Sequence[str], None] = None,
+    exclude_columns: Union[str, Sequence[str], None] = None,
+    where: Optional[str] = None,
+    memory_limit: Optional[str] = None,
+    threads: Optional[int] = None,
+    temp_dir: Union[str, Path, None] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Compare two CSV files and return one change record per changed row, lazily.
+
+    Each record is a dict like a line of `csvdiff compare --format jsonl`:
+    `op` ("added", "removed" or "changed"), `old_row` and `new_row` (1-based
+    row numbers), `key`, `old` and `new` (values by column name, or None) and
+    `changed` (the names of the changed columns). The options are those of
+    `diff`; rows are compared by key with `key`, otherwise by position.
+
+    Example:
+        >>> for change in csvdiff.changes("old.csv", "new.csv", key="id"):
+        ...     print(change["op"], change["key"])
+
+    Raises:
+        ValueError: If the options are invalid (immediately), or a file has no data (on iteration)
+    """
+    from csvdiff.utils.compare import API_OPTION_NAMES
+    from csvdiff.utils.records import check_record_options
+
+    options = _compare_options(
+        key=key,
+        columns=columns,
+        exclude_columns=exclude_columns,
+        where=where,
+        algorithm=algorithm,
+        memory_limit=memory_limit,
+        threads=threads,
+        temp_dir=temp_dir,
+        sorted_input=sorted_input,
+    )
+    check_record_options(options, Path(file1), API_OPTION_NAMES)
+    return _iter_changes(Path(file1), Path(file2), options)
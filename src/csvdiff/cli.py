@@ -1,18 +1,56 @@
+import json
 import time
-from difflib import unified_diff
-from importlib.metadata import PackageNotFoundError, version
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import typer
-from rich.console import Console
+from typer.core import TyperGroup
 
-from csvdiff.utils.csv import read_csv_with_duckdb
-from csvdiff.utils.files import create_unique_output_file
-from csvdiff.utils.validation import validate_csv_file, validate_output_path
+from csvdiff.utils.cache import default_cache_dir
+from csvdiff.utils.diff import DiffAlgorithm
+from csvdiff.utils.files import OUTPUT_EXTENSIONS, OutputFormat
+from csvdiff.utils.stats import RunStats, StatsFormat, collect_stats
+from csvdiff.utils.validation import (
+    validate_csv_file,
+    validate_output_dir,
+    validate_output_location,
+    validate_output_path,
+)
 
-app = typer.Typer()
-console = Console()
+# DuckDB, rich and the comparison modules take hundreds of milliseconds to import. They are
+# imported inside the commands that need them, so `--help` and `--version` start quickly.
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from csvdiff.utils.csv import RowSelection
+
+
+class DefaultCommandGroup(TyperGroup):
+    """
+    Command group that runs `compare` when no subcommand is named.
+
+    This keeps `csvdiff file1.csv file2.csv` working next to `csvdiff index file.csv`.
+    Options of the group itself, like `--help` and `--show-completion`, are left alone.
+    """
+
+    def parse_args(self, ctx: typer.Context, args: list[str]) -> list[str]:
+        group_options = {name for param in self.get_params(ctx) for name in (*param.opts, *param.secondary_opts)}
+        if args and args[0] not in self.commands and args[0].split("=", 1)[0] not in group_options:
+            args = ["compare", *args]
+        return super().parse_args(ctx, args)
+
+
+app = typer.Typer(cls=DefaultCommandGroup, no_args_is_help=True)
+
+
+@lru_cache(maxsize=None)
+def _console() -> "Console":
+    from rich.console import Console
+
+    return Console()
 
 
 def version_option_callback(value: bool):
@@ -20,6 +58,8 @@ def version_option_callback(value: bool):
     Callback function for the `--version` option.
     """
     if value:
+        from importlib.metadata import PackageNotFoundError, version
+
         package_name = "csv-diff-py"
         try:
             typer.echo(f"{package_name}: {version(package_name)}")
@@ -33,6 +73,79 @@ def version_option_callback(value: bool):
             raise typer.Exit(1)
 
 
+def _report_result(actual_output_path: str, has_differences: bool) -> None:
+    # Check if files are identical (no diff content)
+    if not has_differences:
+        typer.secho(
+            f"No differences found. Files are identical. Empty diff saved to `{actual_output_path}`",
+            fg=typer.colors.BRIGHT_CYAN,
+        )
+    else:
+        typer.secho(f"Success. The result saved to `{actual_output_path}`", fg=typer.colors.BRIGHT_GREEN)
+
+
+def _row_selection(
+    columns: Optional[str], exclude_columns: Optional[str], where: Optional[str]
+) -> "Optional[RowSelection]":
+    from csvdiff.utils.csv import RowSelection, parse_columns
+
+    if columns is None and exclude_columns is None and where is None:
+        return None
+    return RowSelection(
+        columns=tuple(parse_columns(columns)) if columns is not None else None,
+        exclude_columns=tuple(parse_columns(exclude_columns)) if exclude_columns is not None else (),
+        where=where,
+    )
+
+
+@contextmanager
+def _error_status(status: int) -> Iterator[None]:
+    """Exit with `status` instead of 1 when a check inside the block fails."""
+    try:
+        yield
+    except typer.Exit as e:
+        if e.exit_code == 1:
+            raise typer.Exit(status) from None
+        raise
+
+
+def _warn_column_structures(columns1: list[str], columns2: list[str]) -> None:
+    if columns1 != columns2:
+        typer.secho("Warning: CSV files have different column structures.", fg=typer.colors.YELLOW, err=True)
+
+
+def _report_stats(file1: Path, file2: Path, run_stats: RunStats, stats_format: StatsFormat) -> None:
+    # Stats go to stderr, apart from the result messages on stdout, so the JSON report can be parsed as is
+    report = run_stats.to_dict([file1, file2])
+    if stats_format == StatsFormat.JSON:
+        typer.echo(json.dumps(report), err=True)
+        return
+
+    for label, file_stats in zip(("First file", "Second file"), report["files"]):
+        details = [f"{file_stats['bytes']:,} bytes"]
+        if file_stats["rows"] is not None:
+            details.append(f"{file_stats['rows']:,} rows ({file_stats['rows_per_sec']:,} rows/s)")
+        typer.secho(f"{label}: {', '.join(details)}", fg=typer.colors.CYAN, err=True)
+        if "encoding" in file_stats:
+            typer.secho(
+                f"{label} encoding: {file_stats['encoding']} (confidence {file_stats['encoding_confidence']:.2f})",
+                fg=typer.colors.CYAN,
+                err=True,
+            )
+    phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in report["phases"].items())
+    typer.secho(f"Phases: {phases or 'none'}", fg=typer.colors.CYAN, err=True)
+    if report["diff"]["records"]:
+        typer.secho(f"Diff: {report['diff']['records']:,} change records", fg=typer.colors.CYAN, err=True)
+    else:
+        typer.secho(
+            f"Diff: {report['diff']['hunks']:,} hunks, {report['diff']['lines']:,} lines",
+            fg=typer.colors.CYAN,
+            err=True,
+        )
+    if report["peak_rss_bytes"] is not None:
+        typer.secho(f"Peak memory: {report['peak_rss_bytes'] / 1024**2:.1f} MiB", fg=typer.colors.CYAN, err=True)
+
+
 @app.command(no_args_is_help=True)
 def compare(
     file1: Annotated[
@@ -43,7 +156,7 @@ def compare(
             dir_okay=False,
             readable=True,
             resolve_path=False,
-            help="Path to the first CSV file.",
+            help="Path to the first CSV file, or to an index of it written by `csvdiff index`.",
         ),
     ],
     file2: Annotated[
@@ -58,7 +171,7 @@ def compare(
         ),
     ],
     output: Annotated[
-        Path,
+        Optional[Path],
         typer.Option(
             "--output",
             "-o",
@@ -66,9 +179,134 @@ def compare(
             file_okay=True,
             dir_okay=False,
             resolve_path=False,
-            help="Specify the output file path (.diff, .txt, or .log extension).",
+            help=(
+                "Specify the output file path (.diff, .txt, or .log extension), optionally compressed (.gz or .zst). "
+                "With --format, the extension of that format. [default: result.diff, or result.<format>]"
+            ),
+        ),
+    ] = None,
+    output_format: Annotated[
+        OutputFormat,
+        typer.Option(
+            "--format",
+            case_sensitive=False,
+            help="Write a diff, or one change record per changed row as JSON Lines (jsonl), CSV or Parquet.",
+        ),
+    ] = OutputFormat.DIFF,
+    key: Annotated[
+        Optional[str],
+        typer.Option(
+            "--key",
+            "-k",
+            help="Match rows by primary key column(s) instead of by position, e.g. 'id' or 'id,date'.",
+        ),
+    ] = None,
+    algorithm: Annotated[
+        DiffAlgorithm,
+        typer.Option(
+            "--algorithm",
+            "-a",
+            case_sensitive=False,
+            help="Diff algorithm used to align rows when comparing by position.",
         ),
-    ] = Path("result.diff"),
+    ] = DiffAlgorithm.HISTOGRAM,
+    sorted_input: Annotated[
+        bool,
+        typer.Option(
+            "--sorted",
+            help="Both files are already sorted by --key: compare them in one streaming pass with bounded memory.",
+        ),
+    ] = False,
+    memory_limit: Annotated[
+        Optional[str],
+        typer.Option(
+            "--memory-limit",
+            help="Maximum memory DuckDB may use, e.g. '4GB'. Larger joins and sorts spill to disk.",
+        ),
+    ] = None,
+    threads: Annotated[
+        Optional[int],
+        typer.Option("--threads", min=1, help="Number of threads DuckDB may use (default: all cores)."),
+    ] = None,
+    temp_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--temp-dir",
+            file_okay=False,
+            dir_okay=True,
+            help="Directory for data DuckDB spills to disk (default: .tmp in the current directory).",
+        ),
+    ] = None,
+    cells: Annotated[
+        bool,
+        typer.Option("--cells", help="For modified rows, report only the changed cells instead of whole rows."),
+    ] = False,
+    ignore_order: Annotated[
+        bool,
+        typer.Option(
+            "--ignore-order",
+            help="Ignore row order: report rows that occur more often in one file than in the other.",
+        ),
+    ] = False,
+    columns: Annotated[
+        Optional[str],
+        typer.Option("--columns", help="Compare only these columns, e.g. 'id,name,price'."),
+    ] = None,
+    exclude_columns: Annotated[
+        Optional[str],
+        typer.Option("--exclude-columns", help="Ignore these columns, e.g. 'updated_at'."),
+    ] = None,
+    where: Annotated[
+        Optional[str],
+        typer.Option("--where", help="Compare only rows matching this SQL condition, e.g. \"region = 'EU'\"."),
+    ] = None,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Do not read or write the cache of parsed files."),
+    ] = False,
+    quiet: Annotated[
+        bool,
+        typer.Option(
+            "--quiet",
+            "-q",
+            help="Write and print nothing; stop at the first difference. Implies --exit-code.",
+        ),
+    ] = False,
+    exit_code: Annotated[
+        bool,
+        typer.Option(
+            "--exit-code",
+            help="Exit with 1 if there are differences and 0 if not, like `git diff --exit-code`. Errors exit with 2.",
+        ),
+    ] = False,
+    stat: Annotated[
+        bool,
+        typer.Option(
+            "--stat",
+            help="Only print the number of added, removed and changed rows (and changed columns with --key).",
+        ),
+    ] = False,
+    stats: Annotated[
+        bool,
+        typer.Option(
+            "--stats",
+            help="Print the time of each phase, the size of the input files, diff counts and peak memory.",
+        ),
+    ] = False,
+    stats_format: Annotated[
+        Optional[StatsFormat],
+        typer.Option(
+            "--stats-format", case_sensitive=False, help="Format of --stats: text (default) or json. Implies --stats."
+        ),
+    ] = None,
+    profile: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--profile",
+            dir_okay=False,
+            help="Write a cProfile profile of the run to this file, for pstats or snakeviz.",
+        ),
+    ] = None,
     version: Annotated[
         Optional[bool],
         typer.Option(
@@ -77,74 +315,397 @@ def compare(
     ] = None,
 ):
     """
-    Compare two CSV files and save the result to a .diff file.
+    Compare two CSV files and save the result to a .diff file, or as change records with --format.
     """
-    # Validate input files
-    validate_csv_file(file1, "First CSV file")
-    validate_csv_file(file2, "Second CSV file")
+    from csvdiff.utils.compare import (
+        CompareOptions,
+        check_options,
+        files_differ,
+        open_comparison,
+        summarize_comparison,
+        write_diff,
+    )
+    from csvdiff.utils.csv import DuckDBSettings
+    from csvdiff.utils.index import is_index_file
+    from csvdiff.utils.keyed import parse_key_columns
+    from csvdiff.utils.records import check_record_options, open_change_records, write_records
+    from csvdiff.utils.summary import format_summary
 
-    # Validate output path (security and business rules)
-    validated_output = validate_output_path(output)
+    # With an exit code that tells whether the files differ, errors need a status of their own
+    error_status = 2 if quiet or exit_code else 1
 
-    start_time = time.time()
-    try:
-        with console.status("Reading CSV files...") as status:
-            # 1. Process first CSV file
-            lines1, cols1 = read_csv_with_duckdb(file1)
-
-            # Validate first file data
-            if not lines1:
-                typer.secho(f"Error: First CSV file '{file1}' contains no data.", fg=typer.colors.RED, err=True)
-                raise typer.Exit(1)
-
-            # 2. Process second CSV file
-            lines2, cols2 = read_csv_with_duckdb(file2)
-
-            # Validate second file data
-            if not lines2:
-                typer.secho(f"Error: Second CSV file '{file2}' contains no data.", fg=typer.colors.RED, err=True)
-                raise typer.Exit(1)
-
-        # Check column structures (outside spinner for clean messages)
-        if cols1 != cols2:
-            typer.secho("Warning: CSV files have different column structures.", fg=typer.colors.YELLOW, err=True)
-
-        with console.status("Computing differences...") as status:
-            # 3. Compute diff
-            diff = unified_diff(lines1, lines2, fromfile=str(file1.resolve()), tofile=str(file2.resolve()), lineterm="")
-
-            # 4. Write output
-            status.update("Writing result...")
-            has_differences = False
-            with create_unique_output_file(validated_output) as f:
-                actual_output_path = f.name  # Get actual filename created
-                for line in diff:
-                    f.write(line + "\n")
-                    has_differences = True
-
-        # Check if files are identical (no diff content)
-        if not has_differences:
+    with _error_status(error_status):
+        # Validate input files
+        if not is_index_file(file1):
+            validate_csv_file(file1, "First CSV file")
+        validate_csv_file(file2, "Second CSV file")
+
+        if quiet and (
+            output is not None or output_format != OutputFormat.DIFF or stat or stats or stats_format or profile
+        ):
             typer.secho(
-                f"No differences found. Files are identical. Empty diff saved to `{actual_output_path}`",
-                fg=typer.colors.BRIGHT_CYAN,
+                "Error: --quiet cannot be used with --output, --format, --stat, --stats or --profile.",
+                fg=typer.colors.RED,
+                err=True,
             )
+            raise typer.Exit(1)
+
+        # Validate output path (security and business rules)
+        if stat and (output is not None or output_format != OutputFormat.DIFF):
+            typer.secho("Error: --stat cannot be used with --output or --format.", fg=typer.colors.RED, err=True)
+            raise typer.Exit(1)
+        if output is None:
+            output = Path("result" + OUTPUT_EXTENSIONS[output_format][0])
+        validated_output = validate_output_path(output, output_format)
+        # Checked before the run, as the profile is only written once the comparison is over
+        validated_profile = validate_output_location(profile) if profile is not None else None
+
+    try:
+        options = CompareOptions(
+            key_columns=tuple(parse_key_columns(key)) if key is not None else None,
+            sorted_input=sorted_input,
+            algorithm=algorithm,
+            cells=cells,
+            ignore_order=ignore_order,
+            settings=DuckDBSettings(memory_limit=memory_limit, threads=threads, temp_dir=temp_dir),
+            cache_dir=None if no_cache else default_cache_dir(),
+            selection=_row_selection(columns, exclude_columns, where),
+        )
+        if output_format == OutputFormat.DIFF:
+            check_options(options, file1)
         else:
-            typer.secho(f"Success. The result saved to `{actual_output_path}`", fg=typer.colors.BRIGHT_GREEN)
+            check_record_options(options, file1)
+    except ValueError as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(error_status)
+
+    if quiet:
+        try:
+            differ = files_differ(file1, file2, options)
+        except Exception as e:
+            typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(error_status)
+        raise typer.Exit(1 if differ else 0)
+
+    if stats and stats_format is None:
+        stats_format = StatsFormat.TEXT
+
+    profiler = None
+    if validated_profile is not None:
+        import cProfile
+
+        try:
+            validated_profile.parent.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            typer.secho(f"Error: Cannot create directory for profile: {e}", fg=typer.colors.RED, err=True)
+            raise typer.Exit(error_status)
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    run_stats = None
+    start_time = time.time()
+    try:
+        with collect_stats() if stats_format else nullcontext() as run_stats:
+            with _console().status("Computing differences...") as status:
+                if stat:
+                    summary = summarize_comparison(file1, file2, options)
+                    has_differences = summary.has_differences
+                elif output_format == OutputFormat.DIFF:
+                    with open_comparison(file1, file2, options, status.update) as comparison:
+                        # Check column structures before streaming the result
+                        _warn_column_structures(comparison.columns1, comparison.columns2)
+
+                        status.update("Writing result...")
+                        lines = comparison.lines if run_stats is None else run_stats.count_lines(comparison.lines)
+                        actual_output_path, has_differences = write_diff(lines, validated_output)
+                else:
+                    in_duckdb = output_format == OutputFormat.PARQUET
+                    with open_change_records(file1, file2, options, in_duckdb) as changes:
+                        _warn_column_structures(changes.columns1, changes.columns2)
+
+                        status.update("Writing result...")
+                        if run_stats is not None:
+                            changes.records = run_stats.count_records(changes.records)
+                        actual_output_path, has_differences = write_records(
+                            changes, validated_output, output_format, options.settings
+                        )
+
+        if stat:
+            for line in format_summary(summary):
+                typer.echo(line)
+        else:
+            _report_result(actual_output_path, has_differences)
 
     except typer.Exit:
         raise
     except PermissionError as e:
         typer.secho(f"Error: No permission to write to file: {e}", fg=typer.colors.RED, err=True)
-        raise typer.Exit(1)
+        raise typer.Exit(error_status)
     except Exception as e:
         typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
-        raise typer.Exit(1)
+        raise typer.Exit(error_status)
     finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(validated_profile)
+        if run_stats is not None:
+            _report_stats(file1, file2, run_stats, stats_format)
+
         # Display execution time
         end_time = time.time()
         duration = end_time - start_time
         typer.secho(f"({duration:.3f}s)", fg=typer.colors.CYAN)
 
+    if exit_code and has_differences:
+        raise typer.Exit(1)
+
+
+@app.command(no_args_is_help=True)
+def index(
+    file: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            resolve_path=False,
+            help="Path to the CSV file to index.",
+        ),
+    ],
+    output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output",
+            "-o",
+            file_okay=True,
+            dir_okay=False,
+            resolve_path=False,
+            help="Specify the index file path (.csvidx extension). Defaults to the CSV path plus .csvidx.",
+        ),
+    ] = None,
+    force: Annotated[bool, typer.Option("--force", "-f", help="Overwrite the index file if it exists.")] = False,
+    memory_limit: Annotated[
+        Optional[str],
+        typer.Option(
+            "--memory-limit",
+            help="Maximum memory DuckDB may use, e.g. '4GB'. Larger sorts spill to disk.",
+        ),
+    ] = None,
+    threads: Annotated[
+        Optional[int],
+        typer.Option("--threads", min=1, help="Number of threads DuckDB may use (default: all cores)."),
+    ] = None,
+    temp_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--temp-dir",
+            file_okay=False,
+            dir_okay=True,
+            help="Directory for data DuckDB spills to disk (default: .tmp in the current directory).",
+        ),
+    ] = None,
+):
+    """
+    Write a snapshot index of a CSV file, to pass to `compare` in place of the file.
+    """
+    from csvdiff.utils.csv import DuckDBSettings
+    from csvdiff.utils.index import build_index, default_index_path, is_index_file
+
+    validate_csv_file(file, "CSV file")
+
+    index_path = validate_output_location(output) if output is not None else default_index_path(file)
+    if not is_index_file(index_path):
+        typer.secho(f"Error: Index file '{index_path}' must have a .csvidx extension.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    if index_path.exists() and not force:
+        typer.secho(
+            f"Error: Index file '{index_path}' already exists. Use --force to overwrite it.",
+            fg=typer.colors.RED,
+            err=True,
+        )
+        raise typer.Exit(1)
+
+    settings = DuckDBSettings(memory_limit=memory_limit, threads=threads, temp_dir=temp_dir)
+    start_time = time.time()
+    try:
+        with _console().status("Indexing CSV file..."):
+            csv_index = build_index(file, index_path, settings)
+        typer.secho(f"Success. Indexed {csv_index.row_count} rows to `{index_path}`", fg=typer.colors.BRIGHT_GREEN)
+    except PermissionError as e:
+        typer.secho(f"Error: No permission to write to file: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    except Exception as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    finally:
+        duration = time.time() - start_time
+        typer.secho(f"({duration:.3f}s)", fg=typer.colors.CYAN)
+
+
+@app.command(no_args_is_help=True)
+def batch(
+    dir1: Annotated[
+        Optional[Path],
+        typer.Argument(
+            exists=True,
+            file_okay=False,
+            dir_okay=True,
+            resolve_path=False,
+            help="Directory with the first CSV files, paired with the files of the same name in the second.",
+        ),
+    ] = None,
+    dir2: Annotated[
+        Optional[Path],
+        typer.Argument(
+            exists=True, file_okay=False, dir_okay=True, resolve_path=False, help="Directory with the second CSV files."
+        ),
+    ] = None,
+    manifest: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--manifest",
+            "-m",
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            help="CSV file listing the pairs to compare in 'file1' and 'file2' columns, instead of two directories.",
+        ),
+    ] = None,
+    output_dir: Annotated[
+        Path,
+        typer.Option(
+            "--output-dir",
+            "-o",
+            file_okay=False,
+            dir_okay=True,
+            resolve_path=False,
+            help="Directory for the diff of each pair and the summary report.",
+        ),
+    ] = Path("batch-results"),
+    workers: Annotated[
+        Optional[int],
+        typer.Option("--workers", "-j", min=1, help="Number of pairs compared in parallel (default: one per CPU)."),
+    ] = None,
+    key: Annotated[
+        Optional[str],
+        typer.Option("--key", "-k", help="Match rows by primary key column(s) instead of by position."),
+    ] = None,
+    algorithm: Annotated[
+        DiffAlgorithm,
+        typer.Option("--algorithm", "-a", case_sensitive=False, help="Diff algorithm used to align rows."),
+    ] = DiffAlgorithm.HISTOGRAM,
+    sorted_input: Annotated[bool, typer.Option("--sorted", help="All files are already sorted by --key.")] = False,
+    cells: Annotated[bool, typer.Option("--cells", help="For modified rows, report only the changed cells.")] = False,
+    ignore_order: Annotated[bool, typer.Option("--ignore-order", help="Ignore row order.")] = False,
+    memory_limit: Annotated[
+        Optional[str], typer.Option("--memory-limit", help="Maximum memory DuckDB may use in each worker.")
+    ] = None,
+    threads: Annotated[
+        Optional[int],
+        typer.Option(
+            "--threads", min=1, help="Number of threads DuckDB may use in each worker (default: CPUs / workers)."
+        ),
+    ] = None,
+    temp_dir: Annotated[
+        Optional[Path],
+        typer.Option("--temp-dir", file_okay=False, dir_okay=True, help="Directory for data DuckDB spills to disk."),
+    ] = None,
+    columns: Annotated[Optional[str], typer.Option("--columns", help="Compare only these columns.")] = None,
+    exclude_columns: Annotated[Optional[str], typer.Option("--exclude-columns", help="Ignore these columns.")] = None,
+    where: Annotated[
+        Optional[str], typer.Option("--where", help="Compare only rows matching this SQL condition.")
+    ] = None,
+    no_cache: Annotated[
+        bool, typer.Option("--no-cache", help="Do not read or write the cache of parsed files.")
+    ] = False,
+):
+    """
+    Compare many pairs of CSV files in parallel and write a summary report.
+    """
+    from csvdiff.utils.batch import PairResult, default_workers, find_pairs, read_manifest, run_batch, write_summary
+    from csvdiff.utils.compare import CompareOptions
+    from csvdiff.utils.csv import DuckDBSettings
+    from csvdiff.utils.keyed import parse_key_columns
+
+    if manifest is None and (dir1 is None or dir2 is None):
+        typer.secho("Error: Give two directories or --manifest.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    if manifest is not None and (dir1 is not None or dir2 is not None):
+        typer.secho("Error: Directories cannot be used with --manifest.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+
+    validated_output_dir = validate_output_dir(output_dir)
+    workers = workers or default_workers()
+
+    start_time = time.time()
+    try:
+        options = CompareOptions(
+            key_columns=tuple(parse_key_columns(key)) if key is not None else None,
+            sorted_input=sorted_input,
+            algorithm=algorithm,
+            cells=cells,
+            ignore_order=ignore_order,
+            # Share the cores between the workers instead of letting each DuckDB use them all
+            settings=DuckDBSettings(
+                memory_limit=memory_limit,
+                threads=threads or max(1, default_workers() // workers),
+                temp_dir=temp_dir,
+            ),
+            cache_dir=None if no_cache else default_cache_dir(),
+            selection=_row_selection(columns, exclude_columns, where),
+        )
+
+        if manifest is not None:
+            pairs, unmatched = read_manifest(manifest), []
+        else:
+            pairs, unmatched = find_pairs(dir1, dir2)
+        results = [
+            PairResult(file1, file2, "failed", error="No file of the same name in the other directory.")
+            for file1, file2 in unmatched
+        ]
+
+        validated_output_dir.mkdir(parents=True, exist_ok=True)
+        with _console().status(f"Comparing {len(pairs)} pairs...") as status:
+            for result in run_batch(pairs, validated_output_dir, options, workers):
+                results.append(result)
+                status.update(f"Compared {len(results) - len(unmatched)} of {len(pairs)} pairs...")
+                if result.status == "failed":
+                    typer.secho(
+                        f"Error: {result.file1} vs {result.file2}: {result.error}", fg=typer.colors.RED, err=True
+                    )
+        for file1, file2 in unmatched:
+            typer.secho(
+                f"Error: {file1 or file2} has no file of the same name in the other directory.",
+                fg=typer.colors.RED,
+                err=True,
+            )
+
+        # Results arrive as the workers finish; sort them so summaries of different runs can be diffed
+        results.sort(key=lambda result: (str(result.file1 or ""), str(result.file2 or "")))
+        summary_path = write_summary(results, validated_output_dir)
+        counts = {
+            status: sum(result.status == status for result in results) for status in ("identical", "changed", "failed")
+        }
+        typer.secho(
+            f"Compared {len(results)} pairs: {counts['identical']} identical, {counts['changed']} changed, "
+            f"{counts['failed']} failed. Summary saved to `{summary_path}`",
+            fg=typer.colors.RED if counts["failed"] else typer.colors.BRIGHT_GREEN,
+        )
+    except PermissionError as e:
+        typer.secho(f"Error: No permission to write to file: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    except Exception as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    finally:
+        duration = time.time() - start_time
+        typer.secho(f"({duration:.3f}s)", fg=typer.colors.CYAN)
+
+    if counts["failed"]:
+        raise typer.Exit(1)
+
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,126 @@
+import csv
+import os
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from csvdiff.utils.compare import CompareOptions, write_comparison
+from csvdiff.utils.files import create_unique_output_file
+
+# Extensions of the input files picked up from a directory
+CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+
+
+class PairResult(NamedTuple):
+    """Outcome of comparing one pair of files in a batch."""
+
+    file1: Optional[Path]  # None if the file has no counterpart in the first directory
+    file2: Optional[Path]  # None if the file has no counterpart in the second directory
+    status: str  # "identical", "changed" or "failed"
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+def csv_stem(file_path: Path) -> Optional[str]:
+    """Return the name of a CSV file without its extension, or None if it is not a CSV file."""
+    name = file_path.name
+    for suffix in CSV_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[: -len(suffix)]
+    return None
+
+
+def find_pairs(dir1: Path, dir2: Path) -> tuple[list[tuple[Path, Path]], list[tuple[Optional[Path], Optional[Path]]]]:
+    """
+    Pair the CSV files of two directories by file name.
+
+    Returns:
+        The pairs, sorted by name, and the files that have no counterpart in the
+        other directory, as pairs whose missing side is None
+    """
+    files1 = {path.name: path for path in dir1.iterdir() if path.is_file() and csv_stem(path) is not None}
+    files2 = {path.name: path for path in dir2.iterdir() if path.is_file() and csv_stem(path) is not None}
+    common = files1.keys() & files2.keys()
+    pairs = [(files1[name], files2[name]) for name in sorted(common)]
+    unmatched: list[tuple[Optional[Path], Optional[Path]]] = [
+        (files1[name], None) for name in sorted(files1.keys() - common)
+    ]
+    unmatched.extend((None, files2[name]) for name in sorted(files2.keys() - common))
+    return pairs, unmatched
+
+
+def read_manifest(manifest_path: Path) -> list[tuple[Path, Path]]:
+    """
+    Read the pairs to compare from a CSV manifest with `file1` and `file2` columns.
+
+    Relative paths are taken relative to the directory of the manifest.
+
+    Raises:
+        ValueError: If the manifest has no `file1` and `file2` columns
+    """
+    base_dir = manifest_path.parent
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if not {"file1", "file2"} <= set(reader.fieldnames or []):
+            raise ValueError(f"Manifest '{manifest_path}' must have 'file1' and 'file2' columns.")
+        return [(base_dir / row["file1"], base_dir / row["file2"]) for row in reader]
+
+
+def compare_pair(file1: Path, file2: Path, output_path: Path, options: CompareOptions) -> PairResult:
+    """Compare one pair and save its diff, turning any error into a failed result."""
+    try:
+        result = write_comparison(file1, file2, output_path, options)
+    except Exception as e:
+        return PairResult(file1, file2, "failed", error=str(e) or type(e).__name__)
+    status = "changed" if result.has_differences else "identical"
+    return PairResult(file1, file2, status, output_path=result.output_path)
+
+
+def run_batch(
+    pairs: Sequence[tuple[Path, Path]],
+    output_dir: Path,
+    options: CompareOptions,
+    workers: int = 1,
+    output_suffix: str = ".diff",
+) -> Iterator[PairResult]:
+    """
+    Compare many pairs of files, each into its own diff file in `output_dir`.
+
+    With more than one worker, the pairs are spread over a pool of processes,
+    so each process pays for its imports once instead of once per pair.
+    Results are yielded as the pairs finish, not in input order.
+    """
+    jobs = [(file1, file2, output_dir / f"{csv_stem(file1) or file1.name}{output_suffix}") for file1, file2 in pairs]
+    if workers <= 1:
+        for file1, file2, output_path in jobs:
+            yield compare_pair(file1, file2, output_path, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(compare_pair, file1, file2, output_path, options) for file1, file2, output_path in jobs
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def default_workers() -> int:
+    """Return the number of worker processes used by default: one per CPU."""
+    return os.cpu_count() or 1
+
+
+def write_summary(results: Sequence[PairResult], output_dir: Path) -> str:
+    """
+    Write one CSV line per pair with its status, diff file and error, and return the summary path.
+
+    The missing side of a file without counterpart is left empty.
+    """
+    with create_unique_output_file(output_dir / "summary.csv") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["file1", "file2", "status", "output", "error"])
+        for result in results:
+            writer.writerow(
+                [result.file1 or "", result.file2 or "", result.status, result.output_path or "", result.error or ""]
+            )
+        return f.name
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sys
+from collections.abc import Collection
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# Bump when the cached data changes shape, so old entries are simply never looked up again
+CACHE_VERSION = 1
+
+DEFAULT_MAX_CACHE_BYTES = 1024**3
+
+# Bytes read from each end of a file to fingerprint its content
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+
+
+class CacheEntry(NamedTuple):
+    """Files of one cached input: the parsed rows (Parquet) and their metadata (JSON)."""
+
+    data_path: Path
+    meta_path: Path
+
+
+def default_cache_dir() -> Path:
+    """Return `$CSVDIFF_CACHE_DIR`, or `csvdiff` under the user's cache directory."""
+    configured = os.environ.get("CSVDIFF_CACHE_DIR")
+    if configured:
+        return Path(configured)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "csvdiff"
+
+
+def max_cache_bytes() -> int:
+    """Return `$CSVDIFF_CACHE_MAX_BYTES`, or `DEFAULT_MAX_CACHE_BYTES`."""
+    configured = os.environ.get("CSVDIFF_CACHE_MAX_BYTES")
+    if not configured:
+        return DEFAULT_MAX_CACHE_BYTES
+    if not configured.isdigit():
+        raise ValueError(f"Invalid CSVDIFF_CACHE_MAX_BYTES '{configured}'. Expected a number of bytes.")
+    return int(configured)
+
+
+def file_fingerprint(file_path: Path) -> str:
+    """Hash the first and last `FINGERPRINT_BLOCK_SIZE` bytes of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+        f.seek(max(f.tell(), os.fstat(f.fileno()).st_size - FINGERPRINT_BLOCK_SIZE))
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cache_entry(cache_dir: Path, file_path: Path) -> CacheEntry:
+    """
+    Locate the cache entry of a file.
+
+    The entry is keyed by the resolved path, size, modification time and a
+    content fingerprint of the file, so any change to the file leads to a
+    different entry. The Python and DuckDB versions are part of the key too,
+    because the way rows are rendered as CSV lines depends on the former and
+    the stored row hashes come from DuckDB's `hash()`.
+    """
+    # Imported here: the CLI imports this module at startup, and duckdb is slow to import
+    import duckdb
+
+    stat = file_path.stat()
+    key = "\0".join(
+        [
+            str(CACHE_VERSION),
+            f"{sys.version_info.major}.{sys.version_info.minor}",
+            duckdb.__version__,
+            str(file_path.resolve()),
+            str(stat.st_size),
+            str(stat.st_mtime_ns),
+            file_fingerprint(file_path),
+        ]
+    )
+    name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return CacheEntry(data_path=cache_dir / f"{name}.parquet", meta_path=cache_dir / f"{name}.json")
+
+
+def load_cached_columns(entry: CacheEntry) -> Optional[list[str]]:
+    """Return the column names of a cached file, or None if it is not cached."""
+    try:
+        with open(entry.meta_path, encoding="utf-8") as f:
+            columns = json.load(f)["columns"]
+    except (OSError, ValueError, KeyError):
+        return None
+    if not entry.data_path.exists():
+        return None
+    # Mark the entry as recently used for eviction
+    try:
+        os.utime(entry.meta_path)
+    except OSError:
+        pass  # Read-only cache: the entry is still usable
+    return columns
+
+
+def save_cached_columns(entry: CacheEntry, columns: list[str]) -> None:
+    """Write the metadata of an entry whose data file is already in place, completing the entry."""
+    temp_path = entry.meta_path.with_name(f"{entry.meta_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"columns": columns}, f)
+    os.replace(temp_path, entry.meta_path)
+
+
+def evict(cache_dir: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES, keep: Collection[CacheEntry] = ()) -> None:
+    """
+    Delete the least recently used entries until the cache is no larger than `max_bytes`.
+
+    The entries in `keep` are never deleted, even if the cache stays larger than
+    `max_bytes`: they hold the files of the comparison that just ran.
+    """
+    entries = []
+    total = 0
+    for data_path in cache_dir.glob("*.parquet"):
+        entry = CacheEntry(data_path=data_path, meta_path=data_path.with_suffix(".json"))
+        try:
+            size = data_path.stat().st_size
+            # Data without metadata is being written, or left over from an interrupted run
+            last_used = (entry.meta_path if entry.meta_path.exists() else data_path).stat().st_mtime
+        except OSError:
+            continue  # Removed by another process meanwhile
+        entries.append((last_used, size, entry))
+        total += size
+
+    for _, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        if entry in keep:
+            continue
+        entry.meta_path.unlink(missing_ok=True)
+        entry.data_path.unlink(missing_ok=True)
+        total -= size
@@ -0,0 +1,204 @@
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import duckdb
+
+from csvdiff.utils.csv import (
+    DuckDBSettings,
+    RowSelection,
+    connect_duckdb,
+    csv_line_expression,
+    fetch_rows,
+    format_csv_row,
+    quote_identifier,
+    quote_literal,
+    read_csv_relation,
+)
+from csvdiff.utils.diff import DiffAlgorithm, diff_opcodes
+
+Row = tuple[Optional[str], ...]
+
+
+class RowChange(NamedTuple):
+    """A row added, removed or modified between two CSV files compared by position."""
+
+    old_row: Optional[int]  # 1-based row number in the first file
+    new_row: Optional[int]  # 1-based row number in the second file
+    old: Optional[Row]
+    new: Optional[Row]
+    changed_columns: tuple[str, ...]
+
+
+@dataclass
+class CellDiff:
+    """Result of a cell-level comparison. `changes` is only valid inside `open_cell_diff`."""
+
+    columns1: list[str]
+    columns2: list[str]
+    changes: Iterator[RowChange]
+    # The same changes as a DuckDB relation, with columns `old_0`.., `new_0`.., `old_row`, `new_row`,
+    # `in_old`, `in_new` (whether each file has the row) and `changed`
+    relation: Optional[duckdb.DuckDBPyRelation] = None
+
+
+def changed_columns_sql(columns: Sequence[str], old: str, new: str) -> str:
+    """
+    Build a DuckDB SQL expression listing which of `columns` differ between two row aliases.
+
+    Each column is compared with its own vectorized `IS DISTINCT FROM`, so no
+    row is ever split into fields in Python.
+    """
+    if not columns:
+        return "[]::VARCHAR[]"
+    # One single-item or empty list per column, flattened, so no lambda variable can clash with a column name
+    checks = ", ".join(
+        f"CASE WHEN {old}.{quote_identifier(column)} IS DISTINCT FROM {new}.{quote_identifier(column)} "
+        f"THEN [{quote_literal(column)}] ELSE []::VARCHAR[] END"
+        for column in columns
+    )
+    return f"flatten([{checks}])"
+
+
+def format_cell_changes(
+    columns1: Sequence[str], columns2: Sequence[str], old: Row, new: Row, changed_columns: Sequence[str]
+) -> Iterator[str]:
+    """Render the changed cells of a modified row as `~ column: old -> new` lines."""
+    for column in changed_columns:
+        old_value = format_csv_row([old[columns1.index(column)]])
+        new_value = format_csv_row([new[columns2.index(column)]])
+        yield f"~ {column}: {old_value} -> {new_value}"
+
+
+def _load_table(
+    conn: duckdb.DuckDBPyConnection,
+    file_path: Path,
+    table: str,
+    file_label: str,
+    selection: Optional[RowSelection] = None,
+) -> list[str]:
+    # A table keeps the file order in `rowid`, which the changes refer to
+    read_csv_relation(conn, file_path, selection).create_view(f"{table}_source")
+    conn.execute(f"CREATE TEMP TABLE {table} AS SELECT * FROM {table}_source")
+    if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+        raise ValueError(f"{file_label} '{file_path}' contains no data.")
+    return conn.table(table).columns
+
+
+def _fetch_lines(conn: duckdb.DuckDBPyConnection, table: str, columns: Sequence[str]) -> list[str]:
+    rows = conn.execute(f"SELECT {csv_line_expression(columns)} FROM {table} ORDER BY rowid").fetchall()
+    return [line for (line,) in rows]
+
+
+def _iter_row_changes(
+    rel: duckdb.DuckDBPyRelation, width1: int, width2: int, chunk_size: int = 10000
+) -> Iterator[RowChange]:
+    for record in fetch_rows(rel, chunk_size):
+        old_row, new_row = record[width1 + width2 : width1 + width2 + 2]
+        old = record[:width1] if old_row is not None else None
+        new = record[width1 : width1 + width2] if new_row is not None else None
+        yield RowChange(
+            old_row=old_row,
+            new_row=new_row,
+            old=old,
+            new=new,
+            changed_columns=tuple(record[-1]) if old is not None and new is not None else (),
+        )
+
+
+@contextmanager
+def open_cell_diff(
+    file1: Path,
+    file2: Path,
+    algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM,
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+) -> Iterator[CellDiff]:
+    """
+    Compare two CSV files by position and report which cells changed.
+
+    Rows are aligned with the selected diff engine, exactly as for the unified
+    diff. Within each replaced block, old and new rows are paired one to one
+    and compared column by column in DuckDB on the columns both files have in
+    common. Unpaired rows are reported as removed or added.
+
+    Raises:
+        ValueError: If a file has no data
+    """
+    conn = connect_duckdb(settings)
+    try:
+        columns1 = _load_table(conn, file1, "old_rows", "First CSV file", selection)
+        columns2 = _load_table(conn, file2, "new_rows", "Second CSV file", selection)
+        lines1 = _fetch_lines(conn, "old_rows", columns1)
+        lines2 = _fetch_lines(conn, "new_rows", columns2)
+        opcodes = diff_opcodes(lines1, lines2, algorithm)
+        del lines1, lines2
+
+        conn.execute("CREATE TEMP TABLE blocks (block BIGINT, i1 BIGINT, i2 BIGINT, j1 BIGINT, j2 BIGINT)")
+        changed_blocks = [
+            (number, i1, i2, j1, j2) for number, (tag, i1, i2, j1, j2) in enumerate(opcodes) if tag != "equal"
+        ]
+        if changed_blocks:
+            conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)", changed_blocks)
+
+        compared = [column for column in columns1 if column in columns2]
+        select_old = ", ".join(f"o.{quote_identifier(column)} AS old_{i}" for i, column in enumerate(columns1))
+        select_new = ", ".join(f"n.{quote_identifier(column)} AS new_{i}" for i, column in enumerate(columns2))
+        # Within a block: pairs first (phase 0), then the extra old (1) and new (2) rows
+        rel = conn.sql(
+            f"""
+            WITH sized AS (
+                SELECT *, least(i2 - i1, j2 - j1) AS paired FROM blocks
+            ), changes AS (
+                SELECT block, 0 AS phase, i1 + k AS old_row, j1 + k AS new_row
+                FROM (SELECT *, unnest(range(paired)) AS k FROM sized)
+                UNION ALL
+                SELECT block, 1, unnest(range(i1 + paired, i2)), NULL FROM sized
+                UNION ALL
+                SELECT block, 2, NULL, unnest(range(j1 + paired, j2)) FROM sized
+            )
+            SELECT {select_old}, {select_new},
+                c.old_row + 1 AS old_row, c.new_row + 1 AS new_row,
+                c.old_row IS NOT NULL AS in_old, c.new_row IS NOT NULL AS in_new,
+                {changed_columns_sql(compared, "o", "n")} AS changed
+            FROM changes c
+            LEFT JOIN old_rows o ON o.rowid = c.old_row
+            LEFT JOIN new_rows n ON n.rowid = c.new_row
+            ORDER BY c.block, c.phase, c.old_row, c.new_row
+            """
+        )
+        yield CellDiff(
+            columns1=columns1,
+            columns2=columns2,
+            changes=_iter_row_changes(rel, len(columns1), len(columns2)),
+            relation=rel,
+        )
+    finally:
+        conn.close()
+
+
+def format_cell_diff(diff: CellDiff, fromfile: str, tofile: str) -> Iterator[str]:
+    """
+    Render positional cell-level changes as diff-style lines.
+
+    Each change gets a `@@ -old +new @@` header with its row numbers. Modified
+    rows list their changed cells; added and removed rows are shown whole.
+    Nothing is yielded when there are no changes.
+    """
+    header_written = False
+    for change in diff.changes:
+        if not header_written:
+            yield f"--- {fromfile}"
+            yield f"+++ {tofile}"
+            header_written = True
+        rows = [f"-{change.old_row}" if change.old_row else "", f"+{change.new_row}" if change.new_row else ""]
+        yield f"@@ {' '.join(row for row in rows if row)} @@"
+        if change.old is not None and change.new is not None and change.changed_columns:
+            yield from format_cell_changes(diff.columns1, diff.columns2, change.old, change.new, change.changed_columns)
+            continue
+        if change.old is not None:
+            yield "-" + format_csv_row(change.old)
+        if change.new is not None:
+            yield "+" + format_csv_row(change.new)
@@ -0,0 +1,320 @@
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from itertools import chain, zip_longest
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from csvdiff.utils.cells import format_cell_diff, open_cell_diff
+from csvdiff.utils.csv import DuckDBSettings, RowSelection, read_csv_pair, stream_csv_with_duckdb
+from csvdiff.utils.diff import DiffAlgorithm, diff_opcodes, format_unified, group_opcodes
+from csvdiff.utils.files import (
+    create_unique_output_file,
+    files_are_identical,
+    has_text_after_first_line,
+    write_lines,
+)
+from csvdiff.utils.index import is_index_file, open_index_diff
+from csvdiff.utils.keyed import (
+    format_keyed_diff,
+    has_keyed_changes,
+    open_keyed_diff,
+    open_sorted_keyed_diff,
+    summarize_keyed_diff,
+    summarize_sorted_keyed_diff,
+)
+from csvdiff.utils.stats import phase
+from csvdiff.utils.summary import DiffSummary, count_opcodes
+from csvdiff.utils.unordered import (
+    format_unordered_diff,
+    has_unordered_changes,
+    open_unordered_diff,
+    summarize_unordered_diff,
+)
+
+# How the options are named in error messages: on the command line, and as keyword arguments of `csvdiff.diff`
+CLI_OPTION_NAMES = {
+    "key_columns": "--key",
+    "sorted_input": "--sorted",
+    "cells": "--cells",
+    "ignore_order": "--ignore-order",
+    "columns": "--columns",
+    "exclude_columns": "--exclude-columns",
+    "where": "--where",
+    "records": "--format jsonl, csv and parquet",
+}
+API_OPTION_NAMES = {
+    "key_columns": "key",
+    "sorted_input": "sorted_input",
+    "cells": "cells",
+    "ignore_order": "ignore_order",
+    "columns": "columns",
+    "exclude_columns": "exclude_columns",
+    "where": "where",
+    "records": "csvdiff.changes",
+}
+
+
+@dataclass(frozen=True)
+class CompareOptions:
+    """How two CSV files are compared; mirrors the options of `csvdiff compare`."""
+
+    key_columns: Optional[tuple[str, ...]] = None  # Match rows by key instead of by position
+    sorted_input: bool = False  # Both files are sorted by the key
+    algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM
+    cells: bool = False
+    ignore_order: bool = False
+    settings: Optional[DuckDBSettings] = None
+    cache_dir: Optional[Path] = None  # Cache of parsed files, used when comparing by position
+    selection: Optional[RowSelection] = None  # Compare only some columns or rows
+
+
+@dataclass
+class Comparison:
+    """Result of `open_comparison`. `lines` is only valid inside it."""
+
+    columns1: list[str]
+    columns2: list[str]
+    lines: Iterator[str]
+
+
+class ComparisonResult(NamedTuple):
+    """Where `write_comparison` saved a diff and what it found."""
+
+    output_path: str
+    has_differences: bool
+    same_columns: bool
+
+
+def check_options(options: CompareOptions, file1: Path, names: Mapping[str, str] = CLI_OPTION_NAMES) -> None:
+    """
+    Reject option combinations that cannot be compared.
+
+    `names` tells how to call the options in the error messages (see `CLI_OPTION_NAMES`).
+
+    Raises:
+        ValueError: If the options contradict each other or cannot be used with `file1`
+    """
+    key, cells, ignore_order = names["key_columns"], names["cells"], names["ignore_order"]
+    use_index = is_index_file(file1)
+    if options.sorted_input and options.key_columns is None:
+        raise ValueError(f"{names['sorted_input']} requires {key}.")
+    if use_index and options.key_columns is not None:
+        raise ValueError(f"{key} cannot be used with an index.")
+    if use_index and options.cells:
+        raise ValueError(f"{cells} cannot be used with an index.")
+    if options.ignore_order and (options.key_columns is not None or use_index or options.cells):
+        raise ValueError(f"{ignore_order} cannot be used with {key}, {cells} or an index.")
+    selection = options.selection
+    columns, exclude_columns = names["columns"], names["exclude_columns"]
+    if selection is not None and use_index:
+        raise ValueError(f"{columns}, {exclude_columns} and {names['where']} cannot be used with an index.")
+    if selection is not None and options.key_columns is not None:
+        if selection.columns is not None and not set(options.key_columns) <= set(selection.columns):
+            raise ValueError(f"{columns} must include the key column(s).")
+        if set(options.key_columns) & set(selection.exclude_columns):
+            raise ValueError(f"{exclude_columns} cannot exclude a key column.")
+
+
+def _no_status(message: str) -> None:
+    pass
+
+
+def _skip_identical(file1: Path, file2: Path) -> bool:
+    # Empty and header-only files are still parsed, so they are reported as having no data
+    return files_are_identical(file1, file2) and has_text_after_first_line(file1)
+
+
+@contextmanager
+def open_comparison(
+    file1: Path,
+    file2: Path,
+    options: Optional[CompareOptions] = None,
+    status: Callable[[str], None] = _no_status,
+) -> Iterator[Comparison]:
+    """
+    Compare two CSV files, or a snapshot index and a CSV file, and yield the diff lines.
+
+    The comparison mode follows the options: by key, changed cells, ignoring
+    row order, or by position. Byte-identical files are detected without
+    parsing them; their columns are then reported as empty. `status` is called
+    with a short message whenever a new phase starts.
+
+    Raises:
+        ValueError: If the options are invalid or a file has no data
+    """
+    options = options or CompareOptions()
+    check_options(options, file1)
+    fromfile, tofile = str(file1.resolve()), str(file2.resolve())
+
+    # Fast path: byte-identical files need no parsing or diffing at all
+    if _skip_identical(file1, file2):
+        yield Comparison(columns1=[], columns2=[], lines=iter(()))
+        return
+
+    status("Computing differences...")
+    with ExitStack() as stack:
+        if is_index_file(file1):
+            with phase("diff"):
+                diff = stack.enter_context(
+                    open_index_diff(file1, file2, fromfile, tofile, options.algorithm, settings=options.settings)
+                )
+            yield Comparison(diff.columns1, diff.columns2, diff.lines)
+        elif options.key_columns is not None:
+            open_diff = open_sorted_keyed_diff if options.sorted_input else open_keyed_diff
+            with phase("diff"):
+                diff = stack.enter_context(
+                    open_diff(file1, file2, list(options.key_columns), options.settings, options.selection)
+                )
+            yield Comparison(
+                diff.columns1, diff.columns2, format_keyed_diff(diff, fromfile, tofile, cells=options.cells)
+            )
+        elif options.cells:
+            with phase("diff"):
+                diff = stack.enter_context(
+                    open_cell_diff(file1, file2, options.algorithm, options.settings, options.selection)
+                )
+            yield Comparison(diff.columns1, diff.columns2, format_cell_diff(diff, fromfile, tofile))
+        elif options.ignore_order:
+            with phase("diff"):
+                diff = stack.enter_context(open_unordered_diff(file1, file2, options.settings, options.selection))
+            yield Comparison(diff.columns1, diff.columns2, format_unordered_diff(diff, fromfile, tofile))
+        else:
+            status("Reading CSV files...")
+            # Process both CSV files concurrently
+            (lines1, columns1), (lines2, columns2) = read_csv_pair(
+                file1, file2, options.settings, options.cache_dir, selection=options.selection
+            )
+            if not lines1:
+                raise ValueError(f"First CSV file '{file1}' contains no data.")
+            if not lines2:
+                raise ValueError(f"Second CSV file '{file2}' contains no data.")
+
+            status("Computing differences...")
+            with phase("diff"):
+                opcodes = diff_opcodes(lines1, lines2, options.algorithm)
+            lines = format_unified(lines1, lines2, group_opcodes(opcodes), fromfile, tofile)
+            yield Comparison(columns1, columns2, lines)
+
+
+def summarize_comparison(file1: Path, file2: Path, options: Optional[CompareOptions] = None) -> DiffSummary:
+    """
+    Count the rows added, removed and changed between two CSV files, without rendering a diff.
+
+    By key and ignoring row order, the counts come from aggregate queries in
+    DuckDB. By position, rows must still be aligned, but only a 64-bit hash of
+    each row is fetched, so no line or diff string is built; replaced rows are
+    paired one to one and count as changed, like with `--cells`. Byte-identical
+    files are detected without parsing them; their row counts are then not reported.
+
+    Raises:
+        ValueError: If the options are invalid, the first file is an index or a file has no data
+    """
+    options = options or CompareOptions()
+    check_options(options, file1)
+    if is_index_file(file1):
+        raise ValueError("--stat cannot be used with an index.")
+
+    if _skip_identical(file1, file2):
+        return DiffSummary(None, None, 0, 0, 0, {})
+
+    with phase("diff"):
+        if options.key_columns is not None:
+            summarize = summarize_sorted_keyed_diff if options.sorted_input else summarize_keyed_diff
+            return summarize(file1, file2, list(options.key_columns), options.settings, options.selection)
+        if options.ignore_order:
+            return summarize_unordered_diff(file1, file2, options.settings, options.selection)
+
+    (hashes1, _), (hashes2, _) = read_csv_pair(
+        file1, file2, options.settings, options.cache_dir, hashes=True, selection=options.selection
+    )
+    if not hashes1:
+        raise ValueError(f"First CSV file '{file1}' contains no data.")
+    if not hashes2:
+        raise ValueError(f"Second CSV file '{file2}' contains no data.")
+    with phase("diff"):
+        removed, added, changed = count_opcodes(diff_opcodes(hashes1, hashes2, options.algorithm))
+    return DiffSummary(len(hashes1), len(hashes2), added, removed, changed, {})
+
+
+def _as_line_values(row: tuple[Optional[str], ...]) -> tuple[str, ...]:
+    # Rendered as a CSV line, a missing value looks the same as an empty one
+    return tuple("" if value is None else value for value in row)
+
+
+def _rows_differ(
+    file1: Path, file2: Path, settings: Optional[DuckDBSettings], selection: Optional[RowSelection]
+) -> bool:
+    with stream_csv_with_duckdb(file1, settings=settings, selection=selection) as stream1:
+        with stream_csv_with_duckdb(file2, settings=settings, selection=selection) as stream2:
+            rows1, rows2 = stream1.rows, stream2.rows
+            first1, first2 = next(rows1, None), next(rows2, None)
+            if first1 is None:
+                raise ValueError(f"First CSV file '{file1}' contains no data.")
+            if first2 is None:
+                raise ValueError(f"Second CSV file '{file2}' contains no data.")
+            pairs = zip_longest(rows1, rows2)
+            for row1, row2 in chain([(first1, first2)], pairs):
+                if row1 != row2 and (row1 is None or row2 is None or _as_line_values(row1) != _as_line_values(row2)):
+                    return True
+    return False
+
+
+def files_differ(file1: Path, file2: Path, options: Optional[CompareOptions] = None) -> bool:
+    """
+    Tell whether comparing two files with `open_comparison` would report any difference, stopping early.
+
+    No diff is built. By position, both files are streamed in lockstep and
+    reading stops at the first differing row; `--algorithm` and `--cells` do
+    not matter. By key and ignoring row order, DuckDB stops at the first
+    differing row it finds, and sorted files are merged until the first change.
+
+    Raises:
+        ValueError: If the options are invalid or a file has no data
+    """
+    options = options or CompareOptions()
+    check_options(options, file1)
+
+    if _skip_identical(file1, file2):
+        return False
+
+    with phase("diff"):
+        if is_index_file(file1):
+            with open_comparison(file1, file2, options) as comparison:
+                return next(comparison.lines, None) is not None
+        if options.key_columns is not None and options.sorted_input:
+            key_columns = list(options.key_columns)
+            with open_sorted_keyed_diff(file1, file2, key_columns, options.settings, options.selection) as diff:
+                return next(diff.changes, None) is not None
+        if options.key_columns is not None:
+            return has_keyed_changes(file1, file2, list(options.key_columns), options.settings, options.selection)
+        if options.ignore_order:
+            return has_unordered_changes(file1, file2, options.settings, options.selection)
+        return _rows_differ(file1, file2, options.settings, options.selection)
+
+
+def write_diff(lines: Iterable[str], output_path: Path) -> tuple[str, bool]:
+    """
+    Write diff lines to a new unique output file.
+
+    Returns:
+        The actual output file name and whether any diff line was written
+    """
+    with phase("write"), create_unique_output_file(output_path) as f:
+        actual_output_path = f.name  # Get actual filename created
+        has_differences = write_lines(f, lines)
+    return actual_output_path, has_differences
+
+
+def write_comparison(
+    file1: Path,
+    file2: Path,
+    output_path: Path,
+    options: Optional[CompareOptions] = None,
+    status: Callable[[str], None] = _no_status,
+) -> ComparisonResult:
+    """Compare two files like `open_comparison` and save the diff to a new unique file next to `output_path`."""
+    with open_comparison(file1, file2, options, status) as comparison:
+        status("Writing result...")
+        actual_output_path, has_differences = write_diff(comparison.lines, output_path)
+        return ComparisonResult(actual_output_path, has_differences, comparison.columns1 == comparison.columns2)
@@ -1,96 +1,590 @@
+import codecs
 import csv
 import io
+import itertools
+import mmap
 import os
 import shutil
 import tempfile
+import threading
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import Any, NamedTuple, Optional, Union
 
 import duckdb
 
+from csvdiff.utils.cache import (
+    DEFAULT_MAX_CACHE_BYTES,
+    cache_entry,
+    evict,
+    load_cached_columns,
+    max_cache_bytes,
+    save_cached_columns,
+)
+from csvdiff.utils.files import compression_suffix, decompressing_reader, open_input
+from csvdiff.utils.stats import phase, record_encoding, record_rows
+
+# Candidate encodings in order of preference
+ENCODINGS = ("utf-8", "cp1252", "iso-8859-1")
+
+# How much of a file `guess_encoding` looks at: the head, the tail and evenly spaced blocks in between
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_MIDDLE_BLOCKS = 16
+
+
+class EncodingGuess(NamedTuple):
+    """The encoding chosen for a file and how sure we are about it."""
+
+    encoding: str
+    confidence: float  # Share of the file that was decoded successfully (1.0 for a BOM or a fully checked file)
+
+
+def _sample_blocks(size: int, block_size: int, middle_blocks: int) -> Iterator[tuple[int, int]]:
+    """Yield (start, end) offsets of the sampled blocks, in file order and without overlap."""
+    if size <= block_size * (middle_blocks + 2):
+        yield 0, size
+        return
+    yield 0, block_size
+    step = (size - block_size) // (middle_blocks + 1)
+    for i in range(1, middle_blocks + 1):
+        yield i * step, i * step + block_size
+    yield size - block_size, size
+
+
+def _decodes(encoding: str, block: bytes, at_start: bool, at_end: bool) -> bool:
+    if encoding == "utf-8" and not at_start:
+        # A block cut from the middle may start inside a multi-byte character: skip its continuation bytes
+        skip = 0
+        while skip < min(3, len(block)) and 0x80 <= block[skip] <= 0xBF:
+            skip += 1
+        block = block[skip:]
+    try:
+        # A block may also end inside a multi-byte character; only the real end of the file must be complete
+        codecs.getincrementaldecoder(encoding)().decode(block, final=at_end)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _bom_encoding(head: bytes) -> Optional[str]:
+    if head[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return "utf-16"
+    if head[:3] == b"\xef\xbb\xbf":
+        return "utf-8-sig"
+    return None
+
+
+def _guess_compressed_encoding(file_path: Path, compression: str) -> EncodingGuess:
+    """
+    Detect the encoding of a compressed file from its decompressed head.
+
+    A compressed stream cannot be sampled at arbitrary offsets, so only as many
+    bytes as `guess_encoding` samples from a plain file are decompressed, from
+    the start. The confidence is estimated from the compression ratio seen so far.
+    """
+    budget = SAMPLE_BLOCK_SIZE * (SAMPLE_MIDDLE_BLOCKS + 2)
+    with open(file_path, "rb") as raw:
+        with decompressing_reader(raw, compression) as f:
+            chunks = []
+            sampled = 0
+            while sampled <= budget:
+                chunk = f.read(budget + 1 - sampled)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                sampled += len(chunk)
+            head = b"".join(chunks)
+            at_end = sampled <= budget
+            consumed = raw.tell()
+            compressed_size = os.fstat(raw.fileno()).st_size
+
+    bom_encoding = _bom_encoding(head)
+    if bom_encoding:
+        return EncodingGuess(bom_encoding, 1.0)
+    if not head:
+        return EncodingGuess("utf-8", 1.0)
+    candidates = [e for e in ENCODINGS if _decodes(e, head, True, at_end)]
+    if not candidates:
+        raise ValueError(f"Could not detect encoding for {file_path}. Tried: {', '.join(ENCODINGS)}")
+    if at_end:
+        return EncodingGuess(candidates[0], 1.0)
+    estimated_size = compressed_size * sampled / max(consumed, 1)
+    return EncodingGuess(candidates[0], min(1.0, sampled / estimated_size))
+
+
+def guess_encoding(file_path: Path) -> EncodingGuess:
+    """
+    Detect the encoding of a file from a sample spread across the whole file.
+
+    The file is memory-mapped and read once: a BOM is checked first, then the
+    head, the tail and evenly spaced blocks in between are validated against
+    every candidate encoding at the same time. The first candidate that
+    decodes all sampled blocks wins. Compressed files are checked from their
+    head only (see `_guess_compressed_encoding`).
+    """
+    compression = compression_suffix(file_path)
+    if compression:
+        return _guess_compressed_encoding(file_path, compression)
+
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return EncodingGuess("utf-8", 1.0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # Try to detect BOM first
+            bom_encoding = _bom_encoding(data[:3])
+            if bom_encoding:
+                return EncodingGuess(bom_encoding, 1.0)
+
+            candidates = list(ENCODINGS)
+            sampled = 0
+            for start, end in _sample_blocks(size, SAMPLE_BLOCK_SIZE, SAMPLE_MIDDLE_BLOCKS):
+                block = data[start:end]
+                candidates = [e for e in candidates if _decodes(e, block, start == 0, end == size)]
+                sampled += end - start
+
+    if not candidates:
+        # Unreachable with iso-8859-1 as the last candidate, but keep the error explicit
+        raise ValueError(f"Could not detect encoding for {file_path}. Tried: {', '.join(ENCODINGS)}")
+    return EncodingGuess(candidates[0], sampled / size)
+
 
 def detect_encoding(file_path: Path) -> str:
-    """Detect encoding by trying a prioritized list of encodings."""
-    # Try to detect BOM first
+    """Detect the encoding of a file (see `guess_encoding`)."""
+    return guess_encoding(file_path).encoding
+
+
+def format_csv_row(row: Sequence[Optional[str]]) -> str:
+    """Serialize a row the same way as the lines returned by `read_csv_with_duckdb`."""
+    output = io.StringIO()
+    csv.writer(output, lineterminator="").writerow(row)
+    return output.getvalue()
+
+
+def quote_literal(value: str) -> str:
+    """Quote a string for use as a literal in a DuckDB SQL statement."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+# Python encoding names mapped to the names DuckDB's CSV reader decodes natively
+DUCKDB_ENCODINGS = {
+    "utf-8": "utf-8",
+    "utf-8-sig": "utf-8",
+    "iso-8859-1": "latin-1",
+    "utf-16": "utf-16",
+}
+
+_temp_table_ids = itertools.count()
+
+
+def _duckdb_encoding(file_path: Path, encoding: str) -> Optional[str]:
+    """Return the DuckDB name of the encoding, or None if DuckDB cannot decode the file itself."""
+    duckdb_encoding = DUCKDB_ENCODINGS.get(encoding.lower())
+    if duckdb_encoding == "utf-16":
+        # DuckDB only decodes little-endian UTF-16
+        with open_input(file_path) as f:
+            if f.read(2) != b"\xff\xfe":
+                return None
+    return duckdb_encoding
+
+
+def _read_csv_sql(file_path: Path, encoding: str = "utf-8") -> str:
+    options = "all_varchar = true"
+    if encoding != "utf-8":
+        options += f", encoding = {quote_literal(encoding)}"
+    return f"SELECT * FROM read_csv({quote_literal(str(file_path))}, {options})"
+
+
+def _transcode(file_path: Path, encoding: str, target_path: Path) -> None:
+    # We read with detected encoding and write as UTF-8, one chunk at a time
+    with io.TextIOWrapper(open_input(file_path), encoding=encoding) as src:
+        with open(target_path, "w", encoding="utf-8") as dst:
+            shutil.copyfileobj(src, dst)
+
+
+@contextmanager
+def _transcoding_writer(file_path: Path, encoding: str, pipe_path: Path) -> Iterator[None]:
+    """
+    Transcode the file into a named pipe on a background thread while the caller reads from it.
+
+    If the file cannot be decoded, the writer stops and the reader sees the data
+    cut short, which may make it fail too; the decoding error is raised either
+    way, chained to the reader's error, because it is the actual cause.
+    """
+    errors: list[BaseException] = []
+    reader_error: Optional[BaseException] = None
+
+    def write() -> None:
+        try:
+            _transcode(file_path, encoding, pipe_path)
+        except BrokenPipeError:
+            pass  # The reader stopped early; its own error is reported instead
+        except BaseException as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write, name="csvdiff-transcode", daemon=True)
+    writer.start()
     try:
-        with open(file_path, "rb") as f:
-            raw = f.read(4)
-        if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
-            return "utf-16"
-        if raw.startswith(b"\xef\xbb\xbf"):
-            return "utf-8-sig"
-    except Exception:
-        pass
-
-    encodings = [
-        "utf-8",
-        "cp1252",
-        "iso-8859-1",
-    ]
-
-    for encoding in encodings:
+        yield
+    except BaseException as e:
+        reader_error = e
+        raise
+    finally:
+        while writer.is_alive():
+            # If the reader never opened the pipe (or gave up), open and close the read end
+            # so the writer gets unblocked and finishes with a broken pipe
+            try:
+                os.close(os.open(pipe_path, os.O_RDONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+            writer.join(timeout=0.1)
+        if errors:
+            raise errors[0] from reader_error
+
+
+def _load_transcoded(conn: duckdb.DuckDBPyConnection, file_path: Path, encoding: str) -> duckdb.DuckDBPyRelation:
+    """
+    Load a CSV file in an encoding DuckDB cannot decode into a temporary table.
+
+    The file is decoded chunk by chunk and streamed as UTF-8 through a named pipe
+    that DuckDB reads from, so no transcoded copy of the file is written to disk.
+    A pipe can only be read once, which is why the rows go into a table that
+    DuckDB manages (and can spill to disk compressed if memory runs out). Where
+    named pipes are not available (Windows), a temporary UTF-8 file is used.
+    """
+    table = f"csvdiff_transcoded_{next(_temp_table_ids)}"
+    with tempfile.TemporaryDirectory(prefix="csvdiff-") as temp_dir:
+        utf8_path = Path(temp_dir) / "transcoded.csv"
+        if hasattr(os, "mkfifo"):
+            os.mkfifo(utf8_path)
+            with _transcoding_writer(file_path, encoding, utf8_path):
+                conn.execute(f"CREATE TEMP TABLE {table} AS {_read_csv_sql(utf8_path)}")
+        else:
+            _transcode(file_path, encoding, utf8_path)
+            conn.execute(f"CREATE TEMP TABLE {table} AS {_read_csv_sql(utf8_path)}")
+    return conn.table(table)
+
+
+@dataclass(frozen=True)
+class RowSelection:
+    """The part of each CSV file to compare; mirrors `--columns`, `--exclude-columns` and `--where`."""
+
+    columns: Optional[tuple[str, ...]] = None  # Keep only these columns, in this order
+    exclude_columns: tuple[str, ...] = ()
+    where: Optional[str] = None  # DuckDB SQL predicate rows must satisfy
+
+
+def parse_columns(value: str) -> list[str]:
+    """Parse a comma-separated `--columns` or `--exclude-columns` value into a list of column names."""
+    columns = [column.strip() for column in value.split(",")]
+    if not all(columns):
+        raise ValueError(f"Invalid column list '{value}'. Use comma-separated column names, e.g. 'id,name'.")
+    return columns
+
+
+def select_rows(rel: duckdb.DuckDBPyRelation, selection: RowSelection, file_path: Path) -> duckdb.DuckDBPyRelation:
+    """
+    Apply a row selection to the relation of a CSV file.
+
+    Rows are filtered before columns are projected, so `where` may refer to
+    columns that are not compared. DuckDB pushes both into the CSV scan: rows
+    and values that are not selected never reach Python.
+
+    Raises:
+        ValueError: If a selected column is missing, no column is left, or `where` is invalid
+    """
+    if selection.where is not None:
         try:
-            with open(file_path, encoding=encoding) as f:
-                # Read a larger chunk to be more certain
-                f.read(8192)
-            return encoding
-        except UnicodeError:
-            continue
+            rel = rel.filter(selection.where)
+        except duckdb.Error as e:
+            raise ValueError(f"Invalid where condition '{selection.where}' for '{file_path}': {e}") from None
+
+    columns = rel.columns
+    if selection.columns is not None:
+        missing = [column for column in selection.columns if column not in columns]
+        if missing:
+            raise ValueError(f"CSV file '{file_path}' has no column(s): {', '.join(missing)}")
+        columns = list(selection.columns)
+    columns = [column for column in columns if column not in selection.exclude_columns]
+    if not columns:
+        raise ValueError(f"No columns of '{file_path}' are left to compare.")
+    if columns == rel.columns:
+        return rel
+    return rel.project(", ".join(quote_identifier(column) for column in columns))
+
+
+def read_csv_relation(
+    conn: duckdb.DuckDBPyConnection, file_path: Path, selection: Optional[RowSelection] = None
+) -> duckdb.DuckDBPyRelation:
+    """
+    Open a CSV file as a DuckDB relation with every column read as VARCHAR.
+
+    UTF-8, Latin-1 and little-endian UTF-16 files are decoded by DuckDB itself.
+    Other encodings are transcoded on the fly (see `_load_transcoded`). Files
+    ending in .gz or .zst are decompressed while they are read, never on disk.
+    With a `selection`, only the selected rows and columns are returned (see `select_rows`).
+    """
+    with phase("encoding"):
+        guess = guess_encoding(file_path)
+        record_encoding(file_path, guess.encoding, guess.confidence)
+        encoding = guess.encoding
+        duckdb_encoding = _duckdb_encoding(file_path, encoding)
+    if duckdb_encoding is None:
+        with phase("transcode"):
+            rel = _load_transcoded(conn, file_path, encoding)
+    else:
+        rel = conn.sql(_read_csv_sql(file_path, duckdb_encoding))
+    return rel if selection is None else select_rows(rel, selection, file_path)
+
+
+@dataclass(frozen=True)
+class DuckDBSettings:
+    """Resource limits for the DuckDB connections that read and compare CSV files."""
+
+    memory_limit: Optional[str] = None  # e.g. "4GB"; DuckDB spills to disk beyond it
+    threads: Optional[int] = None
+    temp_dir: Optional[Path] = None  # Where spilled data goes (DuckDB's default is `.tmp` in the working directory)
+
+
+def connect_duckdb(settings: Optional[DuckDBSettings] = None) -> duckdb.DuckDBPyConnection:
+    """Open an in-memory DuckDB connection configured with the given resource limits."""
+    config: dict[str, Union[str, int]] = {}
+    if settings is not None:
+        if settings.memory_limit is not None:
+            config["memory_limit"] = settings.memory_limit
+        if settings.threads is not None:
+            config["threads"] = settings.threads
+        if settings.temp_dir is not None:
+            config["temp_directory"] = str(settings.temp_dir)
+    conn = duckdb.connect(config=config)
+    # Long queries would otherwise draw a progress bar over our own status spinner
+    conn.execute("SET enable_progress_bar = false")
+    return conn
+
 
-    # If we get here, none worked. Raise an error that will be caught by the caller.
-    raise ValueError(f"Could not detect encoding for {file_path}. Tried: {', '.join(encodings)}")
+class CsvStream(NamedTuple):
+    """Column names and a lazy iterator over the rows of a CSV file."""
 
+    columns: list[str]
+    rows: Iterator[tuple[Optional[str], ...]]
 
-def read_csv_with_duckdb(file_path: Path) -> tuple[list[str], list[str]]:
-    """Read a single CSV file using DuckDB for memory-efficient processing, returning CSV strings."""
-    encoding = detect_encoding(file_path)
-    conn = duckdb.connect()
-    temp_file_path = None
+
+def fetch_rows(
+    source: Union[duckdb.DuckDBPyRelation, duckdb.DuckDBPyConnection], chunk_size: int = 10000
+) -> Iterator[tuple[Any, ...]]:
+    """
+    Yield the rows of a relation, or of the query last run on a cursor, `chunk_size` at a time.
+
+    Only one chunk is held in Python at once, so results larger than memory can be streamed.
+    """
+    while True:
+        chunk = source.fetchmany(size=chunk_size)
+        if not chunk:
+            break
+        yield from chunk
+
+
+@contextmanager
+def stream_csv_with_duckdb(
+    file_path: Path,
+    chunk_size: int = 10000,
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+) -> Iterator[CsvStream]:
+    """
+    Open a CSV file with DuckDB and stream its rows lazily, in file order.
+
+    Rows are fetched `chunk_size` at a time, so memory use stays bounded no
+    matter how large the file is. The rows are only valid inside the `with` block.
+    """
+    conn = connect_duckdb(settings)
 
     try:
-        target_path = file_path
-
-        # If encoding is not UTF-8, convert to a temporary UTF-8 file
-        # DuckDB only supports UTF-8 for CSV reading efficiently
-        if encoding.lower() not in ["utf-8", "utf8"]:
-            # Create a temporary file
-            fd, temp_path = tempfile.mkstemp(suffix=".csv")
-            os.close(fd)
-            temp_file_path = Path(temp_path)
-
-            # Convert to UTF-8
-            # We read with detected encoding and write as UTF-8
-            with open(file_path, encoding=encoding) as src:
-                with open(temp_file_path, "w", encoding="utf-8") as dst:
-                    shutil.copyfileobj(src, dst)
-
-            target_path = temp_file_path
-
-        # Use DuckDB to read CSV
-        rel = conn.read_csv(str(target_path), all_varchar=True)
+        rel = read_csv_relation(conn, file_path, selection)
+        yield CsvStream(columns=rel.columns, rows=fetch_rows(rel, chunk_size))
+    finally:
+        conn.close()
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column or table name for use in a DuckDB SQL statement."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _characters_that_force_quoting() -> list[str]:
+    # csv.writer (QUOTE_MINIMAL) always quotes the delimiter and the quote character.
+    # Whether line breaks are quoted depends on the Python version, so ask it.
+    characters = [",", '"']
+    for character in ("\r", "\n"):
+        if format_csv_row([f"a{character}b"]) != f"a{character}b":
+            characters.append(character)
+    return characters
+
+
+def csv_line_expression(columns: Sequence[str]) -> str:
+    """
+    Build a DuckDB SQL expression that renders a row as one CSV line.
+
+    The line is quoted exactly like `format_csv_row` (Python's `csv.writer`),
+    but it is computed column by column inside DuckDB's vectorized engine
+    instead of one `writerow` call per row in Python.
+    """
+    needs_quotes = _characters_that_force_quoting()
+    fields = []
+    for column in columns:
+        value = quote_identifier(column)
+        condition = " OR ".join(f"contains({value}, {quote_literal(character)})" for character in needs_quotes)
+        fields.append(
+            f"CASE WHEN {value} IS NULL THEN '' "
+            f"WHEN {condition} THEN '\"' || replace({value}, '\"', '\"\"') || '\"' "
+            f"ELSE {value} END"
+        )
+    if len(fields) == 1:
+        # csv.writer writes a row holding a single empty field as "" so it differs from an empty line
+        value = quote_identifier(columns[0])
+        return f"CASE WHEN {value} IS NULL OR {value} = '' THEN '\"\"' ELSE {fields[0]} END"
+    return " || ',' || ".join(fields)
+
+
+def _cached_lines(
+    conn: duckdb.DuckDBPyConnection, file_path: Path, cache_dir: Path, max_bytes: int, column: str = "line"
+) -> Optional[tuple[duckdb.DuckDBPyRelation, list[str]]]:
+    """
+    Return the CSV lines of a file from the parsed-file cache, parsing and caching it first on a miss.
+
+    Each entry holds the rendered lines and a 64-bit hash per line, stored as Parquet.
+    With `column="hash"`, the relation holds the hashes instead of the lines.
+    Returns None if the file is not cached and cannot be cached: because its
+    entry would not fit in `max_bytes` on its own, or because the cache
+    directory cannot be created or written to.
+    """
+    entry = cache_entry(cache_dir, file_path)
+    cols = load_cached_columns(entry)
+    if cols is None:
+        if file_path.stat().st_size > max_bytes:
+            return None  # Too large to cache: skip writing a copy that eviction would delete
+        rel = read_csv_relation(conn, file_path)
         cols = rel.columns
+        line = csv_line_expression(cols)
+        temp_path = entry.data_path.with_name(f"{entry.data_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                rel.project(f"{line} AS line, hash({line}) AS hash").write_parquet(str(temp_path))
+                if temp_path.stat().st_size > max_bytes:
+                    # Compressed inputs can expand past the limit; the file is read again without the cache
+                    return None
+                os.replace(temp_path, entry.data_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+            save_cached_columns(entry, cols)
+        except (OSError, duckdb.IOException):
+            return None
+    return conn.sql(f"SELECT {column} FROM read_parquet({quote_literal(str(entry.data_path))})"), cols
+
+
+def _trim_cache(cache_dir: Path, max_bytes: int, file_paths: Sequence[Path]) -> None:
+    # Evict once after all inputs are read, so the entries of one comparison never evict each other
+    try:
+        evict(cache_dir, max_bytes, keep=[cache_entry(cache_dir, file_path) for file_path in file_paths])
+    except OSError:
+        pass  # The entries are complete; the cache is trimmed on a later run
+
+
+def _read_csv_lines(
+    conn: duckdb.DuckDBPyConnection,
+    file_path: Path,
+    chunk_size: int = 10000,
+    cache_dir: Optional[Path] = None,
+    hashes: bool = False,
+    selection: Optional[RowSelection] = None,
+    max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+) -> tuple[Union[list[str], list[int]], list[str]]:
+    # DuckDB parses the file and renders the rows as CSV lines in one pipeline, timed together
+    with phase("parse"):
+        # The cache holds whole files, so a selection bypasses it
+        cached = None
+        if cache_dir is not None and selection is None:
+            cached = _cached_lines(conn, file_path, cache_dir, max_cache_bytes, "hash" if hashes else "line")
+        if cached is not None:
+            lines_rel, cols = cached
+        else:
+            rel = read_csv_relation(conn, file_path, selection)
+            cols = rel.columns
+            # Let DuckDB render each row as a CSV line
+            line = csv_line_expression(cols)
+            lines_rel = rel.project(f"hash({line})" if hashes else line)
+
+        lines = [line for (line,) in fetch_rows(lines_rel, chunk_size)]
+
+    record_rows(file_path, len(lines))
+    return lines, cols
 
-        # Convert to CSV string lines directly using chunked fetching for efficiency
-        lines = []
-        output = io.StringIO()
-        writer = csv.writer(output, lineterminator="")
-
-        chunk_size = 10000
-        while True:
-            chunk = rel.fetchmany(size=chunk_size)
-            if not chunk:
-                break
-            for row in chunk:
-                output.seek(0)
-                output.truncate(0)
-                writer.writerow(row)
-                lines.append(output.getvalue())
-
-        return lines, cols
+
+def read_csv_with_duckdb(
+    file_path: Path,
+    chunk_size: int = 10000,
+    settings: Optional[DuckDBSettings] = None,
+    cache_dir: Optional[Path] = None,
+    selection: Optional[RowSelection] = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Read a single CSV file using DuckDB for memory-efficient processing, returning CSV strings.
+
+    With a `cache_dir`, the parsed lines are kept in an on-disk cache (see `utils.cache`)
+    and later reads of the unchanged file skip encoding detection and parsing.
+    The cache is kept under `$CSVDIFF_CACHE_MAX_BYTES` (1 GiB by default).
+    With a `selection`, only the selected rows and columns are read; the cache is not used.
+    """
+    use_cache = cache_dir is not None and selection is None
+    max_bytes = max_cache_bytes() if use_cache else DEFAULT_MAX_CACHE_BYTES
+    conn = connect_duckdb(settings)
+
+    try:
+        result = _read_csv_lines(conn, file_path, chunk_size, cache_dir, selection=selection, max_cache_bytes=max_bytes)
     finally:
         conn.close()
-        # Clean up temporary file if it exists
-        if temp_file_path and temp_file_path.exists():
-            try:
-                temp_file_path.unlink()
-            except Exception:
-                pass
+    if use_cache:
+        _trim_cache(cache_dir, max_bytes, [file_path])
+    return result
+
+
+def read_csv_pair(
+    file1: Path,
+    file2: Path,
+    settings: Optional[DuckDBSettings] = None,
+    cache_dir: Optional[Path] = None,
+    hashes: bool = False,
+    selection: Optional[RowSelection] = None,
+) -> tuple[tuple[list, list[str]], tuple[list, list[str]]]:
+    """
+    Read two CSV files concurrently, like `read_csv_with_duckdb`.
+
+    DuckDB releases the GIL while it parses, so one file can be parsed while
+    the rows of the other are being serialized, and the read phase takes about
+    as long as the slower of the two files instead of their sum. Both files are
+    read through cursors of one database, so they share one memory limit.
+
+    With `hashes`, a 64-bit hash of each line is returned instead of the line,
+    for callers that only need to tell rows apart: no string is built in Python.
+    """
+    use_cache = cache_dir is not None and selection is None
+    max_bytes = max_cache_bytes() if use_cache else DEFAULT_MAX_CACHE_BYTES
+    conn = connect_duckdb(settings)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            read = partial(
+                _read_csv_lines, cache_dir=cache_dir, hashes=hashes, selection=selection, max_cache_bytes=max_bytes
+            )
+            future1 = executor.submit(read, conn.cursor(), file1)
+            future2 = executor.submit(read, conn.cursor(), file2)
+            result = future1.result(), future2.result()
+    finally:
+        conn.close()
+    if use_cache:
+        _trim_cache(cache_dir, max_bytes, [file1, file2])
+    return result
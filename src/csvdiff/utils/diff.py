@@ -0,0 +1,549 @@
+from collections.abc import Hashable, Iterable, Iterator, Sequence
+from enum import Enum
+from math import isqrt
+
+# (tag, i1, i2, j1, j2) with the same meaning as `difflib.SequenceMatcher.get_opcodes()`
+Opcode = tuple[str, int, int, int, int]
+# (i, j, size): a[i:i + size] == b[j:j + size]
+MatchingBlock = tuple[int, int, int]
+
+# Histogram diff only anchors on rows that occur at most this many times in the region,
+# like git's implementation. Regions without such rows fall back to Myers.
+HISTOGRAM_MAX_CHAIN = 64
+# Each split of histogram diff rescans its region, so anchors that split off only a row or two
+# (as on shuffled rows) make it quadratic. Once the rescanned rows exceed this many times the
+# input size, the remaining regions fall back to Myers, whose cost is bounded.
+HISTOGRAM_MAX_COST_FACTOR = 32
+# Myers gives up on finding the optimal split point after this many edit steps
+# (at least; it grows with the square root of the input) and settles for a good one,
+# which bounds its cost on inputs with almost nothing in common. Same heuristic as git.
+MYERS_MIN_MAX_COST = 256
+
+
+class DiffAlgorithm(str, Enum):
+    """Diff engines selectable with `--algorithm`."""
+
+    MYERS = "myers"
+    HISTOGRAM = "histogram"
+    PATIENCE = "patience"
+    DIFFLIB = "difflib"
+
+
+def intern_lines(a: Sequence[Hashable], b: Sequence[Hashable]) -> tuple[list[int], list[int]]:
+    """
+    Map both sequences onto small integer ids so equal rows get equal ids.
+
+    The engines compare ids instead of strings, which makes every comparison a
+    cheap integer check. Unlike hashing, interning cannot produce collisions.
+    """
+    ids: dict[Hashable, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _common_prefix(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int) -> int:
+    size = 0
+    while alo + size < ahi and blo + size < bhi and a[alo + size] == b[blo + size]:
+        size += 1
+    return size
+
+
+def _common_suffix(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int) -> int:
+    size = 0
+    while ahi - size > alo and bhi - size > blo and a[ahi - size - 1] == b[bhi - size - 1]:
+        size += 1
+    return size
+
+
+def _middle_snake(a: Sequence[int], b: Sequence[int]) -> tuple[int, int]:
+    """
+    Find a split point on an optimal edit path using Myers' bidirectional search.
+
+    This is what keeps Myers in linear space: instead of storing the whole edit
+    graph, both halves around the split point are solved independently.
+    Returns (-1, -1) when the sequences have nothing in common.
+    """
+    n, m = len(a), len(b)
+    max_d = (n + m + 1) // 2
+    max_cost = max(MYERS_MIN_MAX_COST, isqrt(n + m + 3))
+    offset = max_d + 1
+    v1 = [-1] * (2 * offset + 2)
+    v1[offset + 1] = 0
+    v2 = v1[:]
+    delta = n - m
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+
+    for d in range(max_d + 1):
+        # Walk the forward path one step
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[x1] == b[y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2
+            elif y1 > m:
+                k1start += 2
+            elif front:
+                k2_offset = offset + delta - k1
+                if 0 <= k2_offset < len(v2) and v2[k2_offset] != -1 and x1 >= n - v2[k2_offset]:
+                    return x1, y1
+
+        # Walk the reverse path one step
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[n - x2 - 1] == b[m - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = offset + delta - k2
+                if 0 <= k1_offset < len(v1) and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return x1, y1
+
+        if d >= max_cost:
+            # Too expensive: split at the furthest point reached by the forward search
+            best_x = best_y = -1
+            for k1 in range(-d + k1start, d + 1 - k1end, 2):
+                x1 = v1[offset + k1]
+                y1 = x1 - k1
+                if x1 <= n and y1 <= m and x1 + y1 > best_x + best_y:
+                    best_x, best_y = x1, y1
+            if 0 < best_x + best_y < n + m:
+                return best_x, best_y
+
+    return -1, -1
+
+
+def _myers_blocks(
+    a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int, blocks: list[MatchingBlock]
+) -> None:
+    """Append the matching blocks of a minimal (Myers) diff of a[alo:ahi] and b[blo:bhi]."""
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        prefix = _common_prefix(a, alo, ahi, b, blo, bhi)
+        if prefix:
+            blocks.append((alo, blo, prefix))
+            alo += prefix
+            blo += prefix
+        suffix = _common_suffix(a, alo, ahi, b, blo, bhi)
+        if suffix:
+            blocks.append((ahi - suffix, bhi - suffix, suffix))
+            ahi -= suffix
+            bhi -= suffix
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        x, y = _middle_snake(a[alo:ahi], b[blo:bhi])
+        if x < 0:
+            continue
+        stack.append((alo + x, ahi, blo + y, bhi))
+        stack.append((alo, alo + x, blo, blo + y))
+
+
+def _longest_increasing_pairs(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Longest subsequence of (i, j) pairs (sorted by i) whose j values are increasing (patience sorting)."""
+    tails: list[int] = []  # index into pairs of the smallest tail for each pile
+    previous = [-1] * len(pairs)
+    tail_values: list[int] = []
+    for index, (_, j) in enumerate(pairs):
+        # Binary search for the pile this card goes on
+        lo, hi = 0, len(tail_values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tail_values[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0:
+            previous[index] = tails[lo - 1]
+        if lo == len(tails):
+            tails.append(index)
+            tail_values.append(j)
+        else:
+            tails[lo] = index
+            tail_values[lo] = j
+
+    result = []
+    index = tails[-1] if tails else -1
+    while index != -1:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _patience_blocks(
+    a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int, blocks: list[MatchingBlock]
+) -> None:
+    """Append the matching blocks of a patience diff, anchored on rows that are unique in both regions."""
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        prefix = _common_prefix(a, alo, ahi, b, blo, bhi)
+        if prefix:
+            blocks.append((alo, blo, prefix))
+            alo += prefix
+            blo += prefix
+        suffix = _common_suffix(a, alo, ahi, b, blo, bhi)
+        if suffix:
+            blocks.append((ahi - suffix, bhi - suffix, suffix))
+            ahi -= suffix
+            bhi -= suffix
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        # Positions of rows that occur exactly once on each side (-1 marks duplicates)
+        unique_a: dict[int, int] = {}
+        for i in range(alo, ahi):
+            unique_a[a[i]] = -1 if a[i] in unique_a else i
+        unique_b: dict[int, int] = {}
+        for j in range(blo, bhi):
+            unique_b[b[j]] = -1 if b[j] in unique_b else j
+        pairs = sorted((i, unique_b[value]) for value, i in unique_a.items() if i >= 0 and unique_b.get(value, -1) >= 0)
+
+        if not pairs:
+            _myers_blocks(a, alo, ahi, b, blo, bhi, blocks)
+            continue
+
+        # Solve the gaps between consecutive anchors independently
+        previous_i, previous_j = alo, blo
+        for i, j in _longest_increasing_pairs(pairs):
+            stack.append((previous_i, i, previous_j, j))
+            blocks.append((i, j, 1))
+            previous_i, previous_j = i + 1, j + 1
+        stack.append((previous_i, ahi, previous_j, bhi))
+
+
+def _histogram_blocks(
+    a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int, blocks: list[MatchingBlock]
+) -> None:
+    """
+    Append the matching blocks of a histogram diff (as in git).
+
+    Each region is split around the longest common run that contains the
+    rarest rows, which keeps frequently repeated rows from becoming anchors.
+    Regions without such rows, and all regions left once the splits get too
+    costly, are solved with Myers instead.
+    """
+    budget = HISTOGRAM_MAX_COST_FACTOR * (ahi - alo + bhi - blo)
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        if budget < 0:
+            _myers_blocks(a, alo, ahi, b, blo, bhi, blocks)
+            continue
+
+        prefix = _common_prefix(a, alo, ahi, b, blo, bhi)
+        if prefix:
+            blocks.append((alo, blo, prefix))
+            alo += prefix
+            blo += prefix
+        suffix = _common_suffix(a, alo, ahi, b, blo, bhi)
+        if suffix:
+            blocks.append((ahi - suffix, bhi - suffix, suffix))
+            ahi -= suffix
+            bhi -= suffix
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        budget -= ahi - alo + bhi - blo
+        occurrences: dict[int, list[int]] = {}
+        for i in range(alo, ahi):
+            occurrences.setdefault(a[i], []).append(i)
+
+        best: tuple[int, int, int] = (0, 0, 0)
+        best_count = HISTOGRAM_MAX_CHAIN + 1
+        has_common = False
+        j = blo
+        while j < bhi:
+            positions = occurrences.get(b[j])
+            next_j = j + 1
+            if positions is not None:
+                has_common = True
+                if len(positions) <= best_count:
+                    for i in positions:
+                        # Extend the match around (i, j), tracking the rarest row it contains
+                        count = len(positions)
+                        start_i, start_j = i, j
+                        while start_i > alo and start_j > blo and a[start_i - 1] == b[start_j - 1]:
+                            start_i -= 1
+                            start_j -= 1
+                            count = min(count, len(occurrences[a[start_i]]))
+                        end_i, end_j = i + 1, j + 1
+                        while end_i < ahi and end_j < bhi and a[end_i] == b[end_j]:
+                            count = min(count, len(occurrences[a[end_i]]))
+                            end_i += 1
+                            end_j += 1
+                        next_j = max(next_j, end_j)
+                        if best[2] < end_i - start_i or count < best_count:
+                            best = (start_i, start_j, end_i - start_i)
+                            best_count = count
+            j = next_j
+
+        if not has_common:
+            continue
+        if best_count > HISTOGRAM_MAX_CHAIN:
+            _myers_blocks(a, alo, ahi, b, blo, bhi, blocks)
+            continue
+
+        i, j, size = best
+        blocks.append(best)
+        stack.append((i + size, ahi, j + size, bhi))
+        stack.append((alo, i, blo, j))
+
+
+def _discard_unmatched(a: Sequence[int], b: Sequence[int]) -> tuple[list[int], list[int]]:
+    """
+    Return the positions of the rows that also occur in the other sequence.
+
+    Rows without a counterpart can never be part of a match, so dropping them
+    before diffing (like GNU diff and git do) leaves the result unchanged while
+    turning "many edited rows" into a nearly identical pair of sequences.
+    """
+    a_values, b_values = set(a), set(b)
+    a_index = [i for i, value in enumerate(a) if value in b_values]
+    b_index = [j for j, value in enumerate(b) if value in a_values]
+    return a_index, b_index
+
+
+def _expand_blocks(blocks: list[MatchingBlock], a_index: list[int], b_index: list[int]) -> list[MatchingBlock]:
+    """Map blocks found on the reduced sequences back to positions in the original sequences."""
+    expanded: list[MatchingBlock] = []
+    for i, j, size in blocks:
+        start_i, start_j, run = a_index[i], b_index[j], 1
+        for k in range(1, size):
+            next_i, next_j = a_index[i + k], b_index[j + k]
+            if next_i == start_i + run and next_j == start_j + run:
+                run += 1
+                continue
+            expanded.append((start_i, start_j, run))
+            start_i, start_j, run = next_i, next_j, 1
+        if size:
+            expanded.append((start_i, start_j, run))
+    return expanded
+
+
+def get_matching_blocks(
+    a: Sequence[int], b: Sequence[int], algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM
+) -> list[MatchingBlock]:
+    """
+    Compute the matching blocks of two id sequences with the given engine.
+
+    The result has the same shape as `difflib.SequenceMatcher.get_matching_blocks()`:
+    sorted, adjacent blocks merged, and terminated by a (len(a), len(b), 0) sentinel.
+    """
+    if algorithm == DiffAlgorithm.DIFFLIB:
+        # Imported here: difflib is only needed by this engine, and the CLI imports this module at startup
+        from difflib import SequenceMatcher
+
+        return [tuple(block) for block in SequenceMatcher(None, a, b).get_matching_blocks()]
+
+    engines = {
+        DiffAlgorithm.MYERS: _myers_blocks,
+        DiffAlgorithm.HISTOGRAM: _histogram_blocks,
+        DiffAlgorithm.PATIENCE: _patience_blocks,
+    }
+    a_index, b_index = _discard_unmatched(a, b)
+    reduced_a, reduced_b = [a[i] for i in a_index], [b[j] for j in b_index]
+
+    blocks: list[MatchingBlock] = []
+    engines[DiffAlgorithm(algorithm)](reduced_a, 0, len(reduced_a), reduced_b, 0, len(reduced_b), blocks)
+    blocks = _expand_blocks(sorted(blocks), a_index, b_index)
+
+    return _merge_blocks(blocks, len(a), len(b))
+
+
+def _merge_blocks(blocks: Iterable[MatchingBlock], a_size: int, b_size: int) -> list[MatchingBlock]:
+    """Join adjacent sorted blocks and append the (a_size, b_size, 0) sentinel."""
+    merged: list[MatchingBlock] = []
+    for i, j, size in blocks:
+        if not size:
+            continue
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    merged.append((a_size, b_size, 0))
+    return merged
+
+
+def common_affixes(a: Sequence[Hashable], b: Sequence[Hashable], chunk_size: int = 4096) -> tuple[int, int]:
+    """
+    Count the rows both sequences share at the start and at the end.
+
+    Whole chunks are compared with list equality, which runs in C and only
+    falls back to a per-row check inside the first chunk that differs.
+
+    Returns:
+        (prefix, suffix) sizes; they never overlap
+    """
+    limit = min(len(a), len(b))
+
+    prefix = 0
+    while prefix + chunk_size <= limit and a[prefix : prefix + chunk_size] == b[prefix : prefix + chunk_size]:
+        prefix += chunk_size
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+
+    limit -= prefix
+    a_end, b_end = len(a), len(b)
+    suffix = 0
+    while (
+        suffix + chunk_size <= limit
+        and a[a_end - suffix - chunk_size : a_end - suffix] == b[b_end - suffix - chunk_size : b_end - suffix]
+    ):
+        suffix += chunk_size
+    while suffix < limit and a[a_end - suffix - 1] == b[b_end - suffix - 1]:
+        suffix += 1
+
+    return prefix, suffix
+
+
+def diff_opcodes(
+    a: Sequence[Hashable], b: Sequence[Hashable], algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM
+) -> list[Opcode]:
+    """
+    Compute the opcodes turning `a` into `b`.
+
+    The rows shared at the start and end are trimmed first, so the engine only
+    sees the window that actually differs. For typical updates of a large
+    sorted file this window is a tiny fraction of the input. Positions in the
+    returned opcodes still refer to the full sequences.
+    """
+    prefix, suffix = common_affixes(a, b)
+    a_ids, b_ids = intern_lines(a[prefix : len(a) - suffix], b[prefix : len(b) - suffix])
+
+    blocks = [(0, 0, prefix)]
+    blocks.extend((i + prefix, j + prefix, size) for i, j, size in get_matching_blocks(a_ids, b_ids, algorithm))
+    blocks.append((len(a) - suffix, len(b) - suffix, suffix))
+    return get_opcodes(_merge_blocks(blocks, len(a), len(b)))
+
+
+def get_opcodes(matching_blocks: Sequence[MatchingBlock]) -> list[Opcode]:
+    """Turn matching blocks into opcodes, exactly like `difflib.SequenceMatcher.get_opcodes()`."""
+    i = j = 0
+    opcodes: list[Opcode] = []
+    for ai, bj, size in matching_blocks:
+        tag = ""
+        if i < ai and j < bj:
+            tag = "replace"
+        elif i < ai:
+            tag = "delete"
+        elif j < bj:
+            tag = "insert"
+        if tag:
+            opcodes.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(("equal", ai, i, bj, j))
+    return opcodes
+
+
+def group_opcodes(opcodes: list[Opcode], n: int = 3) -> Iterator[list[Opcode]]:
+    """Group opcodes into hunks with `n` lines of context, like `difflib.SequenceMatcher.get_grouped_opcodes()`."""
+    codes = list(opcodes)
+    if not codes:
+        codes = [("equal", 0, 1, 0, 1)]
+    # Fixup leading and trailing groups if they show no changes
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    nn = n + n
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # End the current group and start a new one whenever there is a large range with no changes
+        if tag == "equal" and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Convert a range to the `@@ -a,b +c,d @@` notation used by unified diffs."""
+    beginning = start + 1  # lines start numbering with one
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1  # empty ranges begin at line just before the range
+    return f"{beginning},{length}"
+
+
+def format_unified(
+    a: Sequence[str], b: Sequence[str], groups: Iterator[list[Opcode]], fromfile: str, tofile: str
+) -> Iterator[str]:
+    """Render grouped opcodes in the same format as `difflib.unified_diff(..., lineterm="")`."""
+    started = False
+    for group in groups:
+        if not started:
+            started = True
+            yield f"--- {fromfile}"
+            yield f"+++ {tofile}"
+
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@"
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in {"replace", "delete"}:
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in {"replace", "insert"}:
+                for line in b[j1:j2]:
+                    yield "+" + line
+
+
+def unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    fromfile: str,
+    tofile: str,
+    algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM,
+    n: int = 3,
+) -> Iterator[str]:
+    """
+    Compare two lists of rows and yield a unified diff with the selected engine.
+
+    The output format is identical to `difflib.unified_diff(..., lineterm="")`;
+    only the choice of hunks depends on the engine.
+    """
+    opcodes = diff_opcodes(a, b, algorithm)
+    yield from format_unified(a, b, group_opcodes(opcodes, n), fromfile, tofile)
@@ -1,5 +1,92 @@
+import gzip
 import io
+from collections.abc import Iterable
+from enum import Enum
 from pathlib import Path
+from typing import BinaryIO
+
+# Compression is chosen by the last extension, e.g. "data.csv.gz" or "result.diff.zst"
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+
+# Buffer of plain output files, and number of lines joined into a single write
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+WRITE_BATCH_LINES = 4096
+
+
+class OutputFormat(str, Enum):
+    """Output formats selectable with `--format`."""
+
+    DIFF = "diff"
+    JSONL = "jsonl"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+# Extensions allowed for each output format, the default first ("" means no extension)
+OUTPUT_EXTENSIONS = {
+    OutputFormat.DIFF: (".diff", ".txt", ".log", ""),
+    OutputFormat.JSONL: (".jsonl", ".ndjson"),
+    OutputFormat.CSV: (".csv",),
+    OutputFormat.PARQUET: (".parquet",),
+}
+
+
+class _CompressedTextFile(io.TextIOWrapper):
+    """UTF-8 text layer over a compressed stream, named after the file on disk like a regular file."""
+
+    def __init__(self, buffer: io.IOBase, name: str):
+        super().__init__(buffer, encoding="utf-8")
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def compression_suffix(file_path: Path) -> str:
+    """Return the compression extension of a path (".gz" or ".zst"), or "" if it is not compressed."""
+    suffix = file_path.suffix.lower()
+    return suffix if suffix in COMPRESSION_SUFFIXES else ""
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "Zstandard (.zst) files need the 'zstandard' package: pip install 'csv-diff-py[zstd]'"
+        ) from None
+    return zstandard
+
+
+def decompressing_reader(fileobj: BinaryIO, compression: str) -> BinaryIO:
+    """Wrap a binary file so reads return decompressed bytes. The wrapper leaves `fileobj` open."""
+    if compression == ".gz":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if compression == ".zst":
+        return _zstandard().ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False)
+    return fileobj
+
+
+def open_input(file_path: Path) -> BinaryIO:
+    """Open a file for reading bytes, decompressing .gz and .zst files on the fly."""
+    compression = compression_suffix(file_path)
+    if compression == ".gz":
+        return gzip.open(file_path, "rb")
+    if compression == ".zst":
+        return _zstandard().ZstdDecompressor().stream_reader(open(file_path, "rb"), read_across_frames=True)
+    return open(file_path, "rb")
+
+
+def _open_exclusive(full_path: Path) -> io.TextIOWrapper:
+    compression = compression_suffix(full_path)
+    if compression == ".gz":
+        # Level 6 compresses nearly as well as the default 9, several times faster
+        return _CompressedTextFile(gzip.open(full_path, "xb", compresslevel=6), str(full_path))
+    if compression == ".zst":
+        compressor = _zstandard().ZstdCompressor()
+        return _CompressedTextFile(compressor.stream_writer(open(full_path, "xb"), closefd=True), str(full_path))
+    return open(full_path, "x", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
 
 
 def create_unique_output_file(output_path: Path) -> io.TextIOWrapper:
@@ -11,15 +98,16 @@ def create_unique_output_file(output_path: Path) -> io.TextIOWrapper:
     2. Eliminates race conditions by using exclusive file creation mode ('x')
     3. If a file with the target name already exists, automatically retries with an
        incremented counter inserted before the extension
+    4. Compresses everything written with gzip or zstd if the name ends in .gz or .zst
 
     Args:
-        output_path: Full Path object including filename and extension (e.g., "result.diff")
+        output_path: Full Path object including filename and extension (e.g., "result.diff" or "result.diff.gz")
 
     Returns:
         file_handle where the file is already opened for writing
 
     Raises:
-        RuntimeError: If unable to create a unique file after max attempts
+        RuntimeError: If unable to create a unique file after max attempts, or zstd support is not installed
         PermissionError: If lacking permission to create directory or file
         FileExistsError: If parent path component exists as a file (not directory)
         NotADirectoryError: If parent component is a file (from mkdir)
@@ -30,8 +118,11 @@ def create_unique_output_file(output_path: Path) -> io.TextIOWrapper:
 
     # Extract components: parent dir, stem (filename without extension), suffix (extension)
     parent_dir = output_path.parent
-    stem = output_path.stem
     suffix = output_path.suffix
+    if compression_suffix(output_path):
+        # Keep "result.diff.gz" together: the counter goes before ".diff"
+        suffix = Path(output_path.stem).suffix + suffix
+    stem = output_path.name[: len(output_path.name) - len(suffix)]
 
     # Create parent directory if it doesn't exist
     # Note: This will raise FileExistsError if parent_dir exists as a file (not directory)
@@ -51,7 +142,7 @@ def create_unique_output_file(output_path: Path) -> io.TextIOWrapper:
         try:
             # 'x' mode: exclusive creation (atomic operation)
             # Fails immediately if file exists - no race condition
-            return open(full_path, "x", encoding="utf-8")
+            return _open_exclusive(full_path)
         except FileExistsError:
             # File exists, try next counter
             counter += 1
@@ -59,3 +150,83 @@ def create_unique_output_file(output_path: Path) -> io.TextIOWrapper:
 
     # Should never reach here in normal operation
     raise RuntimeError(f"Failed to create unique file after {max_attempts} attempts")
+
+
+def write_lines(f: io.TextIOBase, lines: Iterable[str], batch_lines: int = WRITE_BATCH_LINES) -> bool:
+    """
+    Write lines to a text file, each followed by a newline.
+
+    Lines are joined in batches, so a multi-GB diff takes one write call per
+    batch instead of one string concatenation and one write per line.
+
+    Returns:
+        Whether any line was written
+    """
+    batch: list[str] = []
+    written = False
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_lines:
+            f.write("\n".join(batch) + "\n")
+            batch.clear()
+            written = True
+    if batch:
+        f.write("\n".join(batch) + "\n")
+        written = True
+    return written
+
+
+def files_are_identical(file1: Path, file2: Path, block_size: int = 1024 * 1024) -> bool:
+    """
+    Check whether two files have exactly the same bytes.
+
+    This is much cheaper than parsing both files, so it lets unchanged snapshots
+    skip encoding detection, CSV parsing and diffing entirely. Files of different
+    sizes are rejected from their metadata alone, without reading any data.
+
+    Args:
+        file1: Path to the first file
+        file2: Path to the second file
+        block_size: Number of bytes compared per read
+
+    Returns:
+        True if both files have the same content, False otherwise
+    """
+    stat1, stat2 = file1.stat(), file2.stat()
+    if stat1.st_size != stat2.st_size:
+        return False
+    if (stat1.st_dev, stat1.st_ino) == (stat2.st_dev, stat2.st_ino):
+        return True
+
+    with open(file1, "rb") as f1, open(file2, "rb") as f2:
+        while True:
+            block1 = f1.read(block_size)
+            if block1 != f2.read(block_size):
+                return False
+            if not block1:
+                return True
+
+
+def has_text_after_first_line(file_path: Path, block_size: int = 64 * 1024) -> bool:
+    """
+    Check whether a file has anything but line breaks after its first line.
+
+    Only the head of the file is read, up to the first such character, so this
+    tells a header-only CSV file from one with rows before parsing it. NUL bytes
+    are ignored, so UTF-16 files are handled too. Compressed files are checked
+    after decompressing them.
+    """
+    found_line_break = False
+    with open_input(file_path) as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return False
+            if not found_line_break:
+                line_break = block.find(b"\n")
+                if line_break == -1:
+                    continue
+                found_line_break = True
+                block = block[line_break + 1 :]
+            if block.strip(b"\r\n\x00"):
+                return True
@@ -0,0 +1,254 @@
+import json
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import duckdb
+
+from csvdiff.utils.csv import DuckDBSettings, connect_duckdb, csv_line_expression, quote_literal, read_csv_relation
+from csvdiff.utils.diff import DiffAlgorithm, Opcode, diff_opcodes, format_unified, group_opcodes
+
+INDEX_SUFFIX = ".csvidx"
+INDEX_VERSION = "1"
+
+# Rows per block: the unit of the block hashes and of the Parquet row groups in an index
+BLOCK_ROWS = 8192
+
+# Rows are hashed with DuckDB's fast `hash()`, which may change between DuckDB releases
+HASH_FUNCTION = f"duckdb-{duckdb.__version__}"
+
+
+class CsvIndex(NamedTuple):
+    """Metadata of a snapshot index written by `build_index`."""
+
+    path: Path
+    columns: list[str]
+    row_count: int
+    block_rows: int
+    block_hashes: list[int]
+    hash_function: str
+
+
+@dataclass
+class IndexedDiff:
+    """Result of comparing an index with a CSV file. `lines` is only valid inside `open_index_diff`."""
+
+    columns1: list[str]
+    columns2: list[str]
+    lines: Iterator[str]
+
+
+def default_index_path(file_path: Path) -> Path:
+    """Return the sidecar index path of a CSV file, e.g. `data.csv.csvidx`."""
+    return file_path.with_name(file_path.name + INDEX_SUFFIX)
+
+
+def is_index_file(file_path: Path) -> bool:
+    """Tell an index from a CSV file by its extension."""
+    return file_path.suffix.lower() == INDEX_SUFFIX
+
+
+def _load_rows(conn: duckdb.DuckDBPyConnection, file_path: Path, table: str) -> list[str]:
+    """
+    Parse a CSV file into a temporary table of (line, hash), in file order, and return its columns.
+
+    `rowid` of the table is the 0-based row number.
+    """
+    rel = read_csv_relation(conn, file_path)
+    line = csv_line_expression(rel.columns)
+    rel.project(f"{line} AS line").create_view(f"{table}_lines")
+    conn.execute(f"CREATE TEMP TABLE {table} AS SELECT line, hash(line) AS hash FROM {table}_lines")
+    return rel.columns
+
+
+def _block_hashes(conn: duckdb.DuckDBPyConnection, source: str, row: str) -> list[int]:
+    return [
+        block_hash
+        for (block_hash,) in conn.execute(
+            f"""
+            SELECT hash(list(hash ORDER BY {row}))
+            FROM {source}
+            GROUP BY {row} // {BLOCK_ROWS}
+            ORDER BY {row} // {BLOCK_ROWS}
+            """
+        ).fetchall()
+    ]
+
+
+def build_index(file_path: Path, index_path: Path, settings: Optional[DuckDBSettings] = None) -> CsvIndex:
+    """
+    Write a snapshot index of a CSV file.
+
+    The index is a Parquet file holding the row number, the 64-bit hash and the
+    CSV line of every row, in row groups of `BLOCK_ROWS` rows. The metadata holds
+    the columns and one hash per block. Comparing against the index reads the
+    row hashes and only decompresses the lines of the blocks that show up in the diff.
+    """
+    conn = connect_duckdb(settings)
+    try:
+        columns = _load_rows(conn, file_path, "indexed_rows")
+        (row_count,) = conn.execute("SELECT count(*) FROM indexed_rows").fetchone()
+        block_hashes = _block_hashes(conn, "indexed_rows", "rowid")
+        metadata = {
+            "csvdiff_index_version": INDEX_VERSION,
+            "columns": json.dumps(columns),
+            "row_count": str(row_count),
+            "block_rows": str(BLOCK_ROWS),
+            "block_hashes": json.dumps(block_hashes),
+            "hash_function": HASH_FUNCTION,
+        }
+        kv_metadata = ", ".join(f"{key}: {quote_literal(value)}" for key, value in metadata.items())
+        conn.execute(
+            f"""
+            COPY (SELECT rowid AS row, hash, line FROM indexed_rows ORDER BY rowid)
+            TO {quote_literal(str(index_path))}
+            (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {BLOCK_ROWS}, KV_METADATA {{{kv_metadata}}})
+            """
+        )
+    finally:
+        conn.close()
+
+    return CsvIndex(index_path, columns, row_count, BLOCK_ROWS, block_hashes, HASH_FUNCTION)
+
+
+def read_index(conn: duckdb.DuckDBPyConnection, index_path: Path) -> CsvIndex:
+    """
+    Read the metadata of an index written by `build_index`.
+
+    Raises:
+        ValueError: If the file is not an index or was written by an incompatible version
+    """
+    try:
+        metadata = dict(
+            conn.execute(
+                f"SELECT decode(key), decode(value) FROM parquet_kv_metadata({quote_literal(str(index_path))})"
+            ).fetchall()
+        )
+    except duckdb.Error:
+        metadata = {}
+    if metadata.get("csvdiff_index_version") != INDEX_VERSION:
+        raise ValueError(f"'{index_path}' is not a csvdiff index, or it was written by an incompatible version.")
+    return CsvIndex(
+        path=index_path,
+        columns=json.loads(metadata["columns"]),
+        row_count=int(metadata["row_count"]),
+        block_rows=int(metadata["block_rows"]),
+        block_hashes=json.loads(metadata["block_hashes"]),
+        hash_function=metadata["hash_function"],
+    )
+
+
+def _common_blocks(hashes1: Sequence[int], hashes2: Sequence[int]) -> int:
+    count = 0
+    for hash1, hash2 in zip(hashes1, hashes2):
+        if hash1 != hash2:
+            break
+        count += 1
+    return count
+
+
+def _row_ranges(ranges: list[tuple[int, int]], gap: int) -> list[tuple[int, int]]:
+    """Merge sorted, possibly overlapping [start, stop) ranges that are less than `gap` rows apart."""
+    merged: list[tuple[int, int]] = []
+    for start, stop in sorted(r for r in ranges if r[0] < r[1]):
+        if merged and start - merged[-1][1] < gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+class _SparseLines:
+    """The lines of the rows a diff needs, addressed by row number like a list."""
+
+    def __init__(self, lines: dict[int, str]):
+        self._lines = lines
+
+    def __getitem__(self, rows: slice) -> list[str]:
+        return [self._lines[row] for row in range(rows.start, rows.stop)]
+
+
+def _fetch_lines(conn: duckdb.DuckDBPyConnection, source: str, row: str, ranges: list[tuple[int, int]]) -> _SparseLines:
+    lines = {}
+    for start, stop in _row_ranges(ranges, BLOCK_ROWS):
+        query = f"SELECT {row}, line FROM {source} WHERE {row} >= {start} AND {row} < {stop}"
+        lines.update(conn.execute(query).fetchall())
+    return _SparseLines(lines)
+
+
+def _fetch_hashes(
+    conn: duckdb.DuckDBPyConnection, source: str, row: str, start: int, row_hash: str = "hash"
+) -> list[int]:
+    rows = conn.execute(f"SELECT {row_hash} FROM {source} WHERE {row} >= {start} ORDER BY {row}").fetchall()
+    return [row_hash for (row_hash,) in rows]
+
+
+def _shift(opcodes: list[Opcode], offset: int) -> list[Opcode]:
+    """Move opcodes computed after `offset` skipped equal rows back to positions in the whole files."""
+    shifted = [(tag, i1 + offset, i2 + offset, j1 + offset, j2 + offset) for tag, i1, i2, j1, j2 in opcodes]
+    if offset:
+        if shifted and shifted[0][0] == "equal":
+            # Extend the leading equal range instead of adding a second one next to it
+            _, _, i2, _, j2 = shifted.pop(0)
+            shifted.insert(0, ("equal", 0, i2, 0, j2))
+        else:
+            shifted.insert(0, ("equal", 0, offset, 0, offset))
+    return shifted
+
+
+@contextmanager
+def open_index_diff(
+    index_path: Path,
+    file_path: Path,
+    fromfile: str,
+    tofile: str,
+    algorithm: DiffAlgorithm = DiffAlgorithm.HISTOGRAM,
+    n: int = 3,
+    settings: Optional[DuckDBSettings] = None,
+) -> Iterator[IndexedDiff]:
+    """
+    Compare a snapshot index with a CSV file and yield a unified diff.
+
+    The new file is parsed and hashed in DuckDB. Leading blocks whose hashes
+    match the index are skipped; for the rest only the row hashes are
+    diffed. An index written with another DuckDB version still works, but its
+    lines have to be hashed again. CSV lines are fetched only for the rows that appear in a hunk, so
+    the index's unchanged blocks are never decompressed.
+
+    Raises:
+        ValueError: If `index_path` is not a valid index, or the index or the file has no data
+    """
+    conn = connect_duckdb(settings)
+    try:
+        index = read_index(conn, index_path)
+        if index.row_count == 0:
+            raise ValueError(f"Index '{index_path}' contains no data.")
+        indexed = f"read_parquet({quote_literal(str(index_path))})"
+        columns2 = _load_rows(conn, file_path, "new_rows")
+        if conn.execute("SELECT 1 FROM new_rows LIMIT 1").fetchone() is None:
+            raise ValueError(f"Second CSV file '{file_path}' contains no data.")
+
+        if index.hash_function == HASH_FUNCTION:
+            skip = index.block_rows * _common_blocks(index.block_hashes, _block_hashes(conn, "new_rows", "rowid"))
+            # Only the hash column of the index is read here; the lines stay compressed
+            hashes1 = _fetch_hashes(conn, indexed, "row", skip)
+        else:
+            # Written with another DuckDB version: rehash the stored lines instead of trusting the stored hashes
+            skip = 0
+            hashes1 = _fetch_hashes(conn, indexed, "row", skip, row_hash="hash(line)")
+        hashes2 = _fetch_hashes(conn, "new_rows", "rowid", skip)
+        groups = list(group_opcodes(_shift(diff_opcodes(hashes1, hashes2, algorithm), skip), n))
+
+        lines1 = _fetch_lines(conn, indexed, "row", [(op[1], op[2]) for group in groups for op in group])
+        lines2 = _fetch_lines(
+            conn, "new_rows", "rowid", [(op[3], op[4]) for group in groups for op in group if op[0] != "equal"]
+        )
+        yield IndexedDiff(
+            columns1=index.columns,
+            columns2=columns2,
+            lines=format_unified(lines1, lines2, iter(groups), fromfile, tofile),
+        )
+    finally:
+        conn.close()
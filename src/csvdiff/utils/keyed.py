@@ -0,0 +1,464 @@
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import chain
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import duckdb
+
+from csvdiff.utils.cells import changed_columns_sql, format_cell_changes
+from csvdiff.utils.csv import (
+    DuckDBSettings,
+    RowSelection,
+    connect_duckdb,
+    fetch_rows,
+    format_csv_row,
+    quote_identifier,
+    read_csv_relation,
+    stream_csv_with_duckdb,
+)
+from csvdiff.utils.summary import DiffSummary
+
+Row = tuple[Optional[str], ...]
+KeyOrder = tuple[tuple[bool, str], ...]
+
+# Marker column used to tell "row missing on this side" apart from "row with NULL values"
+_PRESENT = "__csvdiff_present"
+# 1-based data row number of each row in its file
+_ROW = "__csvdiff_row"
+
+
+class KeyedChange(NamedTuple):
+    """A single row-level change between two CSV files matched by key."""
+
+    kind: str  # "added", "removed" or "changed"
+    key: Row
+    old: Optional[Row]
+    new: Optional[Row]
+    changed_columns: tuple[str, ...] = ()  # Common non-key columns whose values differ ("changed" only)
+    old_row: Optional[int] = None  # 1-based data row number in the first file, where numbered
+    new_row: Optional[int] = None  # 1-based data row number in the second file, where numbered
+
+
+@dataclass
+class KeyedDiff:
+    """Result of a key-based comparison. `changes` is only valid inside `open_keyed_diff`."""
+
+    key_columns: list[str]
+    columns1: list[str]
+    columns2: list[str]
+    changes: Iterator[KeyedChange]
+    # The same changes as a DuckDB relation (see `_changes_sql`); None for sorted input
+    relation: Optional[duckdb.DuckDBPyRelation] = None
+
+
+def parse_key_columns(value: str) -> list[str]:
+    """Parse a comma-separated `--key` value into a list of column names."""
+    columns = [column.strip() for column in value.split(",")]
+    if not all(columns):
+        raise ValueError(f"Invalid key '{value}'. Use comma-separated column names, e.g. 'id' or 'id,date'.")
+    if len(set(columns)) != len(columns):
+        raise ValueError(f"Invalid key '{value}'. Key columns must be unique.")
+    return columns
+
+
+def _check_key_columns(key_columns: Sequence[str], columns: Sequence[str], file_label: str) -> None:
+    missing = [column for column in key_columns if column not in columns]
+    if missing:
+        raise ValueError(f"{file_label} has no key column(s): {', '.join(missing)}")
+
+
+def _check_has_rows(conn: duckdb.DuckDBPyConnection, view: str, file_path: Path, file_label: str) -> None:
+    if conn.execute(f"SELECT 1 FROM {view} LIMIT 1").fetchone() is None:
+        raise ValueError(f"{file_label} '{file_path}' contains no data.")
+
+
+def _check_unique_keys(conn: duckdb.DuckDBPyConnection, view: str, key_columns: Sequence[str], file_label: str) -> None:
+    key_list = ", ".join(quote_identifier(column) for column in key_columns)
+    duplicate = conn.execute(
+        f"SELECT {key_list} FROM {view} GROUP BY ALL HAVING count(*) > 1 LIMIT 1",
+    ).fetchone()
+    if duplicate is not None:
+        raise ValueError(f"{file_label} has duplicate key {format_key(key_columns, duplicate)}.")
+
+
+def format_key(key_columns: Sequence[str], key: Sequence[Optional[str]]) -> str:
+    """Render key values as `col=value` pairs, e.g. `id=3, date=2024-01-01`."""
+    return ", ".join(f"{column}={'' if value is None else value}" for column, value in zip(key_columns, key))
+
+
+def _iter_changes(
+    rel: duckdb.DuckDBPyRelation, key_size: int, width1: int, width2: int, chunk_size: int = 10000
+) -> Iterator[KeyedChange]:
+    for record in fetch_rows(rel, chunk_size):
+        key = record[:key_size]
+        old = record[key_size : key_size + width1]
+        new = record[key_size + width1 : key_size + width1 + width2]
+        old_row, new_row, in_old, in_new, changed_columns = record[-5:]
+        if not in_new:
+            yield KeyedChange("removed", key, old, None, old_row=old_row)
+        elif not in_old:
+            yield KeyedChange("added", key, None, new, new_row=new_row)
+        else:
+            yield KeyedChange("changed", key, old, new, tuple(changed_columns), old_row, new_row)
+
+
+def _create_views(
+    conn: duckdb.DuckDBPyConnection,
+    file1: Path,
+    file2: Path,
+    key_columns: Sequence[str],
+    selection: Optional[RowSelection] = None,
+) -> tuple[list[str], list[str]]:
+    """Create the `old_rows` and `new_rows` views of both files, check them and return their columns."""
+    views = {}
+    sources = (("old_rows", file1, "First CSV file"), ("new_rows", file2, "Second CSV file"))
+    for view, file_path, file_label in sources:
+        read_csv_relation(conn, file_path, selection).create_view(view)
+        columns = conn.table(view).columns
+        _check_key_columns(key_columns, columns, file_label)
+        _check_has_rows(conn, view, file_path, file_label)
+        _check_unique_keys(conn, view, key_columns, file_label)
+        views[view] = columns
+    return views["old_rows"], views["new_rows"]
+
+
+def _select_list(alias: str, columns: Sequence[str]) -> str:
+    return ", ".join(f"{alias}.{quote_identifier(column)}" for column in columns)
+
+
+def _joined_rows(key_columns: Sequence[str], row_numbers: bool = False) -> str:
+    """
+    FROM clause joining both views on the key as `o` and `n`, with a marker column telling which side has the row.
+
+    With `row_numbers`, each side also numbers its rows in file order; this
+    needs DuckDB to preserve the insertion order.
+    """
+    present = quote_identifier(_PRESENT)
+    extra = f"TRUE AS {present}"
+    if row_numbers:
+        extra += f", row_number() OVER () AS {quote_identifier(_ROW)}"
+    join_condition = " AND ".join(
+        f"o.{key} IS NOT DISTINCT FROM n.{key}" for key in (quote_identifier(column) for column in key_columns)
+    )
+    return (
+        f"(SELECT *, {extra} FROM old_rows) o FULL OUTER JOIN (SELECT *, {extra} FROM new_rows) n ON {join_condition}"
+    )
+
+
+def _changes_sql(
+    key_columns: Sequence[str], columns1: Sequence[str], columns2: Sequence[str], row_numbers: bool = False
+) -> str:
+    """
+    Build the query listing the changed rows, ordered by key.
+
+    Columns are named by position, so they cannot clash with the names in the
+    files: `key_0`.., `old_0`.., `new_0`.., then `old_row` and `new_row` (NULL
+    unless `row_numbers`), `in_old` and `in_new` (whether each file has the
+    row) and `changed` (the differing common non-key columns).
+    """
+    compared = [column for column in columns1 if column in columns2 and column not in key_columns]
+    keys = [quote_identifier(column) for column in key_columns]
+    key_values = [f"COALESCE(o.{key}, n.{key})" for key in keys]
+    present = quote_identifier(_PRESENT)
+    row = quote_identifier(_ROW)
+    values = [f"{value} AS key_{i}" for i, value in enumerate(key_values)]
+    values += [f"o.{quote_identifier(column)} AS old_{i}" for i, column in enumerate(columns1)]
+    values += [f"n.{quote_identifier(column)} AS new_{i}" for i, column in enumerate(columns2)]
+    if row_numbers:
+        values += [f"o.{row} AS old_row", f"n.{row} AS new_row"]
+    else:
+        values += ["NULL::BIGINT AS old_row", "NULL::BIGINT AS new_row"]
+    values += [
+        f"o.{present} IS NOT NULL AS in_old",
+        f"n.{present} IS NOT NULL AS in_new",
+        f"{changed_columns_sql(compared, 'o', 'n')} AS changed",
+    ]
+    return f"""
+        SELECT {", ".join(values)}
+        FROM {_joined_rows(key_columns, row_numbers)}
+        WHERE o.{present} IS NULL
+            OR n.{present} IS NULL
+            OR [{_select_list("o", compared)}] IS DISTINCT FROM [{_select_list("n", compared)}]
+        ORDER BY {", ".join(key_values)}
+        """
+
+
+@contextmanager
+def open_keyed_diff(
+    file1: Path,
+    file2: Path,
+    key_columns: Sequence[str],
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+    row_numbers: bool = False,
+) -> Iterator[KeyedDiff]:
+    """
+    Compare two CSV files by primary key using a FULL OUTER JOIN in DuckDB.
+
+    The join, the comparison of non-key values and the ordering of the changes
+    all run inside DuckDB, so only the changed rows are ever fetched into Python.
+    Rows are compared on the columns both files have in common. The join and
+    the sort spill to disk when they outgrow the memory limit in `settings`.
+    With `row_numbers`, each change also carries the row numbers of the old
+    and new row, which costs some parallelism while the files are read.
+
+    Raises:
+        ValueError: If a file has no data, lacks a key column or has duplicate keys
+    """
+    conn = connect_duckdb(settings)
+    try:
+        if not row_numbers:
+            # The result is explicitly ordered by key, so DuckDB need not keep track of the input order
+            conn.execute("SET preserve_insertion_order = false")
+        columns1, columns2 = _create_views(conn, file1, file2, key_columns, selection)
+        rel = conn.sql(_changes_sql(key_columns, columns1, columns2, row_numbers))
+
+        yield KeyedDiff(
+            key_columns=list(key_columns),
+            columns1=columns1,
+            columns2=columns2,
+            changes=_iter_changes(rel, len(key_columns), len(columns1), len(columns2)),
+            relation=rel,
+        )
+    finally:
+        conn.close()
+
+
+def summarize_keyed_diff(
+    file1: Path,
+    file2: Path,
+    key_columns: Sequence[str],
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+) -> DiffSummary:
+    """
+    Count the rows added, removed and changed between two CSV files matched by key.
+
+    Runs the same FULL OUTER JOIN as `open_keyed_diff`, but as a single
+    aggregate query: no row is fetched into Python and nothing is sorted.
+    The changed rows are also counted per common non-key column.
+
+    Raises:
+        ValueError: If a file has no data, lacks a key column or has duplicate keys
+    """
+    conn = connect_duckdb(settings)
+    try:
+        columns1, columns2 = _create_views(conn, file1, file2, key_columns, selection)
+        compared = [column for column in columns1 if column in columns2 and column not in key_columns]
+
+        present = quote_identifier(_PRESENT)
+        both = f"o.{present} AND n.{present}"
+        row_changed = f"[{_select_list('o', compared)}] IS DISTINCT FROM [{_select_list('n', compared)}]"
+        column_counts = "".join(
+            f", count(*) FILTER ({both} AND o.{quote_identifier(column)} IS DISTINCT FROM n.{quote_identifier(column)})"
+            for column in compared
+        )
+        row = conn.execute(
+            f"""
+            SELECT
+                count(o.{present}),
+                count(n.{present}),
+                count(*) FILTER (o.{present} IS NULL),
+                count(*) FILTER (n.{present} IS NULL),
+                count(*) FILTER ({both} AND {row_changed})
+                {column_counts}
+            FROM {_joined_rows(key_columns)}
+            """
+        ).fetchone()
+    finally:
+        conn.close()
+
+    rows1, rows2, added, removed, changed = row[:5]
+    return DiffSummary(rows1, rows2, added, removed, changed, dict(zip(compared, row[5:])))
+
+
+def _key_order(key: Row) -> KeyOrder:
+    # Text order with NULLs last, the same as DuckDB's default ORDER BY
+    return tuple((value is None, value or "") for value in key)
+
+
+def _iter_sorted(
+    rows: Iterator[Row], key_index: Sequence[int], key_columns: Sequence[str], file_label: str
+) -> Iterator[tuple[KeyOrder, Row, Row, int]]:
+    """Yield (order, key, row, row number) for each row, checking that keys are strictly increasing."""
+    previous = None
+    for number, row in enumerate(rows, start=1):
+        key = tuple(row[i] for i in key_index)
+        order = _key_order(key)
+        if previous is not None and order <= previous:
+            problem = "duplicate key" if order == previous else "key out of order"
+            raise ValueError(
+                f"{file_label} is not sorted by key: {problem} {format_key(key_columns, key)} at row {number}."
+            )
+        previous = order
+        yield order, key, row, number
+
+
+def _merge_changes(
+    old_rows: Iterator[tuple[KeyOrder, Row, Row, int]],
+    new_rows: Iterator[tuple[KeyOrder, Row, Row, int]],
+    compared: Sequence[str],
+    compared_old: Sequence[int],
+    compared_new: Sequence[int],
+) -> Iterator[KeyedChange]:
+    """Walk two key-sorted row streams in lockstep, like the merge step of a merge sort."""
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield KeyedChange("removed", old[1], old[2], None, old_row=old[3])
+            old = next(old_rows, None)
+        elif old is None or new[0] < old[0]:
+            yield KeyedChange("added", new[1], None, new[2], new_row=new[3])
+            new = next(new_rows, None)
+        else:
+            changed = tuple(
+                column for column, i, j in zip(compared, compared_old, compared_new) if old[2][i] != new[2][j]
+            )
+            if changed:
+                yield KeyedChange("changed", old[1], old[2], new[2], changed, old[3], new[3])
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+
+
+def _require_rows(rows: Iterator[Row], file_path: Path, file_label: str) -> Iterator[Row]:
+    first = next(rows, None)
+    if first is None:
+        raise ValueError(f"{file_label} '{file_path}' contains no data.")
+    return chain([first], rows)
+
+
+@contextmanager
+def open_sorted_keyed_diff(
+    file1: Path,
+    file2: Path,
+    key_columns: Sequence[str],
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+) -> Iterator[KeyedDiff]:
+    """
+    Compare two CSV files that are already sorted by key in a single streaming pass.
+
+    Both files are read lazily and merged row by row, so memory use stays
+    bounded regardless of file size. Keys are compared as text with empty
+    values last, which is also how DuckDB sorts them in `open_keyed_diff`.
+
+    Raises:
+        ValueError: If a file has no data, lacks a key column, or is not strictly sorted by key
+    """
+
+    def open_stream(file_path: Path):
+        return stream_csv_with_duckdb(file_path, settings=settings, selection=selection)
+
+    with open_stream(file1) as stream1, open_stream(file2) as stream2:
+        _check_key_columns(key_columns, stream1.columns, "First CSV file")
+        _check_key_columns(key_columns, stream2.columns, "Second CSV file")
+        rows1 = _require_rows(stream1.rows, file1, "First CSV file")
+        rows2 = _require_rows(stream2.rows, file2, "Second CSV file")
+
+        compared = [c for c in stream1.columns if c in stream2.columns and c not in key_columns]
+        changes = _merge_changes(
+            _iter_sorted(rows1, [stream1.columns.index(c) for c in key_columns], key_columns, "First CSV file"),
+            _iter_sorted(rows2, [stream2.columns.index(c) for c in key_columns], key_columns, "Second CSV file"),
+            compared,
+            [stream1.columns.index(c) for c in compared],
+            [stream2.columns.index(c) for c in compared],
+        )
+        yield KeyedDiff(
+            key_columns=list(key_columns),
+            columns1=stream1.columns,
+            columns2=stream2.columns,
+            changes=changes,
+        )
+
+
+def has_keyed_changes(
+    file1: Path,
+    file2: Path,
+    key_columns: Sequence[str],
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+) -> bool:
+    """
+    Tell whether two CSV files matched by key have any added, removed or changed row.
+
+    Runs the join of `open_keyed_diff` without sorting the result, and DuckDB
+    stops at the first differing row.
+
+    Raises:
+        ValueError: If a file has no data, lacks a key column or has duplicate keys
+    """
+    conn = connect_duckdb(settings)
+    try:
+        columns1, columns2 = _create_views(conn, file1, file2, key_columns, selection)
+        compared = [column for column in columns1 if column in columns2 and column not in key_columns]
+        present = quote_identifier(_PRESENT)
+        row = conn.execute(
+            f"""
+            SELECT 1
+            FROM {_joined_rows(key_columns)}
+            WHERE o.{present} IS NULL
+                OR n.{present} IS NULL
+                OR [{_select_list("o", compared)}] IS DISTINCT FROM [{_select_list("n", compared)}]
+            LIMIT 1
+            """
+        ).fetchone()
+    finally:
+        conn.close()
+    return row is not None
+
+
+def summarize_sorted_keyed_diff(
+    file1: Path,
+    file2: Path,
+    key_columns: Sequence[str],
+    settings: Optional[DuckDBSettings] = None,
+    selection: Optional[RowSelection] = None,
+) -> DiffSummary:
+    """
+    Count the changes between two CSV files sorted by key, like `summarize_keyed_diff`.
+
+    The changes of `open_sorted_keyed_diff` are counted as they stream past,
+    so memory stays bounded. Row counts of the files are not reported.
+    """
+    added = removed = changed = 0
+    with open_sorted_keyed_diff(file1, file2, key_columns, settings, selection) as diff:
+        changed_columns = dict.fromkeys(
+            (column for column in diff.columns1 if column in diff.columns2 and column not in key_columns), 0
+        )
+        for change in diff.changes:
+            if change.kind == "added":
+                added += 1
+            elif change.kind == "removed":
+                removed += 1
+            else:
+                changed += 1
+                for column in change.changed_columns:
+                    changed_columns[column] += 1
+    return DiffSummary(None, None, added, removed, changed, changed_columns)
+
+
+def format_keyed_diff(diff: KeyedDiff, fromfile: str, tofile: str, cells: bool = False) -> Iterator[str]:
+    """
+    Render key-based changes as diff-style lines.
+
+    Each change gets a `@@ key @@` header followed by the removed (`-`) and/or
+    added (`+`) row. With `cells`, a changed row lists only its changed cells
+    as `~ column: old -> new` lines. Nothing is yielded when there are no changes.
+    """
+    header_written = False
+    for change in diff.changes:
+        if not header_written:
+            yield f"--- {fromfile}"
+            yield f"+++ {tofile}"
+            header_written = True
+        yield f"@@ {format_key(diff.key_columns, change.key)} @@"
+        if cells and change.kind == "changed":
+            yield from format_cell_changes(diff.columns1, diff.columns2, change.old, change.new, change.changed_columns)
+            continue
+        if change.old is not None:
+            yield "-" + format_csv_row(change.old)
+        if change.new is not None:
+            yield "+" + format_csv_row(change.new)
@@ -0,0 +1,258 @@
+import json
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import duckdb
+
+from csvdiff.utils.cells import RowChange, open_cell_diff
+from csvdiff.utils.compare import CLI_OPTION_NAMES, CompareOptions, check_options
+from csvdiff.utils.csv import DuckDBSettings, connect_duckdb, format_csv_row, quote_identifier, quote_literal
+from csvdiff.utils.files import OutputFormat, create_unique_output_file, write_lines
+from csvdiff.utils.index import is_index_file
+from csvdiff.utils.keyed import KeyedChange, open_keyed_diff, open_sorted_keyed_diff
+from csvdiff.utils.stats import phase, record_records
+
+Row = tuple[Optional[str], ...]
+
+
+class ChangeRecord(NamedTuple):
+    """One changed row, as written by `--format jsonl`, `csv` or `parquet`."""
+
+    op: str  # "added", "removed" or "changed"
+    old_row: Optional[int]  # 1-based data row number in the first file, if it has the row
+    new_row: Optional[int]  # 1-based data row number in the second file, if it has the row
+    key: Optional[Row]  # Key values (comparisons by key only)
+    old: Optional[Row]
+    new: Optional[Row]
+    changed_columns: tuple[str, ...]  # Common columns whose values differ ("changed" only)
+
+
+@dataclass
+class ChangeRecords:
+    """Result of `open_change_records`. `records` is only valid inside it."""
+
+    key_columns: Optional[list[str]]
+    columns1: list[str]
+    columns2: list[str]
+    records: Iterator[ChangeRecord]
+    # The same records as a DuckDB relation laid out like the Parquet output, if they come from DuckDB
+    relation: Optional[duckdb.DuckDBPyRelation] = None
+
+
+def check_record_options(options: CompareOptions, file1: Path, names: Mapping[str, str] = CLI_OPTION_NAMES) -> None:
+    """
+    Reject option combinations that cannot produce change records.
+
+    `names` tells how to call the options in the error messages, like for `check_options`.
+
+    Raises:
+        ValueError: If the options contradict each other, or ignore row order or use an index
+    """
+    check_options(options, file1, names)
+    if options.ignore_order or is_index_file(file1):
+        raise ValueError(f"{names['records']} cannot be used with {names['ignore_order']} or an index.")
+
+
+def _from_row_change(change: RowChange) -> ChangeRecord:
+    if change.old is None:
+        op = "added"
+    elif change.new is None:
+        op = "removed"
+    else:
+        op = "changed"
+    return ChangeRecord(op, change.old_row, change.new_row, None, change.old, change.new, change.changed_columns)
+
+
+def _from_keyed_change(change: KeyedChange) -> ChangeRecord:
+    return ChangeRecord(
+        change.kind, change.old_row, change.new_row, change.key, change.old, change.new, change.changed_columns
+    )
+
+
+def _struct_sql(columns: Sequence[str], prefix: str) -> str:
+    fields = ", ".join(f"{quote_identifier(column)} := {prefix}_{i}" for i, column in enumerate(columns))
+    return f"struct_pack({fields})"
+
+
+def _records_relation(
+    changes: duckdb.DuckDBPyRelation,
+    key_columns: Optional[Sequence[str]],
+    columns1: Sequence[str],
+    columns2: Sequence[str],
+) -> duckdb.DuckDBPyRelation:
+    """Lay out the changes of a keyed or cell-level comparison like the Parquet output, inside DuckDB."""
+    columns = [
+        "CASE WHEN NOT in_new THEN 'removed' WHEN NOT in_old THEN 'added' ELSE 'changed' END AS op",
+        "old_row",
+        "new_row",
+    ]
+    if key_columns is not None:
+        columns.append(f"{_struct_sql(key_columns, 'key')} AS key")
+    columns += [
+        f"CASE WHEN in_old THEN {_struct_sql(columns1, 'old')} END AS old",
+        f"CASE WHEN in_new THEN {_struct_sql(columns2, 'new')} END AS new",
+        "CASE WHEN in_old AND in_new THEN changed ELSE []::VARCHAR[] END AS changed",
+    ]
+    return changes.project(", ".join(columns))
+
+
+@contextmanager
+def open_change_records(
+    file1: Path, file2: Path, options: Optional[CompareOptions] = None, in_duckdb: bool = False
+) -> Iterator[ChangeRecords]:
+    """
+    Compare two CSV files and stream one typed record per changed row.
+
+    The records come straight from the comparison, without rendering a diff:
+    by key from the key-based comparison, otherwise from the cell-level
+    comparison by position, where replaced rows are paired one to one and
+    reported as changed. Values keep the distinction between an empty and a
+    missing cell. `--cells` makes no difference, the changed columns are
+    always listed. Row numbers count the data rows of each file.
+
+    The records are also available as a DuckDB relation, except for sorted
+    input, which is merged in Python; with `in_duckdb`, sorted input is
+    compared with the join instead, so the relation is always there.
+
+    Raises:
+        ValueError: If the options are invalid or a file has no data
+    """
+    options = options or CompareOptions()
+    check_record_options(options, file1)
+
+    with ExitStack() as stack:
+        if options.key_columns is not None:
+            key_columns = list(options.key_columns)
+            with phase("diff"):
+                if options.sorted_input and not in_duckdb:
+                    diff = stack.enter_context(
+                        open_sorted_keyed_diff(file1, file2, key_columns, options.settings, options.selection)
+                    )
+                else:
+                    diff = stack.enter_context(
+                        open_keyed_diff(
+                            file1, file2, key_columns, options.settings, options.selection, row_numbers=True
+                        )
+                    )
+            records = map(_from_keyed_change, diff.changes)
+        else:
+            key_columns = None
+            with phase("diff"):
+                diff = stack.enter_context(
+                    open_cell_diff(file1, file2, options.algorithm, options.settings, options.selection)
+                )
+            records = map(_from_row_change, diff.changes)
+
+        relation = None
+        if diff.relation is not None:
+            relation = _records_relation(diff.relation, key_columns, diff.columns1, diff.columns2)
+        yield ChangeRecords(key_columns, diff.columns1, diff.columns2, records, relation)
+
+
+def _values(columns: Sequence[str], row: Optional[Row]) -> Optional[dict[str, Optional[str]]]:
+    return None if row is None else dict(zip(columns, row))
+
+
+def record_dicts(changes: ChangeRecords) -> Iterator[dict[str, Any]]:
+    """Turn change records into plain dicts, with row values keyed by column name, as written to JSON Lines."""
+    for record in changes.records:
+        yield {
+            "op": record.op,
+            "old_row": record.old_row,
+            "new_row": record.new_row,
+            "key": _values(changes.key_columns or (), record.key),
+            "old": _values(changes.columns1, record.old),
+            "new": _values(changes.columns2, record.new),
+            "changed": list(record.changed_columns),
+        }
+
+
+def format_json_records(changes: ChangeRecords) -> Iterator[str]:
+    """Render change records as JSON Lines (see `record_dicts`)."""
+    for record in record_dicts(changes):
+        yield json.dumps(record, ensure_ascii=False)
+
+
+def format_csv_records(changes: ChangeRecords) -> Iterator[str]:
+    """
+    Render change records as CSV lines, after a header line.
+
+    Columns are `op`, `old_row`, `new_row`, `changed` (comma-separated names),
+    then `key.<column>` for comparisons by key, `old.<column>` for each column
+    of the first file and `new.<column>` for each column of the second.
+    """
+    key_columns = changes.key_columns or []
+    yield format_csv_row(
+        ["op", "old_row", "new_row", "changed"]
+        + [f"key.{column}" for column in key_columns]
+        + [f"old.{column}" for column in changes.columns1]
+        + [f"new.{column}" for column in changes.columns2]
+    )
+    empty_key: Row = (None,) * len(key_columns)
+    empty_old: Row = (None,) * len(changes.columns1)
+    empty_new: Row = (None,) * len(changes.columns2)
+    for record in changes.records:
+        yield format_csv_row(
+            [
+                record.op,
+                "" if record.old_row is None else str(record.old_row),
+                "" if record.new_row is None else str(record.new_row),
+                ",".join(record.changed_columns),
+                *(empty_key if record.key is None else record.key),
+                *(empty_old if record.old is None else record.old),
+                *(empty_new if record.new is None else record.new),
+            ]
+        )
+
+
+def _write_parquet(changes: ChangeRecords, output_path: str, settings: Optional[DuckDBSettings]) -> bool:
+    """
+    Write change records to a Parquet file with DuckDB.
+
+    The records are written from their DuckDB relation by DuckDB's own Parquet
+    writer, in one vectorized pass: no record goes through Python.
+    """
+    if changes.relation is None:
+        raise ValueError("Parquet output needs the records as a DuckDB relation: open them with in_duckdb=True.")
+    changes.relation.write_parquet(output_path)
+
+    conn = connect_duckdb(settings)
+    try:
+        # Read from the file's metadata only
+        (count,) = conn.execute(f"SELECT count(*) FROM read_parquet({quote_literal(output_path)})").fetchone()
+    finally:
+        conn.close()
+    record_records(count)
+    return count > 0
+
+
+def write_records(
+    changes: ChangeRecords,
+    output_path: Path,
+    output_format: OutputFormat,
+    settings: Optional[DuckDBSettings] = None,
+) -> tuple[str, bool]:
+    """
+    Write change records to a new unique output file in `output_format` (jsonl, csv or parquet).
+
+    Returns:
+        The actual output file name and whether any record was written
+    """
+    if output_format == OutputFormat.DIFF:
+        raise ValueError("Change records cannot be written as a diff.")
+
+    with phase("write"), create_unique_output_file(output_path) as f:
+        actual_output_path = f.name
+        if output_format == OutputFormat.JSONL:
+            return actual_output_path, write_lines(f, format_json_records(changes))
+        if output_format == OutputFormat.CSV:
+            lines = format_csv_records(changes)
+            write_lines(f, [next(lines)])  # Header
+            return actual_output_path, write_lines(f, lines)
+
+    # The empty unique file reserves the name; DuckDB replaces it with the Parquet file
+    with phase("write"):
+        return actual_output_path, _write_parquet(changes, actual_output_path, settings)
@@ -0,0 +1,158 @@
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Optional, TypeVar
+
+# Phases timed while collecting stats, in the order they happen
+PHASES = ("encoding", "transcode", "parse", "diff", "write")
+
+T = TypeVar("T")
+
+
+class StatsFormat(str, Enum):
+    """Output formats of `--stats`."""
+
+    TEXT = "text"
+    JSON = "json"
+
+
+@dataclass
+class RunStats:
+    """
+    Measurements of one comparison, filled in while `collect_stats` is active.
+
+    `phase`, `record_rows`, `record_encoding` and `record_records` add to the
+    active stats.
+
+    Phases are exclusive: time spent in a nested phase is not counted for the
+    enclosing one. Phase times are summed over threads: the two input files
+    are read concurrently, so `encoding`, `transcode` and `parse` can add up
+    to more than the wall time of the run.
+    """
+
+    phases: dict[str, float] = field(default_factory=dict)
+    rows: dict[str, int] = field(default_factory=dict)  # Data rows per input file, where they were counted
+    # Encoding and confidence per input file, where it was detected (not for indexes or cache hits)
+    encodings: dict[str, tuple[str, float]] = field(default_factory=dict)
+    diff_lines: int = 0
+    hunks: int = 0
+    records: int = 0  # Change records written with `--format`, instead of diff lines
+    seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Pass diff lines through, counting them and their hunks."""
+        for line in lines:
+            self.diff_lines += 1
+            if line.startswith("@@"):
+                self.hunks += 1
+            yield line
+
+    def count_records(self, records: Iterable[T]) -> Iterator[T]:
+        """Pass change records through, counting them."""
+        for record in records:
+            self.records += 1
+            yield record
+
+    def to_dict(self, files: Iterable[Path] = ()) -> dict[str, Any]:
+        """Return the stats as plain JSON-serializable values, with the size and throughput of `files`."""
+        file_stats = []
+        for file_path in files:
+            rows = self.rows.get(str(file_path))
+            file_entry = {
+                "path": str(file_path),
+                "bytes": file_path.stat().st_size,
+                "rows": rows,
+                "rows_per_sec": round(rows / self.seconds) if rows is not None and self.seconds > 0 else None,
+            }
+            if str(file_path) in self.encodings:
+                encoding, confidence = self.encodings[str(file_path)]
+                file_entry["encoding"] = encoding
+                file_entry["encoding_confidence"] = round(confidence, 4)
+            file_stats.append(file_entry)
+        return {
+            "seconds": round(self.seconds, 6),
+            "phases": {name: round(self.phases[name], 6) for name in PHASES if name in self.phases},
+            "files": file_stats,
+            "diff": {"lines": self.diff_lines, "hunks": self.hunks, "records": self.records},
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+
+_active: Optional[RunStats] = None
+# Per thread: the phases currently running, innermost last, as [name, start of its current slice]
+_running = threading.local()
+
+
+@contextmanager
+def collect_stats() -> Iterator[RunStats]:
+    """Collect stats for everything run inside the block, across all threads."""
+    global _active
+    previous, _active = _active, RunStats()
+    start = time.perf_counter()
+    try:
+        yield _active
+    finally:
+        _active.seconds = time.perf_counter() - start
+        _active = previous
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the comparison. Does nothing unless stats are being collected."""
+    stats = _active
+    if stats is None:
+        yield
+        return
+    stack = _running.__dict__.setdefault("stack", [])
+    start = time.perf_counter()
+    if stack:
+        # Pause the enclosing phase
+        outer = stack[-1]
+        stats.add_phase(outer[0], start - outer[1])
+    stack.append([name, start])
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        stats.add_phase(name, end - stack.pop()[1])
+        if stack:
+            stack[-1][1] = end
+
+
+def record_rows(file_path: Path, rows: int) -> None:
+    """Record the number of data rows read from an input file."""
+    if _active is not None:
+        _active.rows[str(file_path)] = rows
+
+
+def record_encoding(file_path: Path, encoding: str, confidence: float) -> None:
+    """Record the encoding detected for an input file while it was read."""
+    if _active is not None:
+        _active.encodings[str(file_path)] = (encoding, confidence)
+
+
+def record_records(records: int) -> None:
+    """Record the number of change records written without passing through Python."""
+    if _active is not None:
+        _active.records += records
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident memory of this process, or None where it is not available."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
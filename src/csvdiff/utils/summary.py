@@ -0,0 +1,57 @@
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple, Optional
+
+from csvdiff.utils.diff import Opcode
+
+
+class DiffSummary(NamedTuple):
+    """Counts of changed rows between two CSV files, as reported by `--stat`."""
+
+    rows1: Optional[int]  # Data rows in the first file, where they were counted
+    rows2: Optional[int]
+    added: int
+    removed: int
+    changed: int
+    changed_columns: dict[str, int]  # Changed rows per common column (comparisons by key only)
+
+    @property
+    def has_differences(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def count_opcodes(opcodes: Iterable[Opcode]) -> tuple[int, int, int]:
+    """
+    Count the removed, added and changed rows of a positional diff.
+
+    Within a replaced block, old and new rows are paired one to one and count
+    as changed, like in `open_cell_diff`; the unpaired rest is removed or added.
+    """
+    removed = added = changed = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        paired = min(i2 - i1, j2 - j1)
+        changed += paired
+        removed += i2 - i1 - paired
+        added += j2 - j1 - paired
+    return removed, added, changed
+
+
+def format_summary(summary: DiffSummary) -> Iterator[str]:
+    """
+    Render a summary like `git diff --stat`: one line per changed column, then the totals.
+
+    Columns are listed by number of changed rows, most changed first.
+    """
+    columns = sorted(
+        ((column, count) for column, count in summary.changed_columns.items() if count), key=lambda item: -item[1]
+    )
+    width = max((len(column) for column, _ in columns), default=0)
+    for column, count in columns:
+        yield f" {column.ljust(width)} | {count}"
+
+    rows = "row" if summary.changed == 1 else "rows"
+    totals = f" {summary.changed} {rows} changed, {summary.added} added, {summary.removed} removed"
+    if summary.rows1 is not None and summary.rows2 is not None:
+        totals += f" ({summary.rows1} -> {summary.rows2} rows)"
+    yield totals
@@ -0,0 +1,157 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from csvdiff.utils.csv import (
+    DuckDBSettings,
+    RowSelection,
+    connect_duckdb,
+    csv_line_expression,
+    fetch_rows,
+    read_csv_relation,
+)
+from csvdiff.utils.summary import DiffSummary
+
+
+@dataclass
+class UnorderedDiff:
+    """Result of an order-insensitive comparison. `changes` is only valid inside `open_unordered_diff`."""
+
+    columns1: list[str]
+    columns2: list[str]
+    removed: int
+    added: int
+    changes: Iterator[tuple[str, str]]  # ("-", line) or ("+", line), sorted by line
+
+
+def _create_lines_view(
+    conn: duckdb.DuckDBPyConnection,
+    file_path: Path,
+    view: str,
+    file_label: str,
+    selection: Optional[RowSelection] = None,
+) -> list[str]:
+    rel = read_csv_relation(conn, file_path, selection)
+    if rel.limit(1).fetchone() is None:
+        raise ValueError(f"{file_label} '{file_path}' contains no data.")
+    rel.project(f"{csv_line_expression(rel.columns)} AS line").create_view(view)
+    return rel.columns
+
+
+@contextmanager
+def open_unordered_diff(
+    file1: Path, file2: Path, settings: Optional[DuckDBSettings] = None, selection: Optional[RowSelection] = None
+) -> Iterator[UnorderedDiff]:
+    """
+    Compare two CSV files as multisets of rows, ignoring row order.
+
+    Rows only in the first file (`EXCEPT ALL` keeps duplicate counts, so a row
+    that appears twice there and once in the second file is reported once)
+    are removed, rows only in the second file are added. Both set differences
+    and the sort of the differing rows run in DuckDB, in linear time apart from
+    that sort, and spill to disk when they outgrow the memory limit.
+
+    Raises:
+        ValueError: If a file has no data
+    """
+    conn = connect_duckdb(settings)
+    try:
+        columns1 = _create_lines_view(conn, file1, "old_lines", "First CSV file", selection)
+        columns2 = _create_lines_view(conn, file2, "new_lines", "Second CSV file", selection)
+        conn.execute(
+            """
+            CREATE TEMP TABLE changes AS
+            SELECT '-' AS sign, line FROM (SELECT line FROM old_lines EXCEPT ALL SELECT line FROM new_lines)
+            UNION ALL
+            SELECT '+' AS sign, line FROM (SELECT line FROM new_lines EXCEPT ALL SELECT line FROM old_lines)
+            """
+        )
+        counts = dict(conn.execute("SELECT sign, count(*) FROM changes GROUP BY sign").fetchall())
+        # Similar rows end up next to each other, with the removed one first
+        cursor = conn.execute("SELECT sign, line FROM changes ORDER BY line, sign DESC")
+        yield UnorderedDiff(
+            columns1=columns1,
+            columns2=columns2,
+            removed=counts.get("-", 0),
+            added=counts.get("+", 0),
+            changes=fetch_rows(cursor),
+        )
+    finally:
+        conn.close()
+
+
+def summarize_unordered_diff(
+    file1: Path, file2: Path, settings: Optional[DuckDBSettings] = None, selection: Optional[RowSelection] = None
+) -> DiffSummary:
+    """
+    Count the rows removed and added when comparing two CSV files as multisets of rows.
+
+    Counts the same `EXCEPT ALL` differences as `open_unordered_diff`, without
+    storing or sorting them. Rows are never reported as changed.
+
+    Raises:
+        ValueError: If a file has no data
+    """
+    conn = connect_duckdb(settings)
+    try:
+        _create_lines_view(conn, file1, "old_lines", "First CSV file", selection)
+        _create_lines_view(conn, file2, "new_lines", "Second CSV file", selection)
+        rows1, rows2, removed, added = conn.execute(
+            """
+            SELECT
+                (SELECT count(*) FROM old_lines),
+                (SELECT count(*) FROM new_lines),
+                (SELECT count(*) FROM (SELECT line FROM old_lines EXCEPT ALL SELECT line FROM new_lines)),
+                (SELECT count(*) FROM (SELECT line FROM new_lines EXCEPT ALL SELECT line FROM old_lines))
+            """
+        ).fetchone()
+    finally:
+        conn.close()
+    return DiffSummary(rows1, rows2, added, removed, 0, {})
+
+
+def has_unordered_changes(
+    file1: Path, file2: Path, settings: Optional[DuckDBSettings] = None, selection: Optional[RowSelection] = None
+) -> bool:
+    """
+    Tell whether two CSV files hold different multisets of rows.
+
+    Files with different row counts differ. Otherwise one `EXCEPT ALL` is
+    enough, and DuckDB stops at its first row.
+
+    Raises:
+        ValueError: If a file has no data
+    """
+    conn = connect_duckdb(settings)
+    try:
+        _create_lines_view(conn, file1, "old_lines", "First CSV file", selection)
+        _create_lines_view(conn, file2, "new_lines", "Second CSV file", selection)
+        rows1, rows2 = conn.execute(
+            "SELECT (SELECT count(*) FROM old_lines), (SELECT count(*) FROM new_lines)"
+        ).fetchone()
+        if rows1 != rows2:
+            return True
+        row = conn.execute("SELECT 1 FROM (SELECT line FROM old_lines EXCEPT ALL SELECT line FROM new_lines) LIMIT 1")
+        return row.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def format_unordered_diff(diff: UnorderedDiff, fromfile: str, tofile: str) -> Iterator[str]:
+    """
+    Render an order-insensitive comparison as diff-style lines.
+
+    A single `@@ N removed, M added @@` header is followed by the differing
+    rows, sorted. Nothing is yielded when the files hold the same rows.
+    """
+    if not diff.removed and not diff.added:
+        return
+    yield f"--- {fromfile}"
+    yield f"+++ {tofile}"
+    yield f"@@ {diff.removed} removed, {diff.added} added @@"
+    for sign, line in diff.changes:
+        yield sign + line
@@ -2,45 +2,31 @@ from pathlib import Path
 
 import typer
 
+from csvdiff.utils.files import OUTPUT_EXTENSIONS, OutputFormat, compression_suffix
+
 
 def validate_csv_file(file_path: Path, file_label: str) -> None:
     """
-    Validate that the file has a .csv extension.
+    Validate that the file has a .csv extension, optionally followed by .gz or .zst.
 
     Note: File existence, type (file vs directory), and readability are already
     validated by Typer with exists=True, file_okay=True, dir_okay=False, readable=True.
     """
     # Check file extension (only custom validation needed)
-    if file_path.suffix.lower() != ".csv":
+    suffix = file_path.suffix.lower()
+    if compression_suffix(file_path):
+        suffix = Path(file_path.stem).suffix.lower()
+    if suffix != ".csv":
         typer.secho(f"Error: {file_label} '{file_path}' is not a CSV file.", fg=typer.colors.RED, err=True)
         raise typer.Exit(1)
 
 
-def validate_output_path(output_path: Path) -> Path:
+def _validate_location(output_path: Path) -> None:
     """
-    Validate output path for security and business rules (pure validation, no side effects).
-
-    Security Rules:
-    - Must be relative path (no absolute paths)
-    - Must not traverse parent directories (no ../)
-    - Must resolve to location within or below CWD (defense against symlink attacks)
-
-    Business Rules:
-    - Must have text file extension (.diff, .txt, .log) or no extension
-    - Can include subdirectories (e.g., "outputs/result.diff")
-
-    Args:
-        output_path: User-provided output Path object (with extension)
-
-    Returns:
-        Validated Path object relative to CWD
+    Apply the security rules shared by output files and directories.
 
     Raises:
-        typer.Exit: If path is invalid, violates security rules, or has wrong extension
-
-    Note:
-        This function is pure (no side effects). Directory creation and writability
-        checks are handled by create_unique_output_file().
+        typer.Exit: If the path is absolute, traverses parent directories or resolves outside CWD
     """
     # Security Check 1: Reject absolute paths
     if output_path.is_absolute():
@@ -51,17 +37,6 @@ def validate_output_path(output_path: Path) -> Path:
         )
         raise typer.Exit(1)
 
-    # Business Rule: Validate extension (must be text file format)
-    suffix = output_path.suffix.lower()
-    allowed_extensions = {".diff", ".txt", ".log", ""}  # "" means no extension
-    if suffix not in allowed_extensions:
-        typer.secho(
-            "Error: Output must be a text file (.diff, .txt, or .log).",
-            fg=typer.colors.RED,
-            err=True,
-        )
-        raise typer.Exit(1)
-
     # Security Check 2: Check for parent directory traversal
     # This catches "../", "../../", etc.
     if ".." in output_path.parts:
@@ -101,4 +76,91 @@ def validate_output_path(output_path: Path) -> Path:
         )
         raise typer.Exit(1)
 
+
+def validate_output_path(output_path: Path, output_format: OutputFormat = OutputFormat.DIFF) -> Path:
+    """
+    Validate output path for security and business rules (pure validation, no side effects).
+
+    Security Rules:
+    - Must be relative path (no absolute paths)
+    - Must not traverse parent directories (no ../)
+    - Must resolve to location within or below CWD (defense against symlink attacks)
+
+    Business Rules:
+    - Must have text file extension (.diff, .txt, .log) or no extension,
+      optionally followed by a compression extension (.gz, .zst)
+    - With another `output_format`, must have its extension (.jsonl or .ndjson,
+      .csv, .parquet); Parquet files are compressed internally and take no
+      compression extension
+    - Can include subdirectories (e.g., "outputs/result.diff")
+
+    Args:
+        output_path: User-provided output Path object (with extension)
+        output_format: Format the output will be written in
+
+    Returns:
+        Validated Path object relative to CWD
+
+    Raises:
+        typer.Exit: If path is invalid, violates security rules, or has wrong extension
+
+    Note:
+        This function is pure (no side effects). Directory creation and writability
+        checks are handled by create_unique_output_file().
+    """
+    _validate_location(output_path)
+
+    # Business Rule: Validate extension (must match the output format)
+    suffix = output_path.suffix.lower()
+    compressed = bool(compression_suffix(output_path))
+    if compressed:
+        suffix = Path(output_path.stem).suffix.lower()
+    allowed_extensions = OUTPUT_EXTENSIONS[output_format]
+    if output_format == OutputFormat.DIFF and suffix not in allowed_extensions:
+        typer.secho(
+            "Error: Output must be a text file (.diff, .txt, or .log), optionally compressed (.gz or .zst).",
+            fg=typer.colors.RED,
+            err=True,
+        )
+        raise typer.Exit(1)
+    if output_format == OutputFormat.PARQUET and (suffix not in allowed_extensions or compressed):
+        typer.secho("Error: Parquet output must be a .parquet file.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    if suffix not in allowed_extensions:
+        typer.secho(
+            f"Error: {output_format.value.upper()} output must be a {' or '.join(allowed_extensions)} file, "
+            "optionally compressed (.gz or .zst).",
+            fg=typer.colors.RED,
+            err=True,
+        )
+        raise typer.Exit(1)
+
+    return output_path
+
+
+def validate_output_dir(output_dir: Path) -> Path:
+    """
+    Validate an output directory with the security rules of `validate_output_path`.
+
+    Any name is accepted, including one with dots (e.g. "out.v2"): the
+    extension rules only apply to the files written inside it.
+
+    Raises:
+        typer.Exit: If the path is absolute, traverses parent directories or resolves outside CWD
+    """
+    _validate_location(output_dir)
+    return output_dir
+
+
+def validate_output_location(output_path: Path) -> Path:
+    """
+    Validate an output file with the security rules of `validate_output_path` only.
+
+    For outputs whose extension is checked by the caller or not restricted at
+    all, such as the index written by `csvdiff index --output` or a `--profile`.
+
+    Raises:
+        typer.Exit: If the path is absolute, traverses parent directories or resolves outside CWD
+    """
+    _validate_location(output_path)
     return output_path
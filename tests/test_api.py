@@ -0,0 +1,108 @@
+import pytest
+
+import csvdiff
+
+
+def test_diff_yields_unified_diff_lines(tmp_path):
+    (tmp_path / "file1.csv").write_text("id,name\n1,a\n2,b\n")
+    (tmp_path / "file2.csv").write_text("id,name\n1,a\n2,c\n")
+
+    lines = list(csvdiff.diff(tmp_path / "file1.csv", str(tmp_path / "file2.csv")))
+
+    assert lines[0].startswith("--- ")
+    assert lines[-2:] == ["-2,b", "+2,c"]
+
+
+def test_diff_by_key(tmp_path):
+    (tmp_path / "file1.csv").write_text("id,name\n1,a\n2,b\n")
+    (tmp_path / "file2.csv").write_text("id,name\n2,c\n1,a\n")
+
+    lines = list(csvdiff.diff(tmp_path / "file1.csv", tmp_path / "file2.csv", key=["id"], cells=True))
+
+    assert lines[2:] == ["@@ id=2 @@", "~ name: b -> c"]
+
+
+def test_diff_selection(tmp_path):
+    file1, file2 = tmp_path / "file1.csv", tmp_path / "file2.csv"
+    file1.write_text("id,name,updated_at\n1,a,x\n2,b,x\n")
+    file2.write_text("id,name,updated_at\n1,a,y\n2,c,y\n")
+
+    assert list(csvdiff.diff(file1, file2, exclude_columns="updated_at", where="id <> 2")) == []
+    lines = list(csvdiff.diff(file1, file2, key="id", columns=["id", "name"]))
+    assert lines[2:] == ["@@ id=2 @@", "-2,b", "+2,c"]
+
+
+def test_diff_identical_files(tmp_path):
+    (tmp_path / "file1.csv").write_text("id,name\n1,a\n")
+    (tmp_path / "file2.csv").write_text("id,name\n1,a\n")
+
+    assert list(csvdiff.diff(tmp_path / "file1.csv", tmp_path / "file2.csv")) == []
+
+
+def test_diff_is_lazy(tmp_path):
+    (tmp_path / "file1.csv").write_text("id,name\n")
+    (tmp_path / "file2.csv").write_text("id,name\n1,a\n")
+
+    lines = csvdiff.diff(tmp_path / "file1.csv", tmp_path / "file2.csv")
+
+    with pytest.raises(ValueError, match="contains no data"):
+        next(lines)
+
+
+def test_diff_rejects_invalid_options(tmp_path):
+    # Errors name the keyword arguments, not the CLI options
+    with pytest.raises(ValueError, match="^sorted_input requires key.$"):
+        csvdiff.diff(tmp_path / "file1.csv", tmp_path / "file2.csv", sorted_input=True)
+
+
+@pytest.mark.parametrize("key", [["id", ""], ["id", " "], ["id", "id"]])
+def test_diff_validates_key_sequences(tmp_path, key):
+    with pytest.raises(ValueError, match="Invalid key"):
+        csvdiff.diff(tmp_path / "file1.csv", tmp_path / "file2.csv", key=key)
+
+
+def test_changes_by_key(tmp_path):
+    (tmp_path / "file1.csv").write_text("id,name\n1,a\n2,b\n")
+    (tmp_path / "file2.csv").write_text("id,name\n2,c\n3,d\n")
+
+    records = list(csvdiff.changes(tmp_path / "file1.csv", tmp_path / "file2.csv", key=["id"]))
+
+    assert records == [
+        {
+            "op": "removed",
+            "old_row": 1,
+            "new_row": None,
+            "key": {"id": "1"},
+            "old": {"id": "1", "name": "a"},
+            "new": None,
+            "changed": [],
+        },
+        {
+            "op": "changed",
+            "old_row": 2,
+            "new_row": 1,
+            "key": {"id": "2"},
+            "old": {"id": "2", "name": "b"},
+            "new": {"id": "2", "name": "c"},
+            "changed": ["name"],
+        },
+        {
+            "op": "added",
+            "old_row": None,
+            "new_row": 2,
+            "key": {"id": "3"},
+            "old": None,
+            "new": {"id": "3", "name": "d"},
+            "changed": [],
+        },
+    ]
+
+
+def test_changes_by_position_is_lazy(tmp_path):
+    (tmp_path / "file1.csv").write_text("id,name\n1,a\n")
+    (tmp_path / "file2.csv").write_text("id,name\n1,b\n")
+
+    records = csvdiff.changes(tmp_path / "file1.csv", tmp_path / "file2.csv")
+    (tmp_path / "file2.csv").write_text("id,name\n1,a\n2,b\n")
+
+    assert [(record["op"], record["new_row"]) for record in records] == [("added", 2)]
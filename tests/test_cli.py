@@ -1,4 +1,9 @@
+import gzip
+import json
 import os
+import pstats
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
@@ -24,6 +29,14 @@ def in_tmp_path(tmp_path):
     os.chdir(original_cwd)
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path_factory, monkeypatch):
+    """Keep the parsed-file cache of every test out of the user's cache directory."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("CSVDIFF_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
 def test_compare_success(in_tmp_path):
     # Create two temporary CSV files
     create_temp_csv("a,b\n1,2\n3,4", in_tmp_path, "file1.csv")
@@ -331,3 +344,640 @@ def test_compare_output_case_insensitive_extension(in_tmp_path):
     assert result.exit_code == 0
     output_file = in_tmp_path / "output.DIFF"
     assert output_file.exists()
+
+
+def test_compare_by_key(in_tmp_path):
+    """Test key-based comparison ignores row order and reports changed rows."""
+    create_temp_csv("id,name\n1,a\n2,b\n3,c", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n3,c\n2,x\n4,d", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--key", "id", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    assert "Success" in result.output
+    diff_content = (in_tmp_path / "output.diff").read_text()
+    assert "@@ id=1 @@\n-1,a\n" in diff_content
+    assert "@@ id=2 @@\n-2,b\n+2,x\n" in diff_content
+    assert "@@ id=4 @@\n+4,d\n" in diff_content
+    assert "3,c" not in diff_content
+
+
+def test_compare_by_key_identical(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n2,b\n1,a", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--key", "id", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    assert "No differences found" in result.output
+    assert (in_tmp_path / "output.diff").read_text() == ""
+
+
+def test_compare_by_key_unknown_column(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--key", "code", "-o", "output.diff"])
+
+    assert result.exit_code != 0
+    assert "no key column" in result.output
+
+
+@pytest.mark.parametrize("algorithm", ["myers", "histogram", "patience", "difflib"])
+def test_compare_algorithm(in_tmp_path, algorithm):
+    create_temp_csv("a,b\n1,2\n3,4\n5,6", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,2\n3,5\n5,6", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--algorithm", algorithm, "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    diff_content = (in_tmp_path / "output.diff").read_text()
+    assert "@@ -1,3 +1,3 @@\n 1,2\n-3,4\n+3,5\n 5,6\n" in diff_content
+
+
+def test_compare_invalid_algorithm(in_tmp_path):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,3", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--algorithm", "fast"])
+
+    assert result.exit_code != 0
+
+
+@pytest.mark.parametrize("extra", [[], ["--stat"], ["--quiet"]])
+def test_compare_identical_header_only_files(in_tmp_path, extra):
+    create_temp_csv("a,b\n", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", *extra])
+
+    assert result.exit_code != 0
+    assert "First CSV file 'file1.csv' contains no data." in result.output
+
+
+def test_compare_identical_files_skips_parsing(in_tmp_path, monkeypatch):
+    """Byte-identical files are reported as identical without reading them as CSV."""
+    content = "a,b\n1,2\n3,4"
+    create_temp_csv(content, in_tmp_path, "file1.csv")
+    create_temp_csv(content, in_tmp_path, "file2.csv")
+
+    def fail_read(*args, **kwargs):
+        raise AssertionError("CSV files should not be parsed")
+
+    monkeypatch.setattr("csvdiff.utils.compare.read_csv_pair", fail_read)
+    monkeypatch.setattr("csvdiff.utils.compare.open_keyed_diff", fail_read)
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    assert "No differences found" in result.output
+    assert (in_tmp_path / "output.diff").read_text() == ""
+
+
+def test_compare_by_key_sorted(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b\n3,c", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n2,x\n3,c\n4,d", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--key", "id", "--sorted", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    diff_content = (in_tmp_path / "output.diff").read_text()
+    assert "@@ id=1 @@\n-1,a\n@@ id=2 @@\n-2,b\n+2,x\n@@ id=4 @@\n+4,d\n" in diff_content
+
+
+def test_compare_sorted_requires_key(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--sorted"])
+
+    assert result.exit_code != 0
+    assert "--sorted requires --key" in result.output
+
+
+def test_compare_stats_reports_encodings(in_tmp_path):
+    (in_tmp_path / "file1.csv").write_bytes("a,b\ncafé,1".encode("cp1252"))
+    create_temp_csv("a,b\ncafé,2", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--stats", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    assert "First file encoding: cp1252 (confidence 1.00)" in result.stderr
+    assert "Second file encoding: utf-8 (confidence 1.00)" in result.stderr
+
+
+def test_compare_stats_reuse_detected_encoding(in_tmp_path, monkeypatch):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+    from csvdiff.utils.csv import guess_encoding
+
+    guessed = []
+
+    def counting_guess_encoding(file_path):
+        guessed.append(file_path)
+        return guess_encoding(file_path)
+
+    monkeypatch.setattr("csvdiff.utils.csv.guess_encoding", counting_guess_encoding)
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--stats", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    assert "Second file encoding: utf-8" in result.stderr
+    assert sorted(guessed) == [Path("file1.csv"), Path("file2.csv")]
+
+
+def test_compare_stats_json(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,c", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--stats-format", "json"])
+
+    # The result message stays on stdout and the stats are a single JSON document on stderr
+    assert result.exit_code == 0
+    assert result.stdout.startswith("Success.")
+    report = json.loads(result.stderr)
+    assert {"encoding", "transcode", "parse", "diff", "write"} >= set(report["phases"])
+    assert "parse" in report["phases"]
+    assert [file["rows"] for file in report["files"]] == [2, 2]
+    assert report["files"][0]["encoding"] == "utf-8"
+    assert report["diff"]["hunks"] == 1
+
+
+def test_compare_profile(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--profile", "run.prof", "-o", "output.diff"])
+
+    assert result.exit_code == 0
+    assert pstats.Stats(str(in_tmp_path / "run.prof")).total_calls > 0
+
+
+@pytest.mark.parametrize("profile", ["../run.prof", "{cwd}/run.prof"])
+def test_compare_profile_rejects_path_outside_cwd(in_tmp_path, profile):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+    profile = profile.format(cwd=in_tmp_path)
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--profile", profile, "-o", "output.diff"])
+
+    # Rejected before the comparison runs
+    assert result.exit_code == 1
+    assert f"Output path '{profile}'" in result.output
+    assert not (in_tmp_path / "output.diff").exists()
+
+
+def test_compare_profile_in_new_directory(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--profile", "profiles/run.prof", "-o", "output.diff"])
+
+    assert result.exit_code == 0, result.output
+    assert (in_tmp_path / "profiles" / "run.prof").exists()
+
+
+def test_compare_format_jsonl(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,c\n3,d", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--format", "jsonl", "--key", "id"])
+
+    assert result.exit_code == 0
+    assert "result.jsonl" in result.output
+    records = [json.loads(line) for line in (in_tmp_path / "result.jsonl").read_text().splitlines()]
+    assert [(record["op"], record["key"]) for record in records] == [("changed", {"id": "2"}), ("added", {"id": "3"})]
+    assert records[0]["new"] == {"id": "2", "name": "c"}
+
+
+def test_compare_format_csv_compressed(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,c", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--format", "csv", "-o", "changes.csv.gz"])
+
+    assert result.exit_code == 0
+    assert gzip.decompress((in_tmp_path / "changes.csv.gz").read_bytes()).decode().splitlines() == [
+        "op,old_row,new_row,changed,old.id,old.name,new.id,new.name",
+        "changed,2,2,name,2,b,2,c",
+    ]
+
+
+def test_compare_format_identical_files(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--format", "parquet"])
+
+    assert result.exit_code == 0
+    assert "No differences found" in result.output
+    assert (in_tmp_path / "result.parquet").read_bytes().startswith(b"PAR1")
+
+
+def test_compare_format_rejects_wrong_extension(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--format", "jsonl", "-o", "changes.diff"])
+
+    assert result.exit_code == 1
+    assert "JSONL output must be a .jsonl or .ndjson file" in result.output
+
+
+def test_compare_format_rejects_ignore_order(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--format", "csv", "--ignore-order"])
+
+    assert result.exit_code == 1
+    assert "cannot be used with --ignore-order" in result.output
+
+
+def test_compare_stat(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b\n3,c", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,x\n4,d\n5,e", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--stat"])
+
+    assert result.exit_code == 0
+    assert " 2 rows changed, 1 added, 0 removed (3 -> 4 rows)" in result.output
+    assert list(in_tmp_path.glob("result*")) == []
+
+
+def test_compare_stat_by_key(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b\n3,c", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,x\n4,d\n5,e", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--stat", "--key", "id"])
+
+    assert result.exit_code == 0
+    assert result.output.splitlines()[:2] == [" name | 1", " 1 row changed, 2 added, 1 removed (3 -> 4 rows)"]
+
+
+def test_compare_stat_rejects_output(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--stat", "-o", "result.diff"])
+
+    assert result.exit_code == 1
+    assert "--stat cannot be used with --output or --format" in result.output
+
+
+@pytest.mark.parametrize("mode", [[], ["--key", "id"], ["--key", "id", "--sorted"], ["--ignore-order"], ["--cells"]])
+def test_compare_quiet(in_tmp_path, mode):
+    create_temp_csv("id,name\n1,a\n2,b\n3,c", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,x\n3,c", in_tmp_path, "file2.csv")
+    create_temp_csv("id,name\r\n1,a\r\n2,b\r\n3,c\r\n", in_tmp_path, "file3.csv")
+
+    differ = runner.invoke(app, ["file1.csv", "file2.csv", "--quiet", *mode])
+    same = runner.invoke(app, ["file1.csv", "file3.csv", "--quiet", *mode])
+
+    assert (differ.exit_code, differ.output) == (1, "")
+    assert (same.exit_code, same.output) == (0, "")
+    assert list(in_tmp_path.glob("result*")) == []
+
+
+def test_compare_quiet_treats_missing_and_empty_values_alike(in_tmp_path):
+    create_temp_csv('id,name\n1,""\n2,b', in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,\n2,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--quiet"])
+
+    assert result.exit_code == 0
+
+
+def test_compare_quiet_errors_exit_with_2(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--quiet"])
+    rejected = runner.invoke(app, ["file1.csv", "file2.csv", "--quiet", "-o", "result.diff"])
+
+    assert result.exit_code == 2
+    assert "contains no data" in result.output
+    assert rejected.exit_code == 2
+    assert "--quiet cannot be used with --output" in rejected.output
+
+
+def test_compare_exit_code(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    differ = runner.invoke(app, ["file1.csv", "file2.csv", "--exit-code"])
+    same = runner.invoke(app, ["file1.csv", "file1.csv", "--exit-code", "-o", "same.diff"])
+
+    assert differ.exit_code == 1
+    assert "Success. The result saved to `result.diff`" in differ.output
+    assert same.exit_code == 0
+    assert (in_tmp_path / "same.diff").exists()
+
+
+def test_compare_with_resource_limits(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,a\n2,c", in_tmp_path, "file2.csv")
+    spill_dir = in_tmp_path / "spill"
+    spill_dir.mkdir()
+    options = ["--memory-limit", "256MB", "--threads", "1", "--temp-dir", str(spill_dir)]
+
+    for extra in ([], ["--key", "id"], ["--key", "id", "--sorted"]):
+        result = runner.invoke(app, ["file1.csv", "file2.csv", *options, *extra])
+
+        assert result.exit_code == 0, result.output
+        assert "Success" in result.output
+
+
+def test_compare_invalid_memory_limit(in_tmp_path):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,3", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--memory-limit", "lots"])
+
+    assert result.exit_code == 1
+    assert "Error:" in result.output
+
+
+def test_compare_uses_cache(in_tmp_path, isolated_cache, monkeypatch):
+    create_temp_csv("a,b\n1,2\n3,4", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,2\n3,5", in_tmp_path, "file2.csv")
+
+    first = runner.invoke(app, ["file1.csv", "file2.csv", "-o", "first.diff"])
+    assert first.exit_code == 0
+    assert len(list(isolated_cache.glob("*.parquet"))) == 2
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("cached files should not be parsed again")
+
+    monkeypatch.setattr("csvdiff.utils.csv.read_csv_relation", fail_parse)
+    second = runner.invoke(app, ["file1.csv", "file2.csv", "-o", "second.diff"])
+
+    assert second.exit_code == 0
+    assert (in_tmp_path / "second.diff").read_text() == (in_tmp_path / "first.diff").read_text()
+
+
+def test_compare_unusable_cache_dir(in_tmp_path, monkeypatch):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+    create_temp_csv("", in_tmp_path, "not_a_dir")
+    monkeypatch.setenv("CSVDIFF_CACHE_DIR", str(in_tmp_path / "not_a_dir" / "cache"))
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv"])
+
+    assert result.exit_code == 0
+    assert Path("result.diff").read_text().endswith("-1,a\n+1,b\n")
+
+
+def test_compare_no_cache(in_tmp_path, isolated_cache):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,3", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--no-cache"])
+
+    assert result.exit_code == 0
+    assert list(isolated_cache.iterdir()) == []
+
+
+def test_show_completion_is_not_taken_for_compare():
+    result = runner.invoke(app, ["--show-completion", "bash"])
+
+    assert result.exit_code == 0
+    assert "complete -o default" in result.output
+
+
+def test_index_and_compare_with_index(in_tmp_path):
+    create_temp_csv("a,b\n1,2\n3,4", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,2\n3,5", in_tmp_path, "file2.csv")
+
+    indexed = runner.invoke(app, ["index", "file1.csv"])
+    assert indexed.exit_code == 0, indexed.output
+    assert "Indexed 2 rows" in indexed.output
+    assert (in_tmp_path / "file1.csv.csvidx").exists()
+
+    result = runner.invoke(app, ["file1.csv.csvidx", "file2.csv", "-o", "output.diff"])
+
+    assert result.exit_code == 0, result.output
+    assert "\n 1,2\n-3,4\n+3,5\n" in (in_tmp_path / "output.diff").read_text()
+
+
+def test_index_rejects_wrong_extension(in_tmp_path):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+
+    result = runner.invoke(app, ["index", "file1.csv", "-o", "file1.idx"])
+
+    assert result.exit_code == 1
+    assert ".csvidx extension" in result.output
+
+
+@pytest.mark.parametrize("output", ["../escaped.csvidx", "{cwd}/absolute.csvidx"])
+def test_index_rejects_output_outside_cwd(in_tmp_path, output):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+    output = output.format(cwd=in_tmp_path)
+
+    result = runner.invoke(app, ["index", "file1.csv", "-o", output])
+
+    assert result.exit_code == 1
+    assert f"Output path '{output}'" in result.output
+    assert not Path(output).exists()
+
+
+def test_index_refuses_to_overwrite(in_tmp_path):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+    runner.invoke(app, ["index", "file1.csv"])
+    create_temp_csv("a,b\n1,2\n3,4", in_tmp_path, "file1.csv")
+
+    result = runner.invoke(app, ["index", "file1.csv"])
+
+    assert result.exit_code == 1
+    assert "already exists. Use --force" in result.output
+
+    result = runner.invoke(app, ["index", "file1.csv", "--force", "--threads", "1", "--memory-limit", "1GB"])
+
+    assert result.exit_code == 0, result.output
+    assert "Indexed 2 rows" in result.output
+
+
+def test_compare_with_index_rejects_key(in_tmp_path):
+    create_temp_csv("a,b\n1,2", in_tmp_path, "file1.csv")
+    create_temp_csv("a,b\n1,3", in_tmp_path, "file2.csv")
+    runner.invoke(app, ["index", "file1.csv"])
+
+    result = runner.invoke(app, ["file1.csv.csvidx", "file2.csv", "--key", "a"])
+
+    assert result.exit_code == 1
+    assert "--key cannot be used with an index" in result.output
+
+
+def test_compare_cells(in_tmp_path):
+    create_temp_csv("id,name,pop\n1,a,10\n2,b,20", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name,pop\n1,a,10\n2,b,21", in_tmp_path, "file2.csv")
+
+    for extra in ([], ["--key", "id"]):
+        result = runner.invoke(app, ["file1.csv", "file2.csv", "--cells", "-o", "output.diff", *extra])
+
+        assert result.exit_code == 0, result.output
+        assert "~ pop: 20 -> 21\n" in (in_tmp_path / "output.diff").read_text()
+        (in_tmp_path / "output.diff").unlink()
+
+
+def test_compare_ignore_order(in_tmp_path):
+    create_temp_csv("id,name\n1,a\n2,b\n3,c", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n3,c\n1,a\n2,x", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--ignore-order", "-o", "output.diff"])
+
+    assert result.exit_code == 0, result.output
+    assert (in_tmp_path / "output.diff").read_text().endswith("@@ 1 removed, 1 added @@\n-2,b\n+2,x\n")
+
+
+def test_compare_ignore_order_rejects_key(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--ignore-order", "--key", "id"])
+
+    assert result.exit_code == 1
+    assert "--ignore-order cannot be used" in result.output
+
+
+def test_compare_compressed_output(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "-o", "output.diff.gz"])
+
+    assert result.exit_code == 0, result.output
+    assert "output.diff.gz" in result.output
+    assert gzip.decompress((in_tmp_path / "output.diff.gz").read_bytes()).endswith(b"-1,a\n+1,b\n")
+
+
+def test_compare_compressed_input(in_tmp_path):
+    (in_tmp_path / "file1.csv.gz").write_bytes(gzip.compress(b"id,name\n1,a\n2,b\n"))
+    create_temp_csv("id,name\n1,a\n2,c", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv.gz", "file2.csv", "-o", "output.diff"])
+
+    assert result.exit_code == 0, result.output
+    assert (in_tmp_path / "output.diff").read_text().endswith("-2,b\n+2,c\n")
+
+
+@pytest.mark.parametrize("mode", [[], ["--key", "id"], ["--key", "id", "--sorted"], ["--cells"], ["--ignore-order"]])
+def test_compare_exclude_columns(in_tmp_path, mode):
+    create_temp_csv("id,name,updated_at\n1,a,2024\n2,b,2024", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name,updated_at\n1,a,2025\n2,b,2025", in_tmp_path, "file2.csv")
+
+    excluded = runner.invoke(app, ["file1.csv", "file2.csv", "--exclude-columns", "updated_at", "-q", *mode])
+    selected = runner.invoke(app, ["file1.csv", "file2.csv", "--columns", "id,name", "-q", *mode])
+    everything = runner.invoke(app, ["file1.csv", "file2.csv", "-q", *mode])
+
+    assert (excluded.exit_code, selected.exit_code, everything.exit_code) == (0, 0, 1)
+
+
+def test_compare_where(in_tmp_path):
+    create_temp_csv("id,name,region\n1,a,EU\n2,b,US\n3,c,EU", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name,region\n1,a,EU\n2,x,US\n3,y,EU", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", "--where", "region = 'EU'", "--columns", "id,name"])
+
+    assert result.exit_code == 0
+    # Row numbers count the selected rows only
+    assert Path("result.diff").read_text().splitlines()[2:] == ["@@ -1,2 +1,2 @@", " 1,a", "-3,c", "+3,y"]
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (["--columns", "id,missing"], "has no column(s): missing"),
+        (["--columns", "id,"], "Invalid column list"),
+        (["--where", "missing = 1"], "Invalid where condition"),
+        (["--key", "id", "--columns", "name"], "--columns must include the key column(s)."),
+        (["--key", "id", "--exclude-columns", "id"], "--exclude-columns cannot exclude a key column."),
+    ],
+)
+def test_compare_invalid_selection(in_tmp_path, options, message):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+
+    result = runner.invoke(app, ["file1.csv", "file2.csv", *options])
+
+    assert result.exit_code == 1
+    assert message in result.output
+
+
+def test_batch_directories(in_tmp_path):
+    (in_tmp_path / "old").mkdir()
+    (in_tmp_path / "new").mkdir()
+    create_temp_csv("id,name\n1,a", in_tmp_path / "old", "same.csv")
+    create_temp_csv("id,name\n1,a", in_tmp_path / "new", "same.csv")
+    create_temp_csv("id,name\n1,a", in_tmp_path / "old", "changed.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path / "new", "changed.csv")
+    create_temp_csv("id,name\n1,a", in_tmp_path / "old", "removed.csv")
+
+    result = runner.invoke(app, ["batch", "old", "new", "-o", "out", "--workers", "2"])
+
+    assert result.exit_code == 1
+    assert "3 pairs: 1 identical, 1 changed, 1 failed" in result.output
+    assert (in_tmp_path / "out" / "changed.diff").read_text().endswith("-1,a\n+1,b\n")
+    summary = (in_tmp_path / "out" / "summary.csv").read_text().splitlines()
+    assert summary[0] == "file1,file2,status,output,error"
+    # Sorted by file, whatever order the workers finished in
+    assert [row.split(",")[0] for row in summary[1:]] == ["old/changed.csv", "old/removed.csv", "old/same.csv"]
+    # The side without a counterpart is left empty
+    assert "old/removed.csv,,failed,," in summary[2]
+
+
+def test_batch_dotted_output_dir(in_tmp_path):
+    (in_tmp_path / "old").mkdir()
+    (in_tmp_path / "new").mkdir()
+    create_temp_csv("id,name\n1,a", in_tmp_path / "old", "a.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path / "new", "a.csv")
+
+    result = runner.invoke(app, ["batch", "old", "new", "-o", "out.v2"])
+    rejected = runner.invoke(app, ["batch", "old", "new", "-o", "../out"])
+
+    assert result.exit_code == 0
+    assert (in_tmp_path / "out.v2" / "a.diff").exists()
+    assert rejected.exit_code == 1
+    assert "parent directory traversal" in rejected.output
+
+
+def test_batch_exclude_columns(in_tmp_path):
+    (in_tmp_path / "old").mkdir()
+    (in_tmp_path / "new").mkdir()
+    create_temp_csv("id,name,updated_at\n1,a,2024", in_tmp_path / "old", "a.csv")
+    create_temp_csv("id,name,updated_at\n1,a,2025", in_tmp_path / "new", "a.csv")
+
+    result = runner.invoke(app, ["batch", "old", "new", "-o", "out", "--exclude-columns", "updated_at"])
+
+    assert result.exit_code == 0
+    assert "1 pairs: 1 identical, 0 changed, 0 failed" in result.output
+
+
+def test_batch_manifest(in_tmp_path):
+    create_temp_csv("id,name\n1,a", in_tmp_path, "file1.csv")
+    create_temp_csv("id,name\n1,b", in_tmp_path, "file2.csv")
+    create_temp_csv("file1,file2\nfile1.csv,file2.csv", in_tmp_path, "pairs.csv")
+
+    result = runner.invoke(app, ["batch", "--manifest", "pairs.csv", "-o", "out", "--key", "id"])
+
+    assert result.exit_code == 0, result.output
+    assert "1 pairs: 0 identical, 1 changed, 0 failed" in result.output
+    assert "@@ id=1 @@" in (in_tmp_path / "out" / "file1.diff").read_text()
+
+
+def test_batch_requires_inputs(in_tmp_path):
+    (in_tmp_path / "old").mkdir()
+
+    result = runner.invoke(app, ["batch", "old"])
+
+    assert result.exit_code == 1
+    assert "two directories or --manifest" in result.output
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    """`--help` and `--version` must not pay for importing DuckDB or rich."""
+    code = "import sys, csvdiff.cli; print(sorted({'duckdb', 'rich.console'} & set(sys.modules)))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+
+    assert result.stdout.strip() == "[]"
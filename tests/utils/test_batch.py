@@ -0,0 +1,69 @@
+import pytest
+
+from csvdiff.utils.batch import compare_pair, csv_stem, find_pairs, read_manifest, run_batch
+from csvdiff.utils.compare import CompareOptions
+
+
+def test_csv_stem(tmp_path):
+    assert csv_stem(tmp_path / "a.csv") == "a"
+    assert csv_stem(tmp_path / "a.b.CSV.gz") == "a.b"
+    assert csv_stem(tmp_path / "a.txt") is None
+
+
+def test_find_pairs(tmp_path):
+    (tmp_path / "old").mkdir()
+    (tmp_path / "new").mkdir()
+    for name in ("a.csv", "b.csv.gz", "only_old.csv", "notes.txt"):
+        (tmp_path / "old" / name).touch()
+    for name in ("b.csv.gz", "a.csv", "only_new.csv"):
+        (tmp_path / "new" / name).touch()
+
+    pairs, unmatched = find_pairs(tmp_path / "old", tmp_path / "new")
+
+    assert pairs == [
+        (tmp_path / "old" / "a.csv", tmp_path / "new" / "a.csv"),
+        (tmp_path / "old" / "b.csv.gz", tmp_path / "new" / "b.csv.gz"),
+    ]
+    assert unmatched == [(tmp_path / "old" / "only_old.csv", None), (None, tmp_path / "new" / "only_new.csv")]
+
+
+def test_read_manifest_resolves_relative_paths(tmp_path):
+    manifest = tmp_path / "pairs.csv"
+    manifest.write_text("file1,file2\nold/a.csv,new/a.csv\n")
+
+    assert read_manifest(manifest) == [(tmp_path / "old" / "a.csv", tmp_path / "new" / "a.csv")]
+
+
+def test_read_manifest_requires_columns(tmp_path):
+    manifest = tmp_path / "pairs.csv"
+    manifest.write_text("old,new\na.csv,b.csv\n")
+
+    with pytest.raises(ValueError, match="'file1' and 'file2' columns"):
+        read_manifest(manifest)
+
+
+def test_compare_pair_reports_failures(tmp_path):
+    file1 = tmp_path / "a.csv"
+    file2 = tmp_path / "b.csv"
+    file1.write_text("id\n")
+    file2.write_text("id\n1\n")
+
+    result = compare_pair(file1, file2, tmp_path / "a.diff", CompareOptions())
+
+    assert result.status == "failed"
+    assert "contains no data" in result.error
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch(tmp_path, workers):
+    pairs = []
+    for name, old, new in (("same", "id\n1\n", "id\n1\n"), ("changed", "id\n1\n", "id\n2\n")):
+        (tmp_path / f"{name}1.csv").write_text(old)
+        (tmp_path / f"{name}2.csv").write_text(new)
+        pairs.append((tmp_path / f"{name}1.csv", tmp_path / f"{name}2.csv"))
+    (tmp_path / "out").mkdir()
+
+    results = sorted(run_batch(pairs, tmp_path / "out", CompareOptions(), workers), key=lambda r: r.file1.name)
+
+    assert [(r.file1.name, r.status) for r in results] == [("changed1.csv", "changed"), ("same1.csv", "identical")]
+    assert (tmp_path / "out" / "changed1.diff").read_text().endswith("-1\n+2\n")
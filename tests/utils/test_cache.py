@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+from csvdiff.utils.cache import (
+    DEFAULT_MAX_CACHE_BYTES,
+    cache_entry,
+    default_cache_dir,
+    evict,
+    load_cached_columns,
+    max_cache_bytes,
+    save_cached_columns,
+)
+from csvdiff.utils.csv import read_csv_pair, read_csv_with_duckdb
+
+
+def test_default_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("CSVDIFF_CACHE_DIR", str(tmp_path / "custom"))
+    assert default_cache_dir() == tmp_path / "custom"
+
+    monkeypatch.delenv("CSVDIFF_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr("sys.platform", "linux")
+    assert default_cache_dir() == tmp_path / "csvdiff"
+
+
+def test_max_cache_bytes(monkeypatch):
+    monkeypatch.delenv("CSVDIFF_CACHE_MAX_BYTES", raising=False)
+    assert max_cache_bytes() == DEFAULT_MAX_CACHE_BYTES
+
+    monkeypatch.setenv("CSVDIFF_CACHE_MAX_BYTES", "1000")
+    assert max_cache_bytes() == 1000
+
+    monkeypatch.setenv("CSVDIFF_CACHE_MAX_BYTES", "1GB")
+    with pytest.raises(ValueError, match="Invalid CSVDIFF_CACHE_MAX_BYTES '1GB'"):
+        max_cache_bytes()
+
+
+def test_cache_entry_changes_with_file(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("a,b\n1,2\n")
+    before = cache_entry(tmp_path / "cache", file1)
+
+    assert cache_entry(tmp_path / "cache", file1) == before
+
+    file1.write_text("a,b\n1,3\n")
+    os.utime(file1, ns=(0, 0))
+
+    assert cache_entry(tmp_path / "cache", file1) != before
+
+
+def test_cache_entry_changes_with_duckdb_version(tmp_path, monkeypatch):
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("a,b\n1,2\n")
+    before = cache_entry(tmp_path / "cache", file1)
+
+    monkeypatch.setattr("duckdb.__version__", "0.0.0")
+
+    assert cache_entry(tmp_path / "cache", file1) != before
+
+
+def test_read_csv_with_duckdb_unusable_cache(tmp_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("a,b\n1,2\n")
+
+    assert read_csv_with_duckdb(file1, cache_dir=not_a_dir / "cache") == (["1,2"], ["a", "b"])
+    assert read_csv_pair(file1, file1, cache_dir=not_a_dir / "cache", hashes=True)[0][1] == ["a", "b"]
+
+
+def test_read_csv_with_duckdb_cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+    file1 = tmp_path / "file1.csv"
+    file1.write_text('a,b\n1,"x,y"\n3,4\n')
+
+    first = read_csv_with_duckdb(file1, cache_dir=cache_dir)
+    entry = cache_entry(cache_dir, file1)
+
+    assert load_cached_columns(entry) == ["a", "b"]
+    assert read_csv_with_duckdb(file1, cache_dir=cache_dir) == first == (['1,"x,y"', "3,4"], ["a", "b"])
+
+
+def test_evict_least_recently_used(tmp_path):
+    entries = []
+    for i in range(3):
+        file_path = tmp_path / f"file{i}.csv"
+        file_path.write_text(f"a\n{i}\n")
+        entry = cache_entry(tmp_path, file_path)
+        entry.data_path.write_bytes(b"x" * 100)
+        save_cached_columns(entry, ["a"])
+        os.utime(entry.meta_path, (i, i))
+        entries.append(entry)
+
+    # Using the oldest entry makes the middle one the least recently used
+    load_cached_columns(entries[0])
+    evict(tmp_path, max_bytes=250)
+
+    assert [entry.data_path.exists() for entry in entries] == [True, False, True]
+
+
+def test_evict_keeps_requested_entry(tmp_path):
+    file_path = tmp_path / "file.csv"
+    file_path.write_text("a\n1\n")
+    entry = cache_entry(tmp_path, file_path)
+    entry.data_path.write_bytes(b"x" * 100)
+    save_cached_columns(entry, ["a"])
+
+    evict(tmp_path, max_bytes=10, keep=[entry])
+
+    assert load_cached_columns(entry) == ["a"]
+
+
+def test_read_csv_pair_keeps_both_entries(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("a,b\n1,2\n")
+    file2 = tmp_path / "file2.csv"
+    file2.write_text("a,b\n1,3\n")
+    read_csv_pair(file1, file2, cache_dir=cache_dir)
+    entries = [cache_entry(cache_dir, file_path) for file_path in (file1, file2)]
+    sizes = [entry.data_path.stat().st_size for entry in entries]
+    for entry in entries:
+        entry.data_path.unlink()
+
+    # Each entry fits on its own, but not both together
+    monkeypatch.setenv("CSVDIFF_CACHE_MAX_BYTES", str(max(sizes)))
+    read_csv_pair(file1, file2, cache_dir=cache_dir)
+
+    assert [load_cached_columns(entry) for entry in entries] == [["a", "b"], ["a", "b"]]
+
+
+# The input is larger than the limit, or only its Parquet entry is
+@pytest.mark.parametrize("max_bytes", ["5", "100"])
+def test_read_csv_with_duckdb_skips_files_larger_than_cache(tmp_path, monkeypatch, max_bytes):
+    cache_dir = tmp_path / "cache"
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("a,b\n1,2\n")
+    monkeypatch.setenv("CSVDIFF_CACHE_MAX_BYTES", max_bytes)
+
+    assert read_csv_with_duckdb(file1, cache_dir=cache_dir) == (["1,2"], ["a", "b"])
+    assert list(cache_dir.glob("*")) == []
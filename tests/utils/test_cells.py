@@ -0,0 +1,62 @@
+import duckdb
+
+from csvdiff.utils.cells import changed_columns_sql, format_cell_diff, open_cell_diff
+
+
+def test_changed_columns_sql():
+    conn = duckdb.connect()
+    try:
+        changed = conn.sql(
+            f"""
+            SELECT {changed_columns_sql(["a", "b c", "d"], "o", "n")}, {changed_columns_sql([], "o", "n")}
+            FROM (SELECT '1' AS a, 'x' AS "b c", NULL AS d) o, (SELECT '1' AS a, 'y' AS "b c", '' AS d) n
+            """
+        ).fetchone()
+    finally:
+        conn.close()
+
+    assert changed == (["b c", "d"], [])
+
+
+def test_open_cell_diff_pairs_replaced_rows(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n3,c\n4,d\n")
+    file2.write_text("id,name\n1,a\n2,x\n3,c\n9,y\n9,z\n")
+
+    with open_cell_diff(file1, file2) as diff:
+        changes = list(diff.changes)
+
+    assert [(c.old_row, c.new_row, c.changed_columns) for c in changes] == [
+        (2, 2, ("name",)),
+        (4, 4, ("id", "name")),
+        (None, 5, ()),
+    ]
+    assert changes[2].new == ("9", "z")
+
+
+def test_format_cell_diff(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text('id,name\n1,a\n2,"b,c"\n3,c\n')
+    file2.write_text("id,name\n1,a\n2,\n")
+
+    with open_cell_diff(file1, file2) as diff:
+        lines = list(format_cell_diff(diff, "file1.csv", "file2.csv"))
+
+    assert lines == [
+        "--- file1.csv",
+        "+++ file2.csv",
+        "@@ -2 +2 @@",
+        '~ name: "b,c" -> ""',
+        "@@ -3 @@",
+        "-3,c",
+    ]
+
+
+def test_format_cell_diff_no_changes(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("id,name\n1,a\n")
+
+    with open_cell_diff(file1, file1) as diff:
+        assert list(format_cell_diff(diff, "file1.csv", "file1.csv")) == []
@@ -1,6 +1,24 @@
+import gzip
+import os
+
+import duckdb
 import pytest
 
-from csvdiff.utils.csv import read_csv_with_duckdb
+from csvdiff.utils.csv import (
+    DuckDBSettings,
+    RowSelection,
+    _transcoding_writer,
+    connect_duckdb,
+    csv_line_expression,
+    fetch_rows,
+    format_csv_row,
+    guess_encoding,
+    parse_columns,
+    quote_identifier,
+    read_csv_pair,
+    read_csv_with_duckdb,
+    stream_csv_with_duckdb,
+)
 
 
 def test_read_csv_with_duckdb_basic(tmp_path):
@@ -75,3 +93,255 @@ def test_read_csv_with_embedded_newlines(tmp_path):
     assert len(lines) == 1
     # The newline should be preserved inside the quoted field
     assert "\n" in lines[0]
+
+
+@pytest.mark.parametrize(
+    "encoding, bom",
+    [
+        ("utf-8-sig", ""),
+        ("cp1252", ""),
+        ("utf-16-le", "\ufeff"),
+        ("utf-16-be", "\ufeff"),
+    ],
+)
+def test_read_csv_with_duckdb_encodings(tmp_path, encoding, bom):
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes((bom + "name,price\ncafé,5 €\n").encode(encoding))
+
+    lines, cols = read_csv_with_duckdb(file1)
+
+    assert cols == ["name", "price"]
+    assert lines == ["café,5 €"]
+
+
+def test_read_csv_with_duckdb_transcodes_without_named_pipes(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, "mkfifo", raising=False)
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes("name,price\ncafé,5 €\n".encode("cp1252"))
+
+    lines, _ = read_csv_with_duckdb(file1)
+
+    assert lines == ["café,5 €"]
+
+
+def test_read_csv_with_duckdb_reports_transcoding_errors(tmp_path):
+    # 0x81 is undefined in cp1252 and sits between two of the blocks sampled to detect the encoding
+    file1 = tmp_path / "file1.csv"
+    row = "€,x\n".encode("cp1252")
+    file1.write_bytes(b"a,b\n" + row * 25_000 + b"\x81,x\n" + row * 500_000)
+
+    with pytest.raises(UnicodeDecodeError):
+        read_csv_with_duckdb(file1)
+
+
+def test_read_csv_with_duckdb_reports_transcoding_errors_in_quoted_fields(tmp_path):
+    # The bad byte sits in a quoted field that starts near the top, so the transcoded data ends inside the field
+    file1 = tmp_path / "file1.csv"
+    quoted = ("€,€\n" * 20_000).encode("cp1252")
+    file1.write_bytes(b'a,b,c\n1,"' + quoted + b'\x81",z\n' + "€,x,y\n".encode("cp1252") * 300_000)
+
+    with pytest.raises(UnicodeDecodeError):
+        read_csv_with_duckdb(file1)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="named pipes are not available")
+def test_transcoding_writer_raises_decoding_error_over_reader_error(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes(b'a,b\n1,"x' + b"\x81" * 100_000 + b'"\n')
+    pipe_path = tmp_path / "pipe"
+    os.mkfifo(pipe_path)
+
+    with pytest.raises(UnicodeDecodeError) as excinfo:
+        with _transcoding_writer(file1, "cp1252", pipe_path):
+            with open(pipe_path, "rb") as f:
+                f.read()  # Ends early, when the writer gives up
+            raise RuntimeError("reader failed on the truncated data")
+
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+
+
+def _compress(data: bytes, suffix: str) -> bytes:
+    if suffix == ".gz":
+        return gzip.compress(data)
+    return pytest.importorskip("zstandard").ZstdCompressor().compress(data)
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".zst"])
+@pytest.mark.parametrize("encoding", ["utf-8", "cp1252", "utf-16-le"])
+def test_read_csv_with_duckdb_compressed(tmp_path, suffix, encoding):
+    file1 = tmp_path / f"file1.csv{suffix}"
+    bom = "\ufeff" if encoding.startswith("utf-16") else ""
+    file1.write_bytes(_compress((bom + "name,price\ncafé,5 €\n").encode(encoding), suffix))
+
+    lines, cols = read_csv_with_duckdb(file1)
+
+    assert cols == ["name", "price"]
+    assert lines == ["café,5 €"]
+
+
+def test_guess_encoding_compressed_large_file(tmp_path):
+    file1 = tmp_path / "file1.csv.gz"
+    file1.write_bytes(gzip.compress(b"a,b\n" + "".join(f"caf\u00e9,{i}\n" for i in range(500_000)).encode("cp1252")))
+
+    guess = guess_encoding(file1)
+
+    assert guess.encoding == "cp1252"
+    assert 0 < guess.confidence < 1
+
+
+@pytest.mark.parametrize(
+    "data, encoding",
+    [
+        (b"", "utf-8"),
+        (b"a,b\n1,2\n", "utf-8"),
+        ("a,b\ncaf\u00e9,\u20ac\n".encode("utf-8-sig"), "utf-8-sig"),
+        ("\ufeffa,b\n".encode("utf-16-be"), "utf-16"),
+        ("a,b\ncaf\u00e9,\u20ac\n".encode("cp1252"), "cp1252"),
+        (b"a,b\n\x81,\xe9\n", "iso-8859-1"),
+    ],
+)
+def test_guess_encoding(tmp_path, data, encoding):
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes(data)
+
+    assert guess_encoding(file1) == (encoding, 1.0)
+
+
+def test_guess_encoding_samples_large_files(tmp_path):
+    # A single cp1252 byte far beyond the first blocks, in the last block of the file
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes(b"a,b\n" + "caf\u00e9,x\n".encode() * 500_000 + "\u20ac,x\n".encode("cp1252"))
+
+    guess = guess_encoding(file1)
+
+    assert guess.encoding == "cp1252"
+    assert 0 < guess.confidence < 1
+
+
+def test_guess_encoding_handles_characters_split_across_blocks(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes(b"a,b\n" + "\u20ac\u00e9\u4e2d,x\n".encode() * 500_000)
+
+    assert guess_encoding(file1).encoding == "utf-8"
+
+
+def test_fetch_rows_from_relation_and_cursor():
+    conn = duckdb.connect()
+    try:
+        rel = conn.sql("SELECT range AS n FROM range(5)")
+        assert list(fetch_rows(rel, chunk_size=2)) == [(0,), (1,), (2,), (3,), (4,)]
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT range AS n FROM range(3)")
+        assert list(fetch_rows(cursor, chunk_size=2)) == [(0,), (1,), (2,)]
+    finally:
+        conn.close()
+
+
+def test_stream_csv_with_duckdb(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("a,b\n" + "".join(f"{i},x{i}\n" for i in range(25)))
+
+    with stream_csv_with_duckdb(file1, chunk_size=10) as stream:
+        assert stream.columns == ["a", "b"]
+        assert next(stream.rows) == ("0", "x0")
+        assert len(list(stream.rows)) == 24
+
+
+def test_parse_columns():
+    assert parse_columns("id, name") == ["id", "name"]
+    with pytest.raises(ValueError, match="Invalid column list"):
+        parse_columns("id,,name")
+
+
+def test_read_csv_with_duckdb_selection(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("id,name,region,updated_at\n1,a,EU,x\n2,b,US,y\n3,c,EU,z\n")
+
+    selection = RowSelection(exclude_columns=("updated_at",), where="region = 'EU'")
+    lines, columns = read_csv_with_duckdb(file1, selection=selection)
+    assert (lines, columns) == (["1,a,EU", "3,c,EU"], ["id", "name", "region"])
+
+    # Rows are filtered before the columns are projected
+    selection = RowSelection(columns=("name", "id"), where="updated_at <> 'y'")
+    assert read_csv_with_duckdb(file1, selection=selection) == (["a,1", "c,3"], ["name", "id"])
+
+
+@pytest.mark.parametrize(
+    "selection, message",
+    [
+        (RowSelection(columns=("id", "missing")), "has no column\\(s\\): missing"),
+        (RowSelection(exclude_columns=("id", "name")), "No columns .* are left"),
+        (RowSelection(where="missing = 1"), "Invalid where condition"),
+    ],
+)
+def test_read_csv_with_duckdb_invalid_selection(tmp_path, selection, message):
+    file1 = tmp_path / "file1.csv"
+    file1.write_text("id,name\n1,a\n")
+
+    with pytest.raises(ValueError, match=message):
+        read_csv_with_duckdb(file1, selection=selection)
+
+
+def test_read_csv_pair(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("a,b\n1,2\n")
+    file2.write_text("x,y\n3,4\n5,6\n")
+
+    (lines1, cols1), (lines2, cols2) = read_csv_pair(file1, file2)
+
+    assert (lines1, cols1) == (["1,2"], ["a", "b"])
+    assert (lines2, cols2) == (["3,4", "5,6"], ["x", "y"])
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_read_csv_pair_hashes(tmp_path, use_cache):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("a,b\n1,2\n3,4\n")
+    file2.write_text("a,b\n3,4\n")
+    cache_dir = tmp_path / "cache" if use_cache else None
+
+    (hashes1, cols1), (hashes2, _) = read_csv_pair(file1, file2, cache_dir=cache_dir, hashes=True)
+
+    assert cols1 == ["a", "b"]
+    assert all(isinstance(value, int) for value in hashes1)
+    assert len(hashes1) == 2
+    assert hashes1[1] == hashes2[0] != hashes1[0]
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [("plain", "with,comma"), ('with"quote', ""), (None, "line\nbreak"), ("carriage\rreturn", " padded ")],
+        [("",), (None,), ("x",), ('"',), ("a,b",)],
+        [("café", "€"), ("'single'", "tab\there")],
+    ],
+)
+def test_csv_line_expression_matches_csv_writer(rows):
+    columns = [f"col {i}" for i in range(len(rows[0]))]
+    conn = duckdb.connect()
+    try:
+        column_list = ", ".join(f"col{i} AS {quote_identifier(name)}" for i, name in enumerate(columns))
+        table = ", ".join(f"col{i} VARCHAR" for i in range(len(columns)))
+        conn.execute(f"CREATE TABLE source ({table})")
+        conn.executemany(f"INSERT INTO source VALUES ({', '.join('?' for _ in columns)})", rows)
+        lines = conn.sql(f"SELECT {csv_line_expression(columns)} FROM (SELECT {column_list} FROM source)").fetchall()
+    finally:
+        conn.close()
+
+    assert [line for (line,) in lines] == [format_csv_row(row) for row in rows]
+
+
+def test_connect_duckdb_applies_settings(tmp_path):
+    conn = connect_duckdb(DuckDBSettings(memory_limit="100MB", threads=2, temp_dir=tmp_path))
+    try:
+        settings = conn.sql(
+            "SELECT current_setting('memory_limit'), current_setting('threads'), current_setting('temp_directory')"
+        ).fetchone()
+    finally:
+        conn.close()
+
+    assert settings[0].startswith("95.3")  # DuckDB reports the limit in MiB
+    assert settings[1:] == (2, str(tmp_path))
@@ -0,0 +1,168 @@
+import random
+from difflib import SequenceMatcher
+from difflib import unified_diff as difflib_unified_diff
+
+import pytest
+
+from csvdiff.utils.diff import (
+    DiffAlgorithm,
+    _histogram_blocks,
+    common_affixes,
+    diff_opcodes,
+    format_unified,
+    get_matching_blocks,
+    get_opcodes,
+    group_opcodes,
+    intern_lines,
+    unified_diff,
+)
+
+
+def _apply_opcodes(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        result.extend(a[i1:i2] if tag == "equal" else b[j1:j2])
+    return result
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def test_intern_lines():
+    a_ids, b_ids = intern_lines(["x", "y", "x"], ["y", "z"])
+    assert a_ids == [0, 1, 0]
+    assert b_ids == [1, 2]
+
+
+@pytest.mark.parametrize("algorithm", list(DiffAlgorithm))
+def test_matching_blocks_are_valid(algorithm):
+    rng = random.Random(42)
+    for _ in range(300):
+        a = [rng.randint(0, 5) for _ in range(rng.randint(0, 25))]
+        b = [rng.randint(0, 5) for _ in range(rng.randint(0, 25))]
+        blocks = get_matching_blocks(a, b, algorithm)
+
+        assert blocks[-1] == (len(a), len(b), 0)
+        for i, j, size in blocks:
+            assert a[i : i + size] == b[j : j + size]
+        assert _apply_opcodes(a, b, get_opcodes(blocks)) == b
+
+
+def test_myers_is_minimal():
+    rng = random.Random(7)
+    for _ in range(300):
+        a = [rng.randint(0, 4) for _ in range(rng.randint(0, 20))]
+        b = [rng.randint(0, 4) for _ in range(rng.randint(0, 20))]
+        matched = sum(size for _, _, size in get_matching_blocks(a, b, DiffAlgorithm.MYERS))
+        assert matched == _lcs_length(a, b)
+
+
+def test_format_matches_difflib_output():
+    rng = random.Random(1)
+    for _ in range(200):
+        a = [str(rng.randint(0, 5)) for _ in range(rng.randint(0, 30))]
+        b = [str(rng.randint(0, 5)) for _ in range(rng.randint(0, 30))]
+        matcher = SequenceMatcher(None, a, b)
+        expected = list(difflib_unified_diff(a, b, fromfile="a.csv", tofile="b.csv", lineterm=""))
+
+        assert list(group_opcodes(matcher.get_opcodes())) == list(matcher.get_grouped_opcodes())
+        assert list(format_unified(a, b, group_opcodes(matcher.get_opcodes()), "a.csv", "b.csv")) == expected
+
+
+def test_common_affixes():
+    a = ["h", "x", "y", "t"]
+    assert common_affixes(a, ["h", "z", "t"]) == (1, 1)
+    assert common_affixes(a, list(a)) == (4, 0)
+    assert common_affixes(["a", "a"], ["a", "a", "a"]) == (2, 0)
+    assert common_affixes([], ["a"]) == (0, 0)
+
+
+def test_common_affixes_across_chunks():
+    a = [str(i) for i in range(100)]
+    b = a[:37] + ["changed"] + a[38:]
+    assert common_affixes(a, b, chunk_size=8) == (37, 62)
+
+
+@pytest.mark.parametrize("algorithm", list(DiffAlgorithm))
+def test_diff_opcodes_keeps_positions_after_trimming(algorithm):
+    a = [f"{i},row" for i in range(1000)]
+    b = a[:500] + ["new,row"] + a[500:700] + a[701:]
+
+    assert diff_opcodes(a, b, algorithm) == [
+        ("equal", 0, 500, 0, 500),
+        ("insert", 500, 500, 500, 501),
+        ("equal", 500, 700, 501, 701),
+        ("delete", 700, 701, 701, 701),
+        ("equal", 701, 1000, 701, 1000),
+    ]
+    headers = [line for line in unified_diff(a, b, "a.csv", "b.csv", algorithm) if line.startswith("@@")]
+    assert headers == ["@@ -498,6 +498,7 @@", "@@ -698,7 +699,6 @@"]
+
+
+@pytest.mark.parametrize("algorithm", list(DiffAlgorithm))
+def test_unified_diff_format(algorithm):
+    a = [f"{i},row{i}" for i in range(10)]
+    b = a[:5] + ["5,changed"] + a[6:]
+
+    assert list(unified_diff(a, b, "a.csv", "b.csv", algorithm)) == [
+        "--- a.csv",
+        "+++ b.csv",
+        "@@ -3,7 +3,7 @@",
+        " 2,row2",
+        " 3,row3",
+        " 4,row4",
+        "-5,row5",
+        "+5,changed",
+        " 6,row6",
+        " 7,row7",
+        " 8,row8",
+    ]
+
+
+@pytest.mark.parametrize("algorithm", list(DiffAlgorithm))
+def test_unified_diff_identical(algorithm):
+    lines = ["1,a", "2,b"]
+    assert list(unified_diff(lines, list(lines), "a.csv", "b.csv", algorithm)) == []
+
+
+def test_myers_bounds_cost_on_unrelated_order():
+    a = list(range(2000))
+    b = list(a)
+    random.Random(3).shuffle(b)
+
+    blocks = get_matching_blocks(a, b, DiffAlgorithm.MYERS)
+
+    for i, j, size in blocks:
+        assert a[i : i + size] == b[j : j + size]
+    assert _apply_opcodes(a, b, get_opcodes(blocks)) == b
+
+
+class _CountingList(list):
+    reads = 0
+
+    def __getitem__(self, index):
+        _CountingList.reads += 1
+        return super().__getitem__(index)
+
+
+def test_histogram_bounds_cost_on_reordered_rows():
+    # Both halves interleaved: every anchor splits off a single row, which used to make histogram quadratic
+    n = 4000
+    a = list(range(n))
+    b = [k // 2 + (n // 2 if k % 2 else 0) for k in range(n)]
+
+    _CountingList.reads = 0
+    blocks = []
+    _histogram_blocks(_CountingList(a), 0, n, _CountingList(b), 0, n, blocks)
+
+    assert _CountingList.reads < 300 * n
+    for i, j, size in blocks:
+        assert a[i : i + size] == b[j : j + size]
+    assert _apply_opcodes(a, b, get_opcodes(get_matching_blocks(a, b))) == b
@@ -1,9 +1,11 @@
+import gzip
+import io
 import threading
 from pathlib import Path
 
 import pytest
 
-from csvdiff.utils.files import create_unique_output_file
+from csvdiff.utils.files import create_unique_output_file, files_are_identical, has_text_after_first_line, write_lines
 
 
 def test_create_unique_output_file_no_conflict(tmp_path):
@@ -176,3 +178,98 @@ def test_create_unique_output_file_permission_error(tmp_path):
     finally:
         # Restore permissions for cleanup
         restricted_dir.chmod(0o755)
+
+
+def test_create_unique_output_file_gzip(tmp_path):
+    """Test that a .gz output is compressed and keeps its full extension on conflict."""
+    (tmp_path / "output.diff.gz").touch()
+
+    with create_unique_output_file(tmp_path / "output.diff.gz") as handle:
+        handle.write("-a\n+b\n")
+
+    assert handle.name == str(tmp_path / "output (1).diff.gz")
+    assert gzip.decompress((tmp_path / "output (1).diff.gz").read_bytes()) == b"-a\n+b\n"
+
+
+def test_create_unique_output_file_zstd(tmp_path):
+    """Test that a .zst output is compressed with zstd."""
+    zstandard = pytest.importorskip("zstandard")
+
+    with create_unique_output_file(tmp_path / "output.diff.zst") as handle:
+        handle.write("-a\n+b\n")
+
+    assert handle.name == str(tmp_path / "output.diff.zst")
+    with zstandard.open(tmp_path / "output.diff.zst", "rb") as f:
+        assert f.read() == b"-a\n+b\n"
+
+
+@pytest.mark.parametrize("line_count", [0, 1, 5, 6])
+def test_write_lines_batches(line_count):
+    """Test that every line is written once, whether or not it fills a batch."""
+    lines = [f"line {i}" for i in range(line_count)]
+    f = io.StringIO()
+
+    written = write_lines(f, iter(lines), batch_lines=5)
+
+    assert written == bool(lines)
+    assert f.getvalue() == "".join(line + "\n" for line in lines)
+
+
+def test_files_are_identical_same_content(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_bytes(b"a,b\n1,2\n" * 1000)
+    file2.write_bytes(b"a,b\n1,2\n" * 1000)
+
+    assert files_are_identical(file1, file2, block_size=64)
+
+
+def test_files_are_identical_same_file(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file1.write_bytes(b"a,b\n1,2\n")
+
+    assert files_are_identical(file1, file1)
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (b"", False),
+        (b"a,b", False),
+        (b"a,b\r\n\r\n", False),
+        ("a,b\n".encode("utf-16"), False),
+        (b"a,b\n1,2", True),
+        (b"x" * 100 + b"\n" + b"\n" * 100 + b"1", True),
+        ("a,b\n1,2\n".encode("utf-16"), True),
+    ],
+)
+def test_has_text_after_first_line(tmp_path, content, expected):
+    file_path = tmp_path / "file.csv"
+    file_path.write_bytes(content)
+
+    assert has_text_after_first_line(file_path, block_size=16) == expected
+
+
+def test_has_text_after_first_line_compressed(tmp_path):
+    file_path = tmp_path / "file.csv.gz"
+    file_path.write_bytes(gzip.compress(b"a,b\n"))
+
+    assert not has_text_after_first_line(file_path)
+
+
+def test_files_are_identical_different_content(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_bytes(b"a,b\n1,2\n" * 1000)
+    file2.write_bytes(b"a,b\n1,2\n" * 999 + b"a,b\n1,3\n")
+
+    assert not files_are_identical(file1, file2, block_size=64)
+
+
+def test_files_are_identical_different_size(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_bytes(b"a,b\n1,2\n")
+    file2.write_bytes(b"a,b\n1,2\n3,4\n")
+
+    assert not files_are_identical(file1, file2)
@@ -0,0 +1,105 @@
+import pytest
+
+from csvdiff.utils.csv import read_csv_with_duckdb
+from csvdiff.utils.diff import unified_diff
+from csvdiff.utils.index import BLOCK_ROWS, build_index, default_index_path, is_index_file, open_index_diff
+
+
+def write_rows(path, rows):
+    path.write_text("id,name\n" + "".join(f"{i},{name}\n" for i, name in rows))
+    return path
+
+
+def index_diff(tmp_path, old_rows, new_rows):
+    old = write_rows(tmp_path / "old.csv", old_rows)
+    new = write_rows(tmp_path / "new.csv", new_rows)
+    index_path = default_index_path(old)
+    build_index(old, index_path)
+
+    with open_index_diff(index_path, new, "old", "new") as diff:
+        lines = list(diff.lines)
+
+    expected = list(unified_diff(read_csv_with_duckdb(old)[0], read_csv_with_duckdb(new)[0], "old", "new"))
+    return lines, expected
+
+
+def test_default_index_path(tmp_path):
+    index_path = default_index_path(tmp_path / "data.csv")
+
+    assert index_path == tmp_path / "data.csv.csvidx"
+    assert is_index_file(index_path)
+    assert not is_index_file(tmp_path / "data.csv")
+
+
+def test_build_index(tmp_path):
+    rows = [(i, f"name {i}") for i in range(BLOCK_ROWS * 2 + 10)]
+    old = write_rows(tmp_path / "old.csv", rows)
+
+    csv_index = build_index(old, tmp_path / "old.csvidx")
+
+    assert csv_index.columns == ["id", "name"]
+    assert csv_index.row_count == len(rows)
+    assert len(csv_index.block_hashes) == 3
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        "identical",
+        "edit_late_block",
+        "insert_first_row",
+        "delete_last_rows",
+        "append",
+    ],
+)
+def test_index_diff_matches_unified_diff(tmp_path, change):
+    old_rows = [(i, f"name {i}") for i in range(BLOCK_ROWS * 3 + 100)]
+    new_rows = list(old_rows)
+    if change == "edit_late_block":
+        new_rows[BLOCK_ROWS * 2 + 5] = (BLOCK_ROWS * 2 + 5, "renamed")
+        del new_rows[BLOCK_ROWS * 3 + 50]
+    elif change == "insert_first_row":
+        new_rows.insert(0, (-1, "first"))
+    elif change == "delete_last_rows":
+        del new_rows[-20:]
+    elif change == "append":
+        new_rows.append((99999, "last"))
+
+    lines, expected = index_diff(tmp_path, old_rows, new_rows)
+
+    assert lines == expected
+    assert bool(lines) == (change != "identical")
+
+
+def test_index_diff_from_other_duckdb_version(tmp_path, monkeypatch):
+    old_rows = [(i, f"name {i}") for i in range(BLOCK_ROWS + 10)]
+    new_rows = old_rows[:5] + [(5, "renamed")] + old_rows[6:]
+    old = write_rows(tmp_path / "old.csv", old_rows)
+    new = write_rows(tmp_path / "new.csv", new_rows)
+    build_index(old, tmp_path / "old.csvidx")
+
+    monkeypatch.setattr("csvdiff.utils.index.HASH_FUNCTION", "duckdb-0.0.0")
+    with open_index_diff(tmp_path / "old.csvidx", new, "old", "new") as diff:
+        lines = list(diff.lines)
+
+    assert lines[2:] == [
+        "@@ -3,7 +3,7 @@",
+        " 2,name 2",
+        " 3,name 3",
+        " 4,name 4",
+        "-5,name 5",
+        "+5,renamed",
+        " 6,name 6",
+        " 7,name 7",
+        " 8,name 8",
+    ]
+
+
+def test_open_index_diff_rejects_non_index(tmp_path):
+    not_index = tmp_path / "old.csvidx"
+    not_index.write_text("id\n1\n")
+    new = write_rows(tmp_path / "new.csv", [(1, "a")])
+
+    with pytest.raises(ValueError, match="not a csvdiff index"):
+        with open_index_diff(not_index, new, "old", "new"):
+            pass
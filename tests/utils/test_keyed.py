@@ -0,0 +1,217 @@
+import pytest
+
+from csvdiff.utils.keyed import (
+    format_keyed_diff,
+    has_keyed_changes,
+    open_keyed_diff,
+    open_sorted_keyed_diff,
+    parse_key_columns,
+    summarize_keyed_diff,
+    summarize_sorted_keyed_diff,
+)
+
+
+def test_parse_key_columns():
+    assert parse_key_columns("id") == ["id"]
+    assert parse_key_columns("id, date") == ["id", "date"]
+
+
+@pytest.mark.parametrize("value", ["", "id,", "id,id"])
+def test_parse_key_columns_invalid(value):
+    with pytest.raises(ValueError):
+        parse_key_columns(value)
+
+
+def test_open_keyed_diff_classifies_changes(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n3,c\n")
+    file2.write_text("id,name\n4,d\n3,c\n2,x\n")
+
+    with open_keyed_diff(file1, file2, ["id"]) as diff:
+        changes = list(diff.changes)
+
+    assert [(change.kind, change.key) for change in changes] == [
+        ("removed", ("1",)),
+        ("changed", ("2",)),
+        ("added", ("4",)),
+    ]
+    assert changes[1].old == ("2", "b")
+    assert changes[1].new == ("2", "x")
+
+
+def test_open_keyed_diff_composite_key(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,date,value\n1,2024,a\n1,2025,b\n")
+    file2.write_text("id,date,value\n1,2025,b\n1,2024,c\n")
+
+    with open_keyed_diff(file1, file2, ["id", "date"]) as diff:
+        changes = list(diff.changes)
+
+    assert [(change.kind, change.key) for change in changes] == [("changed", ("1", "2024"))]
+
+
+def test_open_keyed_diff_missing_key_column(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n")
+    file2.write_text("code,name\n1,a\n")
+
+    with pytest.raises(ValueError, match="Second CSV file has no key column"):
+        with open_keyed_diff(file1, file2, ["id"]):
+            pass
+
+
+def test_open_keyed_diff_duplicate_key(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n1,b\n")
+    file2.write_text("id,name\n1,a\n")
+
+    with pytest.raises(ValueError, match="duplicate key id=1"):
+        with open_keyed_diff(file1, file2, ["id"]):
+            pass
+
+
+def test_format_keyed_diff(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text('id,name\n1,a\n2,"b,c"\n')
+    file2.write_text("id,name\n2,d\n3,e\n")
+
+    with open_keyed_diff(file1, file2, ["id"]) as diff:
+        lines = list(format_keyed_diff(diff, "file1.csv", "file2.csv"))
+
+    assert lines == [
+        "--- file1.csv",
+        "+++ file2.csv",
+        "@@ id=1 @@",
+        "-1,a",
+        "@@ id=2 @@",
+        '-2,"b,c"',
+        "+2,d",
+        "@@ id=3 @@",
+        "+3,e",
+    ]
+
+
+@pytest.mark.parametrize("open_diff", [open_keyed_diff, open_sorted_keyed_diff])
+def test_format_keyed_diff_cells(tmp_path, open_diff):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name,city,note\n1,a,x,\n2,b,y,same\n")
+    file2.write_text("id,city,name,extra\n1,x,a2,new\n2,z,b,new\n")
+
+    with open_diff(file1, file2, ["id"]) as diff:
+        lines = list(format_keyed_diff(diff, "file1.csv", "file2.csv", cells=True))
+
+    # Columns are matched by name; columns missing on one side are not compared
+    assert lines == [
+        "--- file1.csv",
+        "+++ file2.csv",
+        "@@ id=1 @@",
+        "~ name: a -> a2",
+        "@@ id=2 @@",
+        "~ city: y -> z",
+    ]
+
+
+def test_format_keyed_diff_no_changes(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n")
+    file2.write_text("id,name\n2,b\n1,a\n")
+
+    with open_keyed_diff(file1, file2, ["id"]) as diff:
+        assert list(format_keyed_diff(diff, "file1.csv", "file2.csv")) == []
+
+
+def test_open_sorted_keyed_diff_matches_join(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n3,c\n5,e\n")
+    file2.write_text("id,name\n2,x\n3,c\n4,d\n5,e\n")
+
+    with open_sorted_keyed_diff(file1, file2, ["id"]) as diff:
+        merged = list(diff.changes)
+    with open_keyed_diff(file1, file2, ["id"], row_numbers=True) as diff:
+        joined = list(diff.changes)
+
+    assert merged == joined
+    assert [(change.kind, change.key, change.old_row, change.new_row) for change in merged] == [
+        ("removed", ("1",), 1, None),
+        ("changed", ("2",), 2, 1),
+        ("added", ("4",), None, 3),
+    ]
+
+
+def test_open_keyed_diff_row_numbers(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n3,c\n1,a\n2,b\n")
+    file2.write_text("id,name\n2,x\n4,d\n3,c\n")
+
+    with open_keyed_diff(file1, file2, ["id"]) as diff:
+        assert [(change.old_row, change.new_row) for change in diff.changes] == [(None, None)] * 3
+    with open_keyed_diff(file1, file2, ["id"], row_numbers=True) as diff:
+        changes = list(diff.changes)
+
+    assert [(change.kind, change.key, change.old_row, change.new_row) for change in changes] == [
+        ("removed", ("1",), 2, None),
+        ("changed", ("2",), 3, 1),
+        ("added", ("4",), None, 2),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("content", "problem"),
+    [
+        ("id,name\n2,b\n1,a\n", "key out of order id=1"),
+        ("id,name\n1,a\n1,b\n", "duplicate key id=1"),
+    ],
+)
+def test_open_sorted_keyed_diff_rejects_unsorted(tmp_path, content, problem):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text(content)
+    file2.write_text("id,name\n1,a\n")
+
+    with pytest.raises(ValueError, match=f"First CSV file is not sorted by key: {problem} at row 2"):
+        with open_sorted_keyed_diff(file1, file2, ["id"]) as diff:
+            list(diff.changes)
+
+
+def test_summarize_keyed_diff(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name,price\n1,a,1\n2,b,2\n3,c,3\n5,e,5\n")
+    file2.write_text("id,name,price\n4,d,4\n3,c,9\n2,x,9\n5,e,5\n")
+
+    summary = summarize_keyed_diff(file1, file2, ["id"])
+
+    assert summary == (4, 4, 1, 1, 2, {"name": 1, "price": 2})
+    assert summary.has_differences
+
+
+def test_summarize_sorted_keyed_diff(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name,price\n1,a,1\n2,b,2\n3,c,3\n")
+    file2.write_text("id,name,price\n2,x,9\n3,c,9\n4,d,4\n")
+
+    summary = summarize_sorted_keyed_diff(file1, file2, ["id"])
+
+    assert summary == (None, None, 1, 1, 2, {"name": 1, "price": 2})
+
+
+def test_has_keyed_changes(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file3 = tmp_path / "file3.csv"
+    file1.write_text("id,name\n1,a\n2,b\n")
+    file2.write_text("id,name\n2,b\n1,a\n")
+    file3.write_text("id,name\n2,b\n1,x\n")
+
+    assert not has_keyed_changes(file1, file2, ["id"])
+    assert has_keyed_changes(file1, file3, ["id"])
@@ -0,0 +1,165 @@
+import json
+
+import duckdb
+import pytest
+
+from csvdiff.utils.compare import CompareOptions
+from csvdiff.utils.files import OutputFormat
+from csvdiff.utils.records import (
+    ChangeRecord,
+    ChangeRecords,
+    format_csv_records,
+    format_json_records,
+    open_change_records,
+    write_records,
+)
+
+
+@pytest.fixture
+def csv_pair(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n3,c\n")
+    file2.write_text("id,name\n1,a\n2,x\n4,\n5,e\n")
+    return file1, file2
+
+
+def test_open_change_records_by_position(csv_pair):
+    with open_change_records(*csv_pair) as changes:
+        records = list(changes.records)
+
+    assert changes.key_columns is None
+    assert records == [
+        ChangeRecord("changed", 2, 2, None, ("2", "b"), ("2", "x"), ("name",)),
+        ChangeRecord("changed", 3, 3, None, ("3", "c"), ("4", None), ("id", "name")),
+        ChangeRecord("added", None, 4, None, None, ("5", "e"), ()),
+    ]
+
+
+def test_open_change_records_by_key(csv_pair):
+    with open_change_records(*csv_pair, CompareOptions(key_columns=("id",))) as changes:
+        records = list(changes.records)
+
+    assert changes.key_columns == ["id"]
+    assert [(record.op, record.key, record.old_row, record.new_row, record.changed_columns) for record in records] == [
+        ("changed", ("2",), 2, 2, ("name",)),
+        ("removed", ("3",), 3, None, ()),
+        ("added", ("4",), None, 3, ()),
+        ("added", ("5",), None, 4, ()),
+    ]
+
+
+def test_open_change_records_sorted_by_key(csv_pair):
+    options = CompareOptions(key_columns=("id",), sorted_input=True)
+    with open_change_records(*csv_pair, options) as changes:
+        streamed = list(changes.records)
+        assert changes.relation is None
+    with open_change_records(*csv_pair, options, in_duckdb=True) as changes:
+        joined = list(changes.records)
+        assert changes.relation is not None
+
+    assert streamed == joined
+
+
+def test_open_change_records_rejects_ignore_order(csv_pair):
+    with pytest.raises(ValueError, match="--ignore-order"):
+        with open_change_records(*csv_pair, CompareOptions(ignore_order=True)):
+            pass
+
+
+def _changes(*records: ChangeRecord) -> ChangeRecords:
+    return ChangeRecords(["id"], ["id", "name"], ["id", "name"], iter(records))
+
+
+def test_format_json_records():
+    lines = list(
+        format_json_records(
+            _changes(
+                ChangeRecord("changed", None, None, ("1",), ("1", "café"), ("1", None), ("name",)),
+                ChangeRecord("removed", None, None, ("2",), ("2", "b"), None, ()),
+            )
+        )
+    )
+
+    assert [json.loads(line) for line in lines] == [
+        {
+            "op": "changed",
+            "old_row": None,
+            "new_row": None,
+            "key": {"id": "1"},
+            "old": {"id": "1", "name": "café"},
+            "new": {"id": "1", "name": None},
+            "changed": ["name"],
+        },
+        {
+            "op": "removed",
+            "old_row": None,
+            "new_row": None,
+            "key": {"id": "2"},
+            "old": {"id": "2", "name": "b"},
+            "new": None,
+            "changed": [],
+        },
+    ]
+    assert "café" in lines[0]
+
+
+def test_format_csv_records():
+    lines = list(
+        format_csv_records(
+            _changes(
+                ChangeRecord("changed", None, None, ("1",), ("1", "a,b"), ("1", "c"), ("name",)),
+                ChangeRecord("added", None, None, ("3",), None, ("3", "d"), ()),
+            )
+        )
+    )
+
+    assert lines == [
+        "op,old_row,new_row,changed,key.id,old.id,old.name,new.id,new.name",
+        'changed,,,name,1,1,"a,b",1,c',
+        "added,,,,3,,,3,d",
+    ]
+
+
+def test_write_records_parquet(tmp_path, csv_pair):
+    with open_change_records(*csv_pair) as changes:
+        output_path, has_records = write_records(changes, tmp_path / "changes.parquet", OutputFormat.PARQUET)
+
+    assert has_records
+    assert list(tmp_path.glob("*.tmp")) == []
+    rows = duckdb.sql(
+        f"SELECT op, old_row, new_row, old.name, new.name, changed FROM read_parquet('{output_path}')"
+    ).fetchall()
+    assert rows == [
+        ("changed", 2, 2, "b", "x", ["name"]),
+        ("changed", 3, 3, "c", None, ["id", "name"]),
+        ("added", None, 4, None, "e", []),
+    ]
+
+
+@pytest.mark.parametrize("sorted_input", [False, True])
+def test_write_records_parquet_by_key(tmp_path, csv_pair, sorted_input):
+    options = CompareOptions(key_columns=("id",), sorted_input=sorted_input)
+    with open_change_records(*csv_pair, options, in_duckdb=True) as changes:
+        output_path, has_records = write_records(changes, tmp_path / "changes.parquet", OutputFormat.PARQUET)
+
+    assert has_records
+    rows = duckdb.sql(
+        f"SELECT op, old_row, new_row, key.id, old.name, new, changed FROM read_parquet('{output_path}')"
+    ).fetchall()
+    assert rows == [
+        ("changed", 2, 2, "2", "b", {"id": "2", "name": "x"}, ["name"]),
+        ("removed", 3, None, "3", "c", None, []),
+        ("added", None, 3, "4", None, {"id": "4", "name": None}, []),
+        ("added", None, 4, "5", None, {"id": "5", "name": "e"}, []),
+    ]
+
+
+def test_write_records_parquet_requires_relation(tmp_path):
+    with pytest.raises(ValueError, match="in_duckdb"):
+        write_records(_changes(), tmp_path / "changes.parquet", OutputFormat.PARQUET)
+
+
+def test_write_records_rejects_diff(tmp_path):
+    with pytest.raises(ValueError):
+        write_records(_changes(), tmp_path / "changes.diff", OutputFormat.DIFF)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from csvdiff.utils.stats import collect_stats, phase, record_rows
+
+
+def test_phase_does_nothing_without_collect_stats():
+    with phase("diff"):
+        pass
+    record_rows("file.csv", 3)
+
+
+def test_nested_phases_are_exclusive():
+    with collect_stats() as stats:
+        with phase("diff"):
+            time.sleep(0.02)
+            with phase("write"):
+                time.sleep(0.05)
+
+    assert stats.phases["write"] >= 0.05
+    assert 0.02 <= stats.phases["diff"] < 0.05
+    assert stats.seconds >= stats.phases["diff"] + stats.phases["write"]
+
+
+def test_phases_are_summed_over_threads():
+    def work():
+        with phase("parse"):
+            time.sleep(0.02)
+
+    with collect_stats() as stats:
+        threads = [threading.Thread(target=work) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert stats.phases["parse"] >= 0.04
+
+
+def test_count_lines():
+    with collect_stats() as stats:
+        lines = list(stats.count_lines(["--- a", "+++ b", "@@ -1 +1 @@", "-x", "+y", "@@ -5 +5 @@", "-z"]))
+
+    assert len(lines) == 7
+    assert stats.diff_lines == 7
+    assert stats.hunks == 2
+
+
+def test_to_dict(tmp_path):
+    file_path = tmp_path / "file.csv"
+    file_path.write_text("a\n1\n2\n")
+    other_path = tmp_path / "other.csv"
+    other_path.write_text("a\n")
+
+    with collect_stats() as stats:
+        with phase("write"):
+            record_rows(file_path, 2)
+
+    report = stats.to_dict([file_path, other_path])
+
+    assert list(report["phases"]) == ["write"]
+    assert report["files"][0] == {
+        "path": str(file_path),
+        "bytes": 6,
+        "rows": 2,
+        "rows_per_sec": report["files"][0]["rows_per_sec"],
+    }
+    assert report["files"][0]["rows_per_sec"] > 0
+    assert report["files"][1]["rows"] is None
+    assert report["diff"] == {"lines": 0, "hunks": 0, "records": 0}
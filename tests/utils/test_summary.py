@@ -0,0 +1,31 @@
+from csvdiff.utils.summary import DiffSummary, count_opcodes, format_summary
+
+
+def test_count_opcodes():
+    opcodes = [
+        ("equal", 0, 2, 0, 2),
+        ("replace", 2, 5, 2, 4),
+        ("equal", 5, 6, 4, 5),
+        ("delete", 6, 7, 5, 5),
+        ("insert", 7, 7, 5, 8),
+    ]
+
+    assert count_opcodes(opcodes) == (2, 3, 2)
+
+
+def test_format_summary():
+    summary = DiffSummary(10, 11, 2, 1, 3, {"name": 1, "price": 3, "unchanged": 0})
+
+    assert list(format_summary(summary)) == [
+        " price | 3",
+        " name  | 1",
+        " 3 rows changed, 2 added, 1 removed (10 -> 11 rows)",
+    ]
+
+
+def test_format_summary_without_row_counts():
+    summary = DiffSummary(None, None, 0, 0, 1, {})
+
+    assert list(format_summary(summary)) == [" 1 row changed, 0 added, 0 removed"]
+    assert summary.has_differences
+    assert not DiffSummary(None, None, 0, 0, 0, {}).has_differences
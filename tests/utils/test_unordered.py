@@ -0,0 +1,78 @@
+import pytest
+
+from csvdiff.utils.unordered import (
+    format_unordered_diff,
+    has_unordered_changes,
+    open_unordered_diff,
+    summarize_unordered_diff,
+)
+
+
+def test_open_unordered_diff_keeps_duplicate_counts(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n2,b\n3,c\n")
+    file2.write_text("id,name\n3,c\n2,b\n4,d\n1,a\n")
+
+    with open_unordered_diff(file1, file2) as diff:
+        assert (diff.removed, diff.added) == (1, 1)
+        assert list(diff.changes) == [("-", "2,b"), ("+", "4,d")]
+
+
+def test_format_unordered_diff(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n2,b\n1,a\n")
+    file2.write_text("id,name\n1,a\n2,x\n")
+
+    with open_unordered_diff(file1, file2) as diff:
+        lines = list(format_unordered_diff(diff, "a.csv", "b.csv"))
+
+    assert lines == ["--- a.csv", "+++ b.csv", "@@ 1 removed, 1 added @@", "-2,b", "+2,x"]
+
+
+def test_format_unordered_diff_same_rows(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n2,b\n1,a\n")
+    file2.write_text("id,name\n1,a\n2,b\n")
+
+    with open_unordered_diff(file1, file2) as diff:
+        assert list(format_unordered_diff(diff, "a.csv", "b.csv")) == []
+
+
+def test_open_unordered_diff_empty_file(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n")
+    file2.write_text("id,name\n1,a\n")
+
+    with pytest.raises(ValueError, match="First CSV file"):
+        with open_unordered_diff(file1, file2):
+            pass
+
+
+def test_summarize_unordered_diff(tmp_path):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n2,b\n3,c\n")
+    file2.write_text("id,name\n3,c\n2,b\n4,d\n1,a\n")
+
+    assert summarize_unordered_diff(file1, file2) == (4, 4, 1, 1, 0, {})
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        ("id,name\n2,b\n1,a\n2,b\n", False),
+        ("id,name\n2,b\n1,a\n", True),
+        ("id,name\n2,b\n1,a\n1,a\n", True),
+    ],
+)
+def test_has_unordered_changes(tmp_path, content, expected):
+    file1 = tmp_path / "file1.csv"
+    file2 = tmp_path / "file2.csv"
+    file1.write_text("id,name\n1,a\n2,b\n2,b\n")
+    file2.write_text(content)
+
+    assert has_unordered_changes(file1, file2) is expected
@@ -3,7 +3,8 @@ from pathlib import Path
 import pytest
 import typer
 
-from csvdiff.utils.validation import validate_csv_file, validate_output_path
+from csvdiff.utils.files import OutputFormat
+from csvdiff.utils.validation import validate_csv_file, validate_output_dir, validate_output_path
 
 
 def test_validate_csv_file_wrong_extension(tmp_path):
@@ -22,6 +23,16 @@ def test_validate_csv_file_valid_file(tmp_path):
         pytest.fail("validate_csv_file raised an exception for a valid file")
 
 
+@pytest.mark.parametrize("name", ["file.csv.gz", "file.CSV.zst"])
+def test_validate_csv_file_compressed(tmp_path, name):
+    validate_csv_file(tmp_path / name, "Test CSV file")
+
+
+def test_validate_csv_file_compressed_wrong_extension(tmp_path):
+    with pytest.raises(typer.Exit):
+        validate_csv_file(tmp_path / "file.txt.gz", "Test CSV file")
+
+
 # --- Test cases for validate_output_path ---
 
 
@@ -76,3 +87,55 @@ def test_validate_output_path_reject_invalid_extensions():
     for path_str in invalid_extensions:
         with pytest.raises(typer.Exit):
             validate_output_path(Path(path_str))
+
+
+@pytest.mark.parametrize("name", ["result.diff.gz", "result.txt.zst", "result.gz"])
+def test_validate_output_path_compressed(name):
+    assert validate_output_path(Path(name)) == Path(name)
+
+
+def test_validate_output_path_compressed_wrong_extension():
+    with pytest.raises(typer.Exit):
+        validate_output_path(Path("result.csv.gz"))
+
+
+@pytest.mark.parametrize(
+    ("name", "output_format"),
+    [
+        ("changes.jsonl", OutputFormat.JSONL),
+        ("changes.ndjson.gz", OutputFormat.JSONL),
+        ("changes.csv", OutputFormat.CSV),
+        ("changes.csv.zst", OutputFormat.CSV),
+        ("changes.parquet", OutputFormat.PARQUET),
+    ],
+)
+def test_validate_output_path_record_formats(name, output_format):
+    assert validate_output_path(Path(name), output_format) == Path(name)
+
+
+@pytest.mark.parametrize(
+    ("name", "output_format"),
+    [
+        ("changes.diff", OutputFormat.JSONL),
+        ("changes.jsonl", OutputFormat.CSV),
+        ("changes", OutputFormat.CSV),
+        ("changes.parquet.gz", OutputFormat.PARQUET),
+    ],
+)
+def test_validate_output_path_record_formats_wrong_extension(name, output_format):
+    with pytest.raises(typer.Exit):
+        validate_output_path(Path(name), output_format)
+
+
+# --- Test cases for validate_output_dir ---
+
+
+@pytest.mark.parametrize("name", ["out", "out.v2", "reports/2024.01"])
+def test_validate_output_dir(name):
+    assert validate_output_dir(Path(name)) == Path(name)
+
+
+@pytest.mark.parametrize("name", ["/tmp/out", "../out", "out/../../etc"])
+def test_validate_output_dir_rejects_unsafe_paths(name):
+    with pytest.raises(typer.Exit):
+        validate_output_dir(Path(name))